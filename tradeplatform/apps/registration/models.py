@@ -1,8 +1,10 @@
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from apps.registration.services.principal_cache_logic import \
+    invalidate_cached_user
 from apps.trades.models import Balance, WatchList
 from apps.trades.services.db_interaction import get_or_create_default_currency
 
@@ -24,3 +26,19 @@ def create_user_default_attributes(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
         Balance.objects.create(user=instance, currency=get_or_create_default_currency())
         WatchList.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_principal(sender, instance, **kwargs):
+    """Authentication has to see changes of the user immediately"""
+
+    invalidate_cached_user(user_id=instance.id)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_principal(sender, instance, **kwargs):
+    """Authentication has to see changes of the user's profile immediately"""
+
+    invalidate_cached_user(user_id=instance.user_id)
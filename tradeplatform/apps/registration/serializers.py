@@ -6,9 +6,10 @@ from rest_framework.validators import UniqueValidator
 
 from apps.registration.models import UserProfile
 from apps.registration.services.db_interaction import check_email_user_exist
+from apps.trades.customserializers import DynamicFieldsSerializerMixin
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for User Profile model"""
 
     user = serializers.SlugRelatedField(slug_field="username", read_only=True)
@@ -37,7 +38,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for User model"""
 
     email = serializers.EmailField(
@@ -0,0 +1,92 @@
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+USER_FIELDS = ("id", "username", "is_staff", "is_superuser", "is_active")
+PROFILE_FIELDS = ("id", "user_id", "is_valid")
+
+
+def get_principal_cache_key(user_id: int) -> str:
+    """Return cache key of the user's principal"""
+
+    return f"registration:principal:{user_id}"
+
+
+def get_cached_user(user_id: int) -> Optional[User]:
+    """
+    Return user with loaded profile from compact principal stored in the cache.
+    Only principal fields are loaded, the others are deferred, so reading them
+    makes a query and saving the user doesn't overwrite them
+    """
+
+    key = get_principal_cache_key(user_id=user_id)
+    principal = cache.get(key)
+
+    if principal is None:
+        principal = _load_principal(user_id=user_id)
+        if principal is None:
+            return None
+        cache.set(key, principal, settings.AUTH_PRINCIPAL_CACHE_TIMEOUT)
+
+    return _build_user(principal=principal)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Remove the user's principal from the cache"""
+
+    cache.delete(get_principal_cache_key(user_id=user_id))
+
+
+def _load_principal(user_id: int) -> Optional[dict]:
+    """Load principal fields of the user and its profile with one query"""
+
+    row = (
+        User.objects.filter(id=user_id)
+        .values(*USER_FIELDS, "profile__id", "profile__is_valid")
+        .first()
+    )
+    if row is None:
+        return None
+
+    return {
+        "user": [row[field] for field in USER_FIELDS],
+        "profile": (
+            [row["profile__id"], user_id, row["profile__is_valid"]]
+            if row["profile__id"] is not None
+            else None
+        ),
+    }
+
+
+def _build_user(principal: dict) -> User:
+    """Return user instance with deferred fields and cached profile"""
+
+    user = _from_db(model=User, field_names=USER_FIELDS, values=principal["user"])
+
+    if principal["profile"] is not None:
+        relation = User.profile.related
+        profile = _from_db(
+            model=relation.related_model,
+            field_names=PROFILE_FIELDS,
+            values=principal["profile"],
+        )
+        relation.set_cached_value(user, profile)
+        relation.field.set_cached_value(profile, user)
+
+    return user
+
+
+def _from_db(model, field_names: tuple, values: list):
+    """Return model instance, which has only the given fields loaded"""
+
+    loaded = dict(zip(field_names, values))
+    attnames = [field.attname for field in model._meta.concrete_fields]
+
+    return model.from_db(
+        DEFAULT_DB_ALIAS,
+        [name for name in attnames if name in loaded],
+        [loaded[name] for name in attnames if name in loaded],
+    )
@@ -0,0 +1,83 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.registration.customauthentication import CachedJWTAuthentication
+from apps.registration.services.principal_cache_logic import (
+    get_cached_user, get_principal_cache_key)
+
+
+def test_cached_user_without_queries(user_instance):
+    """Ensure that the second lookup of the user doesn't touch the database"""
+
+    get_cached_user(user_id=user_instance.id)
+
+    with CaptureQueriesContext(connection) as queries:
+        user = get_cached_user(user_id=user_instance.id)
+        assert user == user_instance
+        assert user.username == user_instance.username
+        assert user.is_staff == user_instance.is_staff
+        assert user.profile.is_valid is False
+
+    assert len(queries) == 0
+
+
+def test_cached_user_invalidated_on_profile_save(user_instance):
+    """Ensure that changes of the profile are visible immediately"""
+
+    get_cached_user(user_id=user_instance.id)
+
+    user_instance.profile.is_valid = True
+    user_instance.profile.save()
+
+    assert cache.get(get_principal_cache_key(user_id=user_instance.id)) is None
+    assert get_cached_user(user_id=user_instance.id).profile.is_valid is True
+
+
+def test_cached_user_invalidated_on_user_save(user_instance):
+    """Ensure that changes of the user are visible immediately"""
+
+    get_cached_user(user_id=user_instance.id)
+
+    user_instance.is_staff = True
+    user_instance.save()
+
+    assert get_cached_user(user_id=user_instance.id).is_staff is True
+
+
+def test_cached_user_save_keeps_deferred_fields(user_instance):
+    """Ensure that saving the cached user doesn't overwrite fields out of principal"""
+
+    email = user_instance.email
+    user = get_cached_user(user_id=user_instance.id)
+    user.username = "renamed"
+    user.save()
+
+    user_instance.refresh_from_db()
+    assert user_instance.username == "renamed"
+    assert user_instance.email == email
+    assert user_instance.password
+
+
+def test_cached_user_not_found():
+    """Ensure that missing user isn't cached"""
+
+    assert get_cached_user(user_id=0) is None
+
+
+def test_cached_jwt_authentication(user_instance):
+    """Ensure that authentication rejects inactive users"""
+
+    authentication = CachedJWTAuthentication()
+    token = authentication.get_validated_token(str(AccessToken.for_user(user_instance)))
+
+    assert authentication.get_user(token) == user_instance
+
+    user_instance.is_active = False
+    user_instance.save()
+
+    with pytest.raises(AuthenticationFailed):
+        authentication.get_user(token)
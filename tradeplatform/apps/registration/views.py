@@ -22,13 +22,16 @@ from apps.registration.tasks import (change_email_address,
                                      send_change_email_address_mail,
                                      send_confirmation_mail_message,
                                      send_reset_password_mail)
+from apps.trades.customserializers import ExpandableQuerySetMixin
+from apps.trades.services.replica_logic import read_from_replica
 
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class UserViewSet(ExpandableQuerySetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for User model"""
 
     serializer_class = UserSerializer
     queryset = User.objects.all()
+    expandable_select_related = {"profile": "profile"}
 
     permission_classes = (IsAuthenticated,)
 
@@ -61,7 +64,8 @@ class UserProfileViewSet(
             super(UserProfileViewSet, self).retrieve(request, *args, **kwargs).data
         )
 
-        statistic_data = get_statistics_attribute(user_profile_id=kwargs["pk"])
+        with read_from_replica(user=request.user):
+            statistic_data = get_statistics_attribute(user_profile_id=kwargs["pk"])
 
         return Response(
             data=dict(list(response_data.items()) + list(statistic_data.items())),
@@ -1,7 +1,8 @@
 from django.contrib import admin
 
+from apps.trades.customadmin import AutocompleteFilter, LargeTableAdmin
 from apps.trades.models import (Balance, Currency, Inventory, Item, Offer,
-                                Price, Trade, WatchList)
+                                OfferArchive, Price, Trade, WatchList)
 
 
 @admin.register(Currency)
@@ -21,18 +22,14 @@ class ItemAdmin(admin.ModelAdmin):
 
 
 @admin.register(Price)
-class PriceAdmin(admin.ModelAdmin):
+class PriceAdmin(LargeTableAdmin):
     list_display = ("currency", "item", "price", "date")
+    list_select_related = ("currency", "item")
     list_filter = (
-        "price",
+        ("item", AutocompleteFilter),
         "date",
-        "item__code",
-    )
-    search_fields = (
-        "item__code",
-        "price",
     )
-    ordering = ("-price", "item__code")
+    search_fields = ("item__code",)
 
 
 @admin.register(WatchList)
@@ -44,102 +41,99 @@ class WatchlistAdmin(admin.ModelAdmin):
 
 
 @admin.register(Offer)
-class OfferAdmin(admin.ModelAdmin):
+class OfferAdmin(LargeTableAdmin):
     list_display = (
         "user",
+        "item",
         "status",
         "entry_quantity",
         "price",
         "is_active",
     )
+    list_select_related = ("user", "item")
     list_filter = (
-        "user__username",
+        ("user", AutocompleteFilter),
+        ("item", AutocompleteFilter),
         "status",
         "is_active",
     )
-    search_fields = (
-        "user__username",
+    search_fields = ("user__username",)
+
+
+@admin.register(OfferArchive)
+class OfferArchiveAdmin(LargeTableAdmin):
+    list_display = (
+        "id",
+        "user",
         "status",
         "entry_quantity",
         "price",
+        "updated_at",
+        "archived_at",
     )
-    ordering = (
-        "-price",
-        "-entry_quantity",
-    )
+    list_select_related = ("user",)
+    list_filter = (("user", AutocompleteFilter), "status")
+    search_fields = ("user__username",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Inventory)
-class InventoryAdmin(admin.ModelAdmin):
+class InventoryAdmin(LargeTableAdmin):
     list_display = (
         "user",
         "item",
         "quantity",
     )
+    list_select_related = ("user", "item")
     list_filter = (
-        "user__username",
-        "item__code",
+        ("user", AutocompleteFilter),
+        ("item", AutocompleteFilter),
     )
     search_fields = (
         "user__username",
         "item__code",
-        "quantity",
-    )
-    ordering = (
-        "user__username",
-        "item__code",
-        "-quantity",
     )
 
 
 @admin.register(Balance)
-class BalanceAdmin(admin.ModelAdmin):
+class BalanceAdmin(LargeTableAdmin):
     list_display = (
         "user",
         "currency",
         "quantity",
     )
+    list_select_related = ("user", "currency")
     list_filter = (
-        "user__username",
+        ("user", AutocompleteFilter),
         "currency__code",
     )
     search_fields = (
         "user__username",
         "currency__code",
-        "quantity",
-    )
-    ordering = (
-        "user__username",
-        "currency__code",
-        "-quantity",
     )
 
 
 @admin.register(Trade)
-class TradeAdmin(admin.ModelAdmin):
+class TradeAdmin(LargeTableAdmin):
     list_display = (
         "item",
         "seller",
         "buyer",
         "quantity",
         "unit_price",
-        "buyer_offer",
-        "seller_offer",
+        # Ids only, offers of old trades could be moved to the archive
+        "buyer_offer_id",
+        "seller_offer_id",
     )
+    list_select_related = ("item", "seller", "buyer")
     list_filter = (
-        "item__code",
-        "seller__username",
-        "buyer__username",
-    )
-    search_fields = (
-        "item__code",
-        "seller__username",
-        "buyer__username",
-        "unit__price",
-        "quantity",
-    )
-    ordering = (
-        "item__code",
-        "-unit_price",
-        "-quantity",
+        ("item", AutocompleteFilter),
+        ("seller", AutocompleteFilter),
+        ("buyer", AutocompleteFilter),
     )
+    search_fields = ("search_text",)
@@ -2,4 +2,10 @@ from django.apps import AppConfig
 
 
 class TradesConfig(AppConfig):
-    name = "trades"
+    name = "apps.trades"
+    label = "trades"
+
+    def ready(self):
+        """Connect signal receivers and register system checks of the app"""
+
+        from apps.trades import checks, signals  # noqa: F401
@@ -0,0 +1,168 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+from apps.trades.customthrottles import ReadThrottle, StatisticThrottle
+from apps.trades.services.market_data_logic import (get_latest_prices,
+                                                    get_order_book_depth,
+                                                    get_recent_trades)
+from apps.trades.services.replica_logic import read_from_replica
+from apps.trades.services.statistic_logic import get_statistics_attribute
+
+MAX_DEPTH_LEVELS = 50
+MAX_RECENT_TRADES = 100
+
+
+async def order_book_depth(request, item_id: int):
+    """Return aggregated price levels of active offers for the item"""
+
+    levels = _get_limit(
+        request=request, name="levels", default=10, maximum=MAX_DEPTH_LEVELS
+    )
+
+    return await _respond(request, get_order_book_depth, item_id=item_id, levels=levels)
+
+
+async def item_statistics(request, item_id: int):
+    """Return statistic about offer's price, the same as StatisticView"""
+
+    return await _respond(
+        request,
+        get_statistics_attribute,
+        use_replica=True,
+        throttle_classes=(StatisticThrottle,),
+        item_id=item_id,
+    )
+
+
+async def latest_prices(request):
+    """Return the latest price of every item"""
+
+    return await _respond(request, get_latest_prices)
+
+
+async def recent_trades(request, item_id: int):
+    """Return the latest trades of the item"""
+
+    limit = _get_limit(
+        request=request, name="limit", default=20, maximum=MAX_RECENT_TRADES
+    )
+
+    return await _respond(request, get_recent_trades, item_id=item_id, limit=limit)
+
+
+async def _respond(
+    request,
+    function,
+    use_replica: bool = False,
+    throttle_classes: tuple = (ReadThrottle,),
+    **kwargs,
+) -> JsonResponse:
+    """
+    Authenticate the request and return result of the function as JSON.
+    Under ASGI server only database queries are run in the thread pool,
+    so slow clients don't pin worker threads. With `use_replica` the function
+    reads the replica database, unless the user wrote recently.
+    `throttle_classes` are the same as of the equivalent REST framework view
+    """
+
+    error = await sync_to_async(_authenticate)(
+        request, throttle_classes=throttle_classes
+    )
+    if error is not None:
+        return error
+
+    if use_replica:
+        function = partial(_call_on_replica, function, user=request.user)
+
+    data = await sync_to_async(function)(**kwargs)
+
+    return JsonResponse(data, encoder=encoders.JSONEncoder, safe=False)
+
+
+def _call_on_replica(function, user, **kwargs):
+    with read_from_replica(user=user):
+        return function(**kwargs)
+
+
+def _authenticate(request, throttle_classes: tuple):
+    """
+    Authenticate the request with the default REST framework authentication classes
+    and take a token from the user's budget of every throttle class.
+    Return error response if the user isn't authenticated or throttled, otherwise None
+    """
+
+    authenticators = [
+        authentication()
+        for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ]
+    drf_request = Request(request, authenticators=authenticators)
+
+    try:
+        is_authenticated = drf_request.user.is_authenticated
+    except exceptions.AuthenticationFailed as error:
+        data = (
+            error.detail if isinstance(error.detail, dict) else {"detail": error.detail}
+        )
+        return _unauthorized(
+            data=data, authenticators=authenticators, request=drf_request
+        )
+
+    if not is_authenticated:
+        return _unauthorized(
+            data={"detail": exceptions.NotAuthenticated.default_detail},
+            authenticators=authenticators,
+            request=drf_request,
+        )
+
+    for throttle_class in throttle_classes:
+        throttle = throttle_class()
+        if not throttle.allow_request(drf_request, None):
+            return _throttled(wait=throttle.wait())
+
+    return None
+
+
+def _unauthorized(data: dict, authenticators: list, request: Request) -> JsonResponse:
+    """Return 401 response like REST framework views do"""
+
+    response = JsonResponse(
+        data, encoder=encoders.JSONEncoder, status=status.HTTP_401_UNAUTHORIZED
+    )
+
+    if authenticators:
+        header = authenticators[0].authenticate_header(request)
+        if header:
+            response["WWW-Authenticate"] = header
+
+    return response
+
+
+def _throttled(wait: int) -> JsonResponse:
+    """Return 429 response like REST framework views do"""
+
+    error = exceptions.Throttled(wait=wait)
+    response = JsonResponse(
+        {"detail": error.detail},
+        encoder=encoders.JSONEncoder,
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+    response["Retry-After"] = str(wait)
+
+    return response
+
+
+def _get_limit(request, name: str, default: int, maximum: int) -> int:
+    """Return positive integer query parameter limited by the maximum"""
+
+    try:
+        value = int(request.GET.get(name, default))
+    except ValueError:
+        value = default
+
+    return min(max(value, 1), maximum)
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core import checks
+
+from apps.trades.services.replica_logic import get_replica_alias
+
+# Cache backends, which keep values in the memory of one process or nowhere
+PROCESS_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@checks.register()
+def check_replica_cache(app_configs, **kwargs):
+    """
+    Writes of users are remembered in the default cache, so requests handled
+    by other processes read the primary too. Per-process cache would send them
+    to the lagging replica
+    """
+
+    if get_replica_alias() is None or settings.REPLICA_STICKY_SECONDS <= 0:
+        return []
+
+    if settings.CACHES["default"]["BACKEND"] not in PROCESS_CACHE_BACKENDS:
+        return []
+
+    return [
+        checks.Error(
+            "The read replica requires a cache shared by all processes.",
+            hint=(
+                "Set CACHE_BACKEND to a shared backend, e.g. "
+                "django.core.cache.backends.db.DatabaseCache or memcached, "
+                "or disable stickiness with REPLICA_STICKY_SECONDS=0."
+            ),
+            id="trades.E001",
+        )
+    ]
@@ -0,0 +1,189 @@
+import asyncio
+import json
+from typing import Optional
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from apps.registration.customauthentication import CachedJWTAuthentication
+from apps.trades.services.feed_logic import (get_feed_backend,
+                                             get_item_channel,
+                                             get_user_channel)
+
+FEED_PATH = "/api/v1/feed/"
+MAX_FEED_ITEMS = 50
+HEARTBEAT_INTERVAL = 15
+
+
+def is_feed_request(scope: dict) -> bool:
+    """Return True if the connection should be served by the live feed"""
+
+    return scope["type"] in ("http", "websocket") and scope["path"] == FEED_PATH
+
+
+async def feed_application(scope: dict, receive, send) -> None:
+    """
+    Push trades, offers and order book changes to subscribed clients.
+    Clients connect with WebSocket or Server-Sent Events (plain GET request),
+    pass JWT access token in `token` query parameter or Authorization header
+    and choose channels with `items=1,2` and `user=1` query parameters
+    """
+
+    if scope["type"] == "websocket":
+        if (await receive())["type"] != "websocket.connect":
+            return
+        reject, accept, send_data = _get_websocket_callbacks(send=send)
+        disconnect_type = "websocket.disconnect"
+    else:
+        reject, accept, send_data = _get_event_stream_callbacks(send=send)
+        disconnect_type = "http.disconnect"
+
+    user_id = await sync_to_async(_authenticate)(scope)
+    if user_id is None:
+        return await reject(401, "Authentication credentials were not provided.")
+
+    channels = _get_channels(scope=scope, user_id=user_id)
+    if not channels:
+        return await reject(400, "Choose items or user to subscribe to.")
+
+    backend = get_feed_backend()
+    if backend is None:
+        return await reject(503, "Live feed is disabled.")
+
+    subscription = backend.subscribe(channels=channels)
+    disconnected = asyncio.ensure_future(
+        _wait_for_disconnect(receive=receive, disconnect_type=disconnect_type)
+    )
+
+    try:
+        await accept()
+
+        while not disconnected.done():
+            message = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait(
+                {message, disconnected},
+                timeout=HEARTBEAT_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+            if message in done:
+                await send_data(message.result())
+            else:
+                message.cancel()
+                if not disconnected.done():
+                    await send_data(None)
+    finally:
+        subscription.close()
+        disconnected.cancel()
+
+
+def _authenticate(scope: dict) -> Optional[int]:
+    """Return id of the user, who owns the JWT access token, or None"""
+
+    authentication = CachedJWTAuthentication()
+
+    raw_token = _get_query(scope=scope).get("token")
+    if raw_token is None:
+        header = dict(scope.get("headers", ())).get(b"authorization")
+        raw_token = authentication.get_raw_token(header) if header else None
+        if raw_token is None:
+            return None
+
+    try:
+        user = authentication.get_user(authentication.get_validated_token(raw_token))
+    except (AuthenticationFailed, TokenError):
+        return None
+
+    return user.id
+
+
+def _get_channels(scope: dict, user_id: int) -> list:
+    """Return channels requested in query string. Users see only their own offers"""
+
+    query = _get_query(scope=scope)
+
+    item_ids = [
+        int(item_id)
+        for item_id in query.get("items", "").split(",")
+        if item_id.strip().isdigit()
+    ][:MAX_FEED_ITEMS]
+    channels = [get_item_channel(item_id=item_id) for item_id in set(item_ids)]
+
+    if query.get("user", "").lower() in ("1", "true", str(user_id)):
+        channels.append(get_user_channel(user_id=user_id))
+
+    return channels
+
+
+def _get_query(scope: dict) -> dict:
+    """Return the last value of every query parameter"""
+
+    query = parse_qs(scope.get("query_string", b"").decode())
+
+    return {name: values[-1] for name, values in query.items()}
+
+
+async def _wait_for_disconnect(receive, disconnect_type: str) -> None:
+    """Ignore messages from the client until it disconnects"""
+
+    while (await receive())["type"] != disconnect_type:
+        pass
+
+
+def _get_websocket_callbacks(send) -> tuple:
+    """Return functions to reject, accept the WebSocket and send messages to it"""
+
+    async def reject(code: int, detail: str) -> None:
+        await send({"type": "websocket.close", "code": 4000 + code})
+
+    async def accept() -> None:
+        await send({"type": "websocket.accept"})
+
+    async def send_data(data: Optional[str]) -> None:
+        if data is not None:
+            await send({"type": "websocket.send", "text": data})
+
+    return reject, accept, send_data
+
+
+def _get_event_stream_callbacks(send) -> tuple:
+    """Return functions to reject, start the event stream and send messages to it"""
+
+    async def reject(code: int, detail: str) -> None:
+        headers = [(b"content-type", b"application/json")]
+        if code == 401:
+            header_type = jwt_settings.AUTH_HEADER_TYPES[0]
+            headers.append((b"www-authenticate", f'{header_type} realm="api"'.encode()))
+
+        await send({"type": "http.response.start", "status": code, "headers": headers})
+        await send(
+            {
+                "type": "http.response.body",
+                "body": json.dumps({"detail": detail}).encode(),
+            }
+        )
+
+    async def accept() -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+
+    async def send_data(data: Optional[str]) -> None:
+        # Comments keep the connection open through proxies while there are no messages
+        body = f"data: {data}\n\n" if data is not None else ": ping\n\n"
+        await send(
+            {"type": "http.response.body", "body": body.encode(), "more_body": True}
+        )
+
+    return reject, accept, send_data
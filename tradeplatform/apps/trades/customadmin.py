@@ -0,0 +1,187 @@
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.urls import reverse
+from django.utils.functional import cached_property
+
+CURSOR_VAR = "after"
+
+
+class AutocompleteFilter(admin.RelatedFieldListFilter):
+    """
+    Filter by a related object, which is chosen with the admin autocomplete
+    of the related model instead of the list of all its objects
+    """
+
+    template = "admin/trades/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super(AutocompleteFilter, self).__init__(
+            field, request, params, model, model_admin, field_path
+        )
+        related_model = field.remote_field.model
+        self.autocomplete_url = reverse(
+            f"admin:{related_model._meta.app_label}_"
+            f"{related_model._meta.model_name}_autocomplete",
+            current_app=model_admin.admin_site.name,
+        )
+
+    def has_output(self):
+        return True
+
+    def field_choices(self, field, request, model_admin):
+        """Only the chosen object is loaded to show it in the filter"""
+
+        if not self.lookup_val:
+            return []
+
+        related_model = field.remote_field.model
+        return [
+            (obj.pk, str(obj))
+            for obj in related_model._default_manager.filter(pk=self.lookup_val)
+        ]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for tables with millions of rows. Unfiltered tables on PostgreSQL
+    are counted by the planner's estimate, other querysets are counted only up
+    to `count_limit` rows, so COUNT(*) doesn't scan the whole table
+    """
+
+    count_limit = 10000
+
+    def __init__(self, *args, **kwargs):
+        super(EstimatedCountPaginator, self).__init__(*args, **kwargs)
+        self.is_estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+
+        if not queryset.query.where:
+            estimate = get_estimated_count(queryset=queryset)
+            if estimate is not None and estimate > self.count_limit:
+                self.is_estimated = True
+                return estimate
+
+        count = queryset.order_by()[: self.count_limit + 1].count()
+        self.is_estimated = count > self.count_limit
+        return count
+
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList, which pages by id instead of OFFSET, when the list is sorted
+    by id, so the last pages are as fast as the first one. Pages are linked
+    with the `after` parameter, the last id of the previous page
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super(KeysetChangeList, self).get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        # Links to other filters, orderings and searches start from the first page
+        self.cursor = self.params.pop(CURSOR_VAR, None)
+        self.next_cursor = None
+        # ChangeList appends "-pk" to the ordering, so "-id" could be repeated
+        ordering = set(self.queryset.query.order_by)
+        self.is_keyset = not self.show_all and ordering in ({"-id"}, {"-pk"})
+        if not self.is_keyset:
+            return super(KeysetChangeList, self).get_results(request)
+
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        queryset = self.queryset
+        if self.cursor:
+            try:
+                queryset = queryset.filter(pk__lt=int(self.cursor))
+            except ValueError:
+                raise IncorrectLookupParameters
+
+        result_list = list(queryset[: self.list_per_page + 1])
+        has_next = len(result_list) > self.list_per_page
+        self.result_list = result_list[: self.list_per_page]
+        if has_next:
+            self.next_cursor = self.result_list[-1].pk
+
+        self.result_count = paginator.count
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.full_result_count = (
+            self.root_queryset.count() if self.show_full_result_count else None
+        )
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = has_next or bool(self.cursor)
+        self.paginator = paginator
+
+    @property
+    def next_page_url(self) -> str:
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+    @property
+    def first_page_url(self) -> str:
+        return self.get_query_string()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Base admin for tables with millions of rows: newest rows first,
+    keyset paging, estimated counts and no total count of the table
+    """
+
+    change_list_template = "admin/trades/keyset_change_list.html"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    @property
+    def media(self):
+        """Select2 of the admin for AutocompleteFilter"""
+
+        return super(LargeTableAdmin, self).media + forms.Media(
+            js=(
+                "admin/js/vendor/jquery/jquery.js",
+                "admin/js/vendor/select2/select2.full.js",
+                "admin/js/jquery.init.js",
+                "admin/js/autocomplete.js",
+                "trades/admin/autocomplete_filter.js",
+            ),
+            css={
+                "screen": (
+                    "admin/css/vendor/select2/select2.css",
+                    "admin/css/autocomplete.css",
+                )
+            },
+        )
+
+
+def get_estimated_count(queryset):
+    """
+    Return number of rows in the table of the queryset from PostgreSQL
+    statistics, partitions are summed up. None on other databases
+    """
+
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT SUM(GREATEST(reltuples, 0))::bigint FROM pg_class "
+            "WHERE oid = to_regclass(%s) OR oid IN ("
+            "SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(%s))",
+            [queryset.model._meta.db_table] * 2,
+        )
+        row = cursor.fetchone()
+
+    return row[0] if row else None
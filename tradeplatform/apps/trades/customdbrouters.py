@@ -0,0 +1,20 @@
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.trades.services.replica_logic import get_read_database
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica inside read_from_replica blocks and views with
+    ReplicaReadMixin, all other queries and every write go to the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        return get_read_database()
+
+    def db_for_write(self, model, **hints):
+        # Instances read from the replica are saved to the primary too
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -1,6 +1,26 @@
-from django_filters import DateTimeFilter, FilterSet, NumberFilter
+from django_filters import CharFilter, DateTimeFilter, FilterSet, NumberFilter
+from rest_framework.filters import SearchFilter
 
-from apps.trades.models import Balance, Inventory, Offer, Price, Trade
+from apps.trades.models import (Balance, Inventory, Item, Offer, OfferArchive,
+                                Price, Trade)
+
+
+class ItemFilter(FilterSet):
+    """Filter class for Item model, prices are taken from denormalized quote"""
+
+    min_price = NumberFilter(field_name="quote__price", lookup_expr="gte")
+    max_price = NumberFilter(field_name="quote__price", lookup_expr="lte")
+    currency__code = CharFilter(field_name="quote__currency__code")
+
+    class Meta:
+        model = Item
+        fields = (
+            "name",
+            "code",
+            "min_price",
+            "max_price",
+            "currency__code",
+        )
 
 
 class PriceFilter(FilterSet):
@@ -53,6 +73,13 @@ class OfferFilter(FilterSet):
         )
 
 
+class OfferArchiveFilter(OfferFilter):
+    """Filter class for OfferArchive model with the same filters as OfferFilter"""
+
+    class Meta(OfferFilter.Meta):
+        model = OfferArchive
+
+
 class InventoryFilter(FilterSet):
     """Filter class for Inventory model"""
 
@@ -108,3 +135,27 @@ class TradeFilter(FilterSet):
             "quantity",
             "max_quantity",
         )
+
+
+class IndexedSearchFilter(SearchFilter):
+    """
+    Search filter, which uses denormalized `search_column` of the view if it is set.
+    The column contains lowercase values of all search fields separated by spaces,
+    so the search doesn't need joins and could use a trigram index
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_column = getattr(view, "search_column", None)
+        search_terms = self.get_search_terms(request)
+
+        if not search_column or not search_terms:
+            return super(IndexedSearchFilter, self).filter_queryset(
+                request, queryset, view
+            )
+
+        for search_term in search_terms:
+            queryset = queryset.filter(
+                **{f"{search_column}__contains": search_term.lower()}
+            )
+
+        return queryset
@@ -0,0 +1,185 @@
+import asyncio
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+from apps.trades.services.metrics_logic import (HTTP_REQUEST_SECONDS,
+                                                HTTP_REQUESTS)
+from apps.trades.services.profiling_logic import (RENDER_PHASE, VIEW_PHASE,
+                                                  RequestProfile,
+                                                  get_server_timing,
+                                                  is_sampled_request,
+                                                  log_slow_request, set_view)
+from apps.trades.services.replica_logic import mark_user_write
+
+
+class HybridMiddleware:
+    """
+    Middleware, which runs in the mode of the next handler like MiddlewareMixin,
+    so the chain of the ASGI handler isn't switched to threads and back.
+    Subclasses implement `handle` for sync and `ahandle` for async requests
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function for the handler
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.ahandle(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def ahandle(self, request):
+        raise NotImplementedError
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """
+    Profile sampled requests: total time, SQL queries, view and render time.
+    Timings are returned in Server-Timing header and slow requests are written
+    to the profiling log. Should be the first middleware, so that it renders
+    the response after the other middlewares have processed it
+    """
+
+    def handle(self, request):
+        if not is_sampled_request():
+            return self.get_response(request)
+
+        profile = RequestProfile(method=request.method, path=request.path)
+        request.profile = profile
+
+        with ExitStack() as stack:
+            _wrap_connections(stack=stack, profile=profile)
+            response = self.get_response(request)
+            profile.finish()
+
+        return self._finish(profile=profile, response=response)
+
+    async def ahandle(self, request):
+        if not is_sampled_request():
+            return await self.get_response(request)
+
+        profile = RequestProfile(method=request.method, path=request.path)
+        request.profile = profile
+
+        # Queries of async views run in the thread of sync_to_async,
+        # which has its own connections
+        with ExitStack() as stack:
+            await sync_to_async(_wrap_connections)(stack=stack, profile=profile)
+            try:
+                response = await self.get_response(request)
+                profile.finish()
+            finally:
+                await sync_to_async(stack.close)()
+
+        return self._finish(profile=profile, response=response)
+
+    def _finish(self, profile: RequestProfile, response):
+        response["Server-Timing"] = get_server_timing(profile=profile)
+        log_slow_request(profile=profile, status_code=response.status_code)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = getattr(request, "profile", None)
+        if profile is not None:
+            set_view(profile=profile, view_func=view_func)
+            profile.start_phase(VIEW_PHASE)
+
+    def process_template_response(self, request, response):
+        profile = getattr(request, "profile", None)
+        if profile is not None:
+            profile.start_phase(RENDER_PHASE)
+            response.render()
+
+        return response
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Count requests and observe their duration per route. Route is the name
+    of the URL pattern, so it doesn't depend on ids in the path
+    """
+
+    def handle(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        return self._observe(request=request, response=response, started=started)
+
+    async def ahandle(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        return self._observe(request=request, response=response, started=started)
+
+    def _observe(self, request, response, started: float):
+        duration = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        route = (match.view_name or match.route) if match is not None else "unmatched"
+
+        HTTP_REQUESTS.inc(
+            route=route, method=request.method, status=response.status_code
+        )
+        HTTP_REQUEST_SECONDS.observe(duration, route=route, method=request.method)
+
+        return response
+
+
+class ReplicaStickinessMiddleware(HybridMiddleware):
+    """
+    Remember successful writes of users, so their next requests read
+    the primary database, until the replica has their writes.
+    Should be after AuthenticationMiddleware
+    """
+
+    def handle(self, request):
+        response = self.get_response(request)
+
+        if self._is_write(request=request, response=response):
+            self._mark_write(request=request)
+
+        return response
+
+    async def ahandle(self, request):
+        response = await self.get_response(request)
+
+        if self._is_write(request=request, response=response):
+            # The lazy user could query the session, which isn't allowed in the loop
+            await sync_to_async(self._mark_write)(request=request)
+
+        return response
+
+    def _is_write(self, request, response) -> bool:
+        return (
+            request.method not in SAFE_METHODS
+            and request.method not in getattr(request, "replica_methods", ())
+            and response.status_code < 400
+        )
+
+    def _mark_write(self, request) -> None:
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            mark_user_write(user=user)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Views, which only read on unsafe methods, e.g. statistics by the date
+        view_class = getattr(view_func, "cls", None)
+        request.replica_methods = getattr(view_class, "replica_methods", ())
+
+
+def _wrap_connections(stack: ExitStack, profile: RequestProfile) -> None:
+    """Record queries of all connections of the current thread"""
+
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(profile))
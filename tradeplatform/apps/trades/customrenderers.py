@@ -0,0 +1,41 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer, which uses orjson if it is installed.
+    The output is the same as the output of the default JSONRenderer
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data into compact JSON with orjson, otherwise use JSONRenderer"""
+
+        renderer_context = renderer_context or {}
+
+        if (
+            orjson is None
+            or data is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super(FastJSONRenderer, self).render(
+                data, accepted_media_type, renderer_context
+            )
+
+        ret = orjson.dumps(
+            data,
+            default=encoders.JSONEncoder().default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+
+        # JSONRenderer always escapes U+2028 and U+2029 characters
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -0,0 +1,147 @@
+from typing import Optional
+
+from rest_framework import serializers
+
+FIELDS_QUERY_PARAM = "fields"
+EXPAND_QUERY_PARAM = "expand"
+
+
+def parse_fields_tree(value: Optional[str]) -> Optional[dict]:
+    """
+    Convert comma separated dotted paths to the nested dictionary.
+    For example "id,user.username" turns into {"id": {}, "user": {"username": {}}}
+    """
+
+    if value is None:
+        return None
+
+    tree = {}
+
+    for path in value.split(","):
+        node = tree
+        for name in filter(None, path.strip().split(".")):
+            node = node.setdefault(name, {})
+
+    return tree
+
+
+def get_requested_trees(request) -> tuple:
+    """
+    Return fields and expand trees from the request query parameters.
+    Sparse fieldsets are applied only for reading requests
+    """
+
+    if request is None or request.method not in ("GET", "HEAD"):
+        return {}, None
+
+    fields_tree = parse_fields_tree(request.query_params.get(FIELDS_QUERY_PARAM))
+    expand_tree = parse_fields_tree(request.query_params.get(EXPAND_QUERY_PARAM))
+
+    return fields_tree or {}, expand_tree
+
+
+def is_field_expanded(request, path: str) -> bool:
+    """
+    Check that nested serializer by the given dotted path will be rendered.
+    If the field is skipped, related objects for it don't have to be fetched
+    """
+
+    fields_tree, expand_tree = get_requested_trees(request=request)
+
+    for name in path.split("."):
+        if fields_tree and name not in fields_tree:
+            return False
+        if expand_tree is not None and name not in expand_tree:
+            return False
+
+        fields_tree = fields_tree.get(name, {})
+        expand_tree = None if expand_tree is None else expand_tree[name]
+
+    return True
+
+
+class DynamicFieldsSerializerMixin:
+    """
+    Serializer mixin, which limits rendered fields by `fields` and `expand` query parameters.
+    `fields` contains names of the fields to render, all fields are rendered by default.
+    `expand` contains names of the nested serializers to render,
+    if it is given all other nested serializers are skipped
+    """
+
+    _fields_tree = None
+    _expand_tree = None
+
+    def get_fields(self):
+        """Return only requested fields, pass the rest of the query down to nested serializers"""
+
+        fields = super(DynamicFieldsSerializerMixin, self).get_fields()
+
+        if self._is_root():
+            fields_tree, expand_tree = get_requested_trees(
+                request=self.context.get("request")
+            )
+        else:
+            fields_tree, expand_tree = self._fields_tree or {}, self._expand_tree
+
+        if fields_tree:
+            fields = {
+                name: field for name, field in fields.items() if name in fields_tree
+            }
+
+        for name, field in list(fields.items()):
+            if not isinstance(field, serializers.BaseSerializer):
+                continue
+
+            if expand_tree is not None and name not in expand_tree:
+                del fields[name]
+                continue
+
+            nested = getattr(field, "child", field)
+            if isinstance(nested, DynamicFieldsSerializerMixin):
+                nested._fields_tree = fields_tree.get(name, {})
+                nested._expand_tree = None if expand_tree is None else expand_tree[name]
+
+        return fields
+
+    def _is_root(self) -> bool:
+        """Check that serializer is the top level one (or the child of the top list)"""
+
+        root = self.root
+
+        return root is self or (
+            isinstance(root, serializers.ListSerializer) and root.child is self
+        )
+
+
+class ExpandableQuerySetMixin:
+    """
+    ViewSet mixin, which joins and prefetches relations only for the nested
+    serializers requested by `fields` and `expand` query parameters
+    """
+
+    expandable_select_related = {}
+    expandable_prefetch_related = {}
+
+    def get_queryset(self):
+        """Add select_related and prefetch_related for rendered nested serializers"""
+
+        queryset = super(ExpandableQuerySetMixin, self).get_queryset()
+        request = getattr(self, "request", None)
+
+        select_related = [
+            lookup
+            for path, lookup in self.expandable_select_related.items()
+            if is_field_expanded(request=request, path=path)
+        ]
+        prefetch_related = [
+            lookup
+            for path, lookup in self.expandable_prefetch_related.items()
+            if is_field_expanded(request=request, path=path)
+        ]
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+
+        return queryset
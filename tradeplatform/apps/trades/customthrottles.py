@@ -0,0 +1,111 @@
+import math
+import time
+
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket throttle. Rate like "10/min" gives bucket of 10 tokens, which
+    is refilled with 10 tokens per minute. The bucket is stored in the cache
+    as theoretical arrival time (GCRA) changed only by atomic increments,
+    so concurrent workers don't overwrite each other's requests
+    """
+
+    cache = cache
+    scope = None
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        self.rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        self.retry_after = None
+
+    def allow_request(self, request, view):
+        """Take one token from the bucket of the request's user"""
+
+        if self.rate is None or not self.is_throttled_request(request, view):
+            return True
+
+        capacity, duration = self.parse_rate(rate=self.rate)
+        interval = max(int(duration * 1000 / capacity), 1)
+        burst = capacity * interval
+        key = self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_cache_ident(request),
+        }
+
+        now = int(time.time() * 1000)
+        self.cache.add(key, now, duration)
+        try:
+            arrival = self.cache.incr(key, interval)
+        except ValueError:
+            # The bucket expired right after it was created
+            arrival = now + interval
+            self.cache.set(key, arrival, duration)
+
+        if arrival < now + interval:
+            # The bucket was full, so the time of the next token starts from now
+            arrival = self.cache.incr(key, now + interval - arrival)
+
+        if arrival - now > burst:
+            self.cache.decr(key, interval)
+            self.retry_after = (arrival - now - burst) / 1000
+            return False
+
+        self.cache.touch(key, duration)
+        return True
+
+    @staticmethod
+    def parse_rate(rate: str) -> tuple:
+        """Return bucket's capacity and seconds to refill it from rate like 10/min"""
+
+        capacity, period = rate.split("/")
+        return int(capacity), DURATIONS[period[0]]
+
+    def is_throttled_request(self, request, view) -> bool:
+        """Return True if the request takes tokens from this bucket"""
+
+        return True
+
+    def get_cache_ident(self, request) -> str:
+        """Authenticated users have their own buckets, anonymous ones share it by IP"""
+
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def wait(self):
+        """Return seconds until the next token, used for Retry-After header"""
+
+        if self.retry_after is None:
+            return None
+        return math.ceil(self.retry_after)
+
+
+class ReadThrottle(TokenBucketThrottle):
+    """Budget for reading requests"""
+
+    scope = "reads"
+
+    def is_throttled_request(self, request, view) -> bool:
+        return request.method in SAFE_METHODS
+
+
+class OfferCreateThrottle(TokenBucketThrottle):
+    """Budget for creating offers, which runs balance and inventory validation"""
+
+    scope = "offer_create"
+
+    def is_throttled_request(self, request, view) -> bool:
+        return request.method == "POST"
+
+
+class StatisticThrottle(TokenBucketThrottle):
+    """Budget for statistics, which aggregates all offers of the item"""
+
+    scope = "statistics"
@@ -0,0 +1,92 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from apps.trades.customrenderers import FastJSONRenderer
+from apps.trades.customserializers import (EXPAND_QUERY_PARAM,
+                                           FIELDS_QUERY_PARAM)
+from apps.trades.services.fast_list_logic import ListPlan
+from apps.trades.services.replica_logic import (keep_read_database,
+                                                route_reads_to_replica)
+
+# Plans by viewset and serializer classes, None if the serializer can't be compiled
+_list_plans = {}
+
+
+class FastListMixin:
+    """
+    ViewSet mixin for read-only list endpoints, which builds the response
+    from `QuerySet.values()` instead of model instances and ModelSerializer.
+    Serializers with fields, which can't be rendered from values(), use the usual
+    list. Could be disabled by FAST_LIST_SERIALIZATION setting
+    """
+
+    def list(self, request, *args, **kwargs):
+        """List model instances using the precompiled serializer plan"""
+
+        plan = self.get_list_plan() if self.use_fast_list(request=request) else None
+        if plan is None:
+            return super(FastListMixin, self).list(request, *args, **kwargs)
+
+        context = self.get_serializer_context()
+        queryset = plan.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                plan.serialize(rows=page, context=context)
+            )
+
+        return Response(plan.serialize(rows=queryset, context=context))
+
+    def get_list_plan(self) -> Optional[ListPlan]:
+        """Compile the plan of the serializer once per viewset class"""
+
+        key = (type(self), self.get_serializer_class())
+        if key not in _list_plans:
+            try:
+                _list_plans[key] = ListPlan(serializer=self.get_serializer())
+            except ImproperlyConfigured:
+                _list_plans[key] = None
+
+        return _list_plans[key]
+
+    def get_renderers(self):
+        """Replace default JSONRenderer with the faster one"""
+
+        return [
+            FastJSONRenderer() if type(renderer) is JSONRenderer else renderer
+            for renderer in super(FastListMixin, self).get_renderers()
+        ]
+
+    def use_fast_list(self, request) -> bool:
+        """Sparse fieldsets are handled only by the serializer itself"""
+
+        return (
+            getattr(settings, "FAST_LIST_SERIALIZATION", True)
+            and FIELDS_QUERY_PARAM not in request.query_params
+            and EXPAND_QUERY_PARAM not in request.query_params
+        )
+
+
+class ReplicaReadMixin:
+    """
+    View mixin, which reads from the replica database on `replica_methods`,
+    unless the user wrote recently. Authentication still reads the primary
+    """
+
+    replica_methods = SAFE_METHODS
+
+    def dispatch(self, request, *args, **kwargs):
+        with keep_read_database():
+            return super(ReplicaReadMixin, self).dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super(ReplicaReadMixin, self).initial(request, *args, **kwargs)
+
+        if request.method in self.replica_methods:
+            route_reads_to_replica(user=request.user)
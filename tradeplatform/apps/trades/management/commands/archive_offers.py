@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.trades.services.archive_logic import archive_offers
+
+
+class Command(BaseCommand):
+    """Move old filled and cancelled offers to the archive table"""
+
+    help = (
+        "Move inactive offers, which didn't change for the given number of days, "
+        "to the archive table in batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.OFFER_ARCHIVE_AFTER_DAYS
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.OFFER_ARCHIVE_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--limit", type=int, help="Move at most this number of offers"
+        )
+
+    def handle(self, *args, **options):
+        moved = archive_offers(
+            older_than=timezone.timedelta(days=options["days"]),
+            batch_size=options["batch_size"],
+            limit=options["limit"],
+        )
+
+        self.stdout.write(f"Archived {moved} offers")
@@ -0,0 +1,130 @@
+import gc
+import random
+import resource
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.trades.models import Item, Offer
+from apps.trades.services.order_book_logic import load_order_books
+
+
+class Command(BaseCommand):
+    """
+    Compare loading active offers as model instances with loading them
+    into the in-memory books of the matcher
+    """
+
+    help = (
+        "Seed active offers, load them as model instances and as book orders, "
+        "print load time and peak memory of both"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--offers", type=int, default=1000000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--items", type=int, default=100)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--no-seed",
+            action="store_true",
+            help="Use offers, which are already in the database",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if not options["no_seed"]:
+                self.stdout.write("Seeding benchmark offers...")
+                _seed(rand=random.Random(options["seed"]), options=options)
+
+            results = [
+                ("model instances", *_measure(load=_load_model_instances)),
+                ("book orders", *_measure(load=load_order_books)),
+            ]
+            # Seeded offers are only needed for the measurement
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"\n{'loader':<20} {'seconds':>10} {'peak MiB':>10}")
+        for name, seconds, peak in results:
+            self.stdout.write(f"{name:<20} {seconds:>10.3f} {peak / 2 ** 20:>10.1f}")
+
+        # ru_maxrss is in kilobytes on Linux
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(f"\nPeak RSS of the process: {max_rss:.1f} MiB")
+
+
+def _seed(rand: random.Random, options: dict) -> None:
+    """Create users, items and active offers with bulk_create"""
+
+    User.objects.bulk_create(
+        [
+            User(username=f"books_{options['seed']}_{i}", password="!")
+            for i in range(options["users"])
+        ],
+        batch_size=1000,
+    )
+    Item.objects.bulk_create(
+        [
+            Item(code=f"K{i}", name=f"Books item {options['seed']} {i}")
+            for i in range(options["items"])
+        ],
+        batch_size=1000,
+    )
+
+    user_ids = list(
+        User.objects.filter(
+            username__startswith=f"books_{options['seed']}_"
+        ).values_list("id", flat=True)
+    )
+    item_ids = list(
+        Item.objects.filter(
+            name__startswith=f"Books item {options['seed']} "
+        ).values_list("id", flat=True)
+    )
+
+    Offer.objects.bulk_create(
+        (
+            Offer(
+                user_id=rand.choice(user_ids),
+                item_id=rand.choice(item_ids),
+                status=rand.choice(("PURCHASE", "SELL")),
+                entry_quantity=rand.randint(1, 100),
+                quantity=0,
+                price=Decimal(rand.randint(100, 99999)) / 100,
+            )
+            for _ in range(options["offers"])
+        ),
+        batch_size=1000,
+    )
+
+
+def _load_model_instances() -> list:
+    """Load active offers the way the legacy matching pass reads them"""
+
+    return list(Offer.objects.active().filter(item__isnull=False).iterator())
+
+
+def _measure(load) -> tuple:
+    """
+    Return load time in seconds and peak of allocated memory in bytes.
+    Memory is traced in a separate run, because tracing slows down loading
+    """
+
+    gc.collect()
+    start = time.perf_counter()
+    loaded = load()
+    seconds = time.perf_counter() - start
+    del loaded
+
+    gc.collect()
+    tracemalloc.start()
+    loaded = load()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del loaded
+
+    return seconds, peak
@@ -0,0 +1,407 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Avg, Max, Min, Sum
+from django.utils import timezone
+
+from apps.trades.models import Balance, Item, Offer, Price, Trade
+from apps.trades.services.db_interaction import get_or_create_default_currency
+from apps.trades.services.seed_logic import to_base36
+from apps.trades.services.trader_logic import create_trades_between_users
+
+INDEXED_MODELS = (Offer, Trade, Price)
+# Item codes are "B", the seed and the item number in base36 of fixed widths
+SEED_DIGITS = 3
+ITEM_DIGITS = 4
+
+
+class Command(BaseCommand):
+    """
+    Run the hot query shapes of the matching pass and statistics
+    without and with the composite indexes, print timings and EXPLAIN plans
+    """
+
+    help = (
+        "Seed a large dataset, run the matching pass and statistics queries "
+        "without and with model indexes and capture EXPLAIN plans. "
+        "It writes to the configured database, so it runs only with --force"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--items", type=int, default=100)
+        parser.add_argument("--prices", type=int, default=20000)
+        parser.add_argument("--offers", type=int, default=20000)
+        parser.add_argument("--trades", type=int, default=50000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--no-seed",
+            action="store_true",
+            help="Use data, which is already in the database",
+        )
+        parser.add_argument(
+            "--skip-matching",
+            action="store_true",
+            help="Don't run the full matching pass",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help=(
+                "Confirm that the configured database is a benchmark one: rows "
+                "are seeded permanently and indexes are dropped and created"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if not options["force"]:
+            raise CommandError(
+                f"The benchmark seeds {connection.settings_dict['NAME']} and drops "
+                f"its indexes, run it with --force against a benchmark database"
+            )
+        if not options["no_seed"]:
+            _check_seed_size(seed=options["seed"], items=options["items"])
+
+        rand = random.Random(options["seed"])
+
+        if not options["no_seed"]:
+            self.stdout.write("Seeding benchmark data...")
+            _seed(rand=rand, options=options)
+
+        samples = _get_samples(rand=rand)
+        if samples is None:
+            self.stderr.write("There are no active offers or trades to benchmark")
+            return
+
+        existing = _get_existing_indexes()
+        try:
+            _drop_indexes(indexes=existing)
+            before = self._run_phase(
+                samples=samples, options=options, title="without indexes"
+            )
+
+            _create_indexes(indexes=_get_missing_indexes())
+            after = self._run_phase(
+                samples=samples, options=options, title="with indexes"
+            )
+        finally:
+            failed = _restore_indexes(indexes=existing)
+            if failed:
+                raise CommandError(
+                    f"Indexes weren't restored, fix them by hand: {', '.join(failed)}"
+                )
+
+        self.stdout.write("\nSummary (seconds per run)")
+        for name in before:
+            speedup = before[name] / after[name] if after[name] else 0
+            self.stdout.write(
+                f"{name:<40} {before[name]:>10.5f} {after[name]:>10.5f} {speedup:>7.1f}x"
+            )
+
+    def _run_phase(self, samples: dict, options: dict, title: str) -> dict:
+        """Run every query, print its EXPLAIN plan and return mean timings"""
+
+        self.stdout.write(f"\n=== {title} ===")
+        timings = {}
+
+        for name, queryset, execute in _get_queries(samples=samples):
+            self.stdout.write(f"\n--- {name}\n{queryset.explain()}")
+            timings[name] = _measure(execute=execute, repeat=options["repeat"])
+
+        if not options["skip_matching"]:
+            timings["matching pass"] = _measure(
+                execute=_run_matching_pass_with_rollback, repeat=1
+            )
+
+        return timings
+
+
+def _check_seed_size(seed: int, items: int) -> None:
+    """Item codes of every seed have to be unique and fit into the code column"""
+
+    if not 0 <= seed < 36**SEED_DIGITS:
+        raise CommandError(f"Seed has to be from 0 to {36 ** SEED_DIGITS - 1}")
+    if items > 36**ITEM_DIGITS:
+        raise CommandError(f"At most {36 ** ITEM_DIGITS} items could be seeded")
+
+
+def _get_item_code(seed: int, number: int) -> str:
+    return (
+        f"B{to_base36(seed).zfill(SEED_DIGITS)}{to_base36(number).zfill(ITEM_DIGITS)}"
+    )
+
+
+def _seed(rand: random.Random, options: dict) -> None:
+    """Create users, items, prices, offers and trades with bulk_create"""
+
+    now = timezone.now()
+    currency = get_or_create_default_currency()
+
+    User.objects.bulk_create(
+        [
+            User(username=f"bench_{options['seed']}_{i}", password="!")
+            for i in range(options["users"])
+        ],
+        batch_size=1000,
+    )
+    Item.objects.bulk_create(
+        [
+            Item(
+                code=_get_item_code(seed=options["seed"], number=i),
+                name=f"Bench item {options['seed']} {i}",
+            )
+            for i in range(options["items"])
+        ],
+        batch_size=1000,
+    )
+
+    user_ids = list(
+        User.objects.filter(
+            username__startswith=f"bench_{options['seed']}_"
+        ).values_list("id", flat=True)
+    )
+    item_ids = list(
+        Item.objects.filter(
+            name__startswith=f"Bench item {options['seed']} "
+        ).values_list("id", flat=True)
+    )
+
+    Balance.objects.bulk_create(
+        (
+            Balance(user_id=user_id, currency=currency, quantity=1000000)
+            for user_id in user_ids
+        ),
+        batch_size=1000,
+    )
+    Price.objects.bulk_create(
+        (
+            Price(
+                item_id=rand.choice(item_ids),
+                currency=currency,
+                price=Decimal(rand.randint(100, 99999)) / 100,
+                date=now - timezone.timedelta(minutes=rand.randint(0, 525600)),
+            )
+            for _ in range(options["prices"])
+        ),
+        batch_size=1000,
+    )
+    Offer.objects.bulk_create(
+        (
+            Offer(
+                user_id=rand.choice(user_ids),
+                item_id=rand.choice(item_ids),
+                status=rand.choice(("PURCHASE", "SELL")),
+                entry_quantity=rand.randint(1, 100),
+                quantity=0,
+                price=Decimal(rand.randint(100, 99999)) / 100,
+                is_active=rand.random() < 0.2,
+            )
+            for _ in range(options["offers"])
+        ),
+        batch_size=1000,
+    )
+    Trade.objects.bulk_create(
+        (
+            Trade(
+                item_id=rand.choice(item_ids),
+                seller_id=rand.choice(user_ids),
+                buyer_id=rand.choice(user_ids),
+                quantity=rand.randint(1, 100),
+                unit_price=Decimal(rand.randint(100, 99999)) / 100,
+            )
+            for _ in range(options["trades"])
+        ),
+        batch_size=1000,
+    )
+
+
+def _get_samples(rand: random.Random):
+    """Choose an active purchase offer, item and user to parametrize queries"""
+
+    purchase_offer = (
+        Offer.objects.purchase_offers()
+        .order_by("?")
+        .values("id", "item_id", "price", "user_id")
+        .first()
+    )
+    trade = (
+        Trade.objects.order_by("?").values("item_id", "buyer_id", "seller_id").first()
+    )
+
+    if purchase_offer is None or trade is None:
+        return None
+
+    return {
+        "offer": purchase_offer,
+        "trade": trade,
+        "to_date": timezone.now(),
+        "from_date": timezone.now() - timezone.timedelta(days=rand.randint(1, 90)),
+    }
+
+
+def _get_queries(samples: dict) -> list:
+    """Return (name, queryset, function to execute) for every hot query shape"""
+
+    offer = samples["offer"]
+    trade = samples["trade"]
+
+    sell_offers = (
+        Offer.objects.sell_offers()
+        .filter(item__id=offer["item_id"], price__lte=offer["price"])
+        .order_by("price", "id")
+        .exclude(user__id=offer["user_id"])
+    )
+    purchase_offers = Offer.objects.purchase_offers()
+    user_sell_offers = Offer.objects.sell_offers().filter(
+        user_id=offer["user_id"], item_id=offer["item_id"]
+    )
+    active_prices = Offer.objects.active().filter(item_id=offer["item_id"])
+    item_trades = Trade.objects.filter(
+        item_id=trade["item_id"], date__lte=samples["to_date"]
+    )
+    buyer_trades = Trade.objects.filter(
+        buyer_id=trade["buyer_id"], date__lte=samples["to_date"]
+    )
+    seller_trades = Trade.objects.filter(
+        seller_id=trade["seller_id"], date__lte=samples["to_date"]
+    )
+    item_prices = Price.objects.filter(
+        item_id=trade["item_id"], date__gte=samples["from_date"]
+    ).order_by("date")
+
+    return [
+        ("matching: suitable sell offers", sell_offers, lambda: list(sell_offers)),
+        (
+            "matching: active purchase offers",
+            purchase_offers,
+            lambda: list(purchase_offers.values_list("id", flat=True)),
+        ),
+        (
+            "validators: user sell offers",
+            user_sell_offers,
+            lambda: list(user_sell_offers),
+        ),
+        (
+            "statistics: active offer prices",
+            active_prices,
+            lambda: active_prices.aggregate(Avg("price"), Max("price"), Min("price")),
+        ),
+        (
+            "statistics: sold stocks",
+            item_trades,
+            lambda: item_trades.aggregate(Sum("quantity")),
+        ),
+        ("user statistics: buyer trades", buyer_trades, lambda: buyer_trades.count()),
+        (
+            "user statistics: seller trades",
+            seller_trades,
+            lambda: seller_trades.count(),
+        ),
+        ("prices: item history", item_prices, lambda: list(item_prices)),
+    ]
+
+
+def _measure(execute, repeat: int) -> float:
+    """Return mean time of the given function in seconds"""
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        execute()
+
+    return (time.perf_counter() - start) / repeat
+
+
+def _run_matching_pass_with_rollback() -> None:
+    """Run the matching pass and roll back all trades it made"""
+
+    with transaction.atomic():
+        create_trades_between_users()
+        transaction.set_rollback(True)
+
+
+def _get_existing_index_names(model) -> set:
+    """Return names of indexes, which exist in the database for the model table"""
+
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, model._meta.db_table
+        )
+
+    return {name for name, info in constraints.items() if info["index"]}
+
+
+def _get_existing_indexes() -> list:
+    """Return model indexes, which exist in the database"""
+
+    existing = []
+
+    for model in INDEXED_MODELS:
+        names = _get_existing_index_names(model=model)
+        existing.extend(
+            (model, index) for index in model._meta.indexes if index.name in names
+        )
+
+    return existing
+
+
+def _get_missing_indexes() -> list:
+    """Return model indexes, which don't exist in the database"""
+
+    missing = []
+
+    for model in INDEXED_MODELS:
+        names = _get_existing_index_names(model=model)
+        missing.extend(
+            (model, index) for index in model._meta.indexes if index.name not in names
+        )
+
+    return missing
+
+
+def _drop_indexes(indexes: list) -> None:
+    """Drop the given (model, index) pairs"""
+
+    with connection.schema_editor() as schema_editor:
+        for model, index in indexes:
+            schema_editor.remove_index(model, index)
+
+
+def _create_indexes(indexes: list) -> None:
+    """Create the given (model, index) pairs"""
+
+    with connection.schema_editor() as schema_editor:
+        for model, index in indexes:
+            schema_editor.add_index(model, index)
+
+
+def _restore_indexes(indexes: list) -> list:
+    """
+    Make the given model indexes the only existing ones, as they were before
+    the benchmark. Every index is changed on its own, so one failure doesn't
+    stop the others. Return names of indexes, which failed
+    """
+
+    expected = {(model, index.name) for model, index in indexes}
+    failed = []
+
+    for model in INDEXED_MODELS:
+        names = _get_existing_index_names(model=model)
+        for index in model._meta.indexes:
+            should_exist = (model, index.name) in expected
+            if should_exist == (index.name in names):
+                continue
+
+            try:
+                if should_exist:
+                    _create_indexes(indexes=[(model, index)])
+                else:
+                    _drop_indexes(indexes=[(model, index)])
+            except DatabaseError:
+                failed.append(index.name)
+
+    return failed
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from apps.trades.services.partition_logic import (create_partitions,
+                                                  partition_tables)
+
+
+class Command(BaseCommand):
+    """Create monthly partitions of Trade and Price tables ahead of time"""
+
+    help = (
+        "Create monthly partitions of Trade and Price tables on PostgreSQL "
+        "for the current month and the next ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=settings.PARTITION_MONTHS_AHEAD,
+            help="Number of months ahead to create partitions for",
+        )
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help=(
+                "Partition the single tables first. It rewrites the tables "
+                "in one transaction, which locks them until it's committed"
+            ),
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if connection.vendor != "postgresql":
+            self.stdout.write(
+                f"{connection.vendor} keeps Trade and Price in single tables"
+            )
+            return
+
+        if options["convert"]:
+            for table in partition_tables(
+                connection=connection, months_ahead=options["months"]
+            ):
+                self.stdout.write(f"Partitioned {table}")
+
+        created = create_partitions(
+            connection=connection, months_ahead=options["months"]
+        )
+        self.stdout.write(
+            f"Created {len(created)} partitions"
+            + (f": {', '.join(created)}" if created else "")
+        )
@@ -0,0 +1,97 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.trades.services.load_test_logic import run_journeys, summarize
+
+
+class Command(BaseCommand):
+    """
+    Load test the API of a running server (runserver, gunicorn or uvicorn)
+    with concurrent scripted user journeys
+    """
+
+    help = (
+        "Run user journeys (sign up, obtain JWT, list items, post offers, poll "
+        "trades, read statistics) and print latency percentiles per endpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("base_url", help="Base url of the server")
+        parser.add_argument(
+            "--users", type=int, default=20, help="Number of concurrent users"
+        )
+        parser.add_argument(
+            "--iterations", type=int, default=10, help="Rounds of the journey per user"
+        )
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Users are <prefix>_0, <prefix>_1, ... like seed_market creates them",
+        )
+        parser.add_argument("--first-user", type=int, default=0)
+        parser.add_argument("--password", default="seed-password")
+        parser.add_argument(
+            "--signup",
+            action="store_true",
+            help="Sign the users up first, the server has to reach Celery broker",
+        )
+        parser.add_argument(
+            "--ramp-up", type=float, default=0, help="Seconds to start all users"
+        )
+        parser.add_argument(
+            "--think-time",
+            type=float,
+            default=0,
+            help="Mean pause of users between requests in seconds",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def handle(self, *args, **options):
+        users = [
+            (f"{options['prefix']}_{number}", options["password"])
+            for number in range(
+                options["first_user"], options["first_user"] + options["users"]
+            )
+        ]
+
+        try:
+            result = asyncio.run(
+                run_journeys(
+                    base_url=options["base_url"],
+                    users=users,
+                    iterations=options["iterations"],
+                    signup=options["signup"],
+                    ramp_up=options["ramp_up"],
+                    think_time=options["think_time"],
+                    seed=options["seed"],
+                    timeout=options["timeout"],
+                )
+            )
+        except ValueError as error:
+            raise CommandError(f"{options['base_url']}: {error}")
+
+        self.stdout.write(
+            f"\n{options['base_url']} ({result['elapsed']:.2f} s, "
+            f"{options['users']} users)"
+        )
+        self.stdout.write(
+            f"{'endpoint':<32} {'count':>6} {'errors':>6} {'rps':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  error statuses"
+        )
+        names = sorted(set(result["latencies"]) | set(result["errors"]))
+        for name in names:
+            summary = summarize(
+                latencies=result["latencies"][name], elapsed=result["elapsed"]
+            )
+            errors = result["errors"][name]
+            statuses = ", ".join(
+                f"{status or 'no response'}: {count}"
+                for status, count in sorted(errors.items(), key=str)
+            )
+            self.stdout.write(
+                f"{name:<32} {summary['count']:>6} {sum(errors.values()):>6} "
+                f"{summary['rps']:>8.1f} {summary['p50']:>8.1f} "
+                f"{summary['p95']:>8.1f} {summary['p99']:>8.1f}  {statuses}"
+            )
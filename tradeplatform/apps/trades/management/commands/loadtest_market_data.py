@@ -0,0 +1,75 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.trades.services.load_test_logic import run_load, summarize
+
+
+class Command(BaseCommand):
+    """
+    Load test market data endpoints of running servers.
+    Run it against the same code served by WSGI (gunicorn core.wsgi)
+    and by ASGI (e.g. uvicorn core.asgi:application) to compare them
+    """
+
+    help = "Load test market data endpoints and print latency percentiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "base_urls",
+            nargs="+",
+            help="Base urls of the servers, e.g. http://127.0.0.1:8000",
+        )
+        parser.add_argument("--token", help="JWT access token")
+        parser.add_argument("--item", type=int, default=1)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument(
+            "--slow-clients",
+            type=int,
+            default=0,
+            help="Number of clients, which hold connections by sending headers slowly",
+        )
+        parser.add_argument("--slow-delay", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        headers = (
+            {"Authorization": f"JWT {options['token']}"} if options["token"] else {}
+        )
+        paths = (
+            f"/api/v1/market/{options['item']}/depth/",
+            f"/api/v1/market/{options['item']}/statistics/",
+            f"/api/v1/market/{options['item']}/trades/",
+            "/api/v1/market/prices/",
+        )
+
+        for base_url in options["base_urls"]:
+            try:
+                result = asyncio.run(
+                    run_load(
+                        base_url=base_url,
+                        paths=paths,
+                        total=options["requests"],
+                        concurrency=options["concurrency"],
+                        headers=headers,
+                        slow_clients=options["slow_clients"],
+                        slow_delay=options["slow_delay"],
+                    )
+                )
+            except (OSError, ValueError) as error:
+                raise CommandError(f"{base_url}: {error}")
+
+            self.stdout.write(f"\n{base_url} ({result['elapsed']:.2f} s)")
+            self.stdout.write(
+                f"{'endpoint':<36} {'count':>6} {'errors':>6} {'rps':>8} "
+                f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+            )
+            for path in paths:
+                summary = summarize(
+                    latencies=result["latencies"][path], elapsed=result["elapsed"]
+                )
+                self.stdout.write(
+                    f"{path:<36} {summary['count']:>6} {result['errors'][path]:>6} "
+                    f"{summary['rps']:>8.1f} {summary['p50']:>8.1f} "
+                    f"{summary['p95']:>8.1f} {summary['p99']:>8.1f}"
+                )
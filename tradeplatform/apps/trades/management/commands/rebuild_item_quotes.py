@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.trades.services.quote_logic import rebuild_item_quotes
+
+
+class Command(BaseCommand):
+    """Fill denormalized quotes of existing items"""
+
+    help = "Create missing item quotes and recalculate all of them"
+
+    def handle(self, *args, **options):
+        quotes = rebuild_item_quotes()
+
+        self.stdout.write(f"Updated {quotes} item quotes")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.trades.models import Offer, Trade
+from apps.trades.services.search_logic import (create_search_indexes,
+                                               rebuild_offer_search_text,
+                                               rebuild_trade_search_text)
+
+
+class Command(BaseCommand):
+    """Fill denormalized search columns of existing offers and trades"""
+
+    help = "Recalculate search columns of offers and trades and create search indexes"
+
+    def handle(self, *args, **options):
+        offers = rebuild_offer_search_text(queryset=Offer.objects.all())
+        trades = rebuild_trade_search_text(queryset=Trade.objects.all())
+        create_search_indexes(connection=connection)
+
+        self.stdout.write(f"Updated {offers} offers and {trades} trades")
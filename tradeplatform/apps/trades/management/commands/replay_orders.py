@@ -0,0 +1,115 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.trades.models import Offer
+from apps.trades.services.replay_logic import (ENGINES, compare_results,
+                                               generate_events, read_events,
+                                               replay, write_events)
+
+
+class Command(BaseCommand):
+    """
+    Replay a stream of offer events through the matching engines,
+    compare their results and timings on the same workload
+    """
+
+    help = (
+        "Replay recorded or generated offer create/cancel events through the "
+        "legacy matching pass and the in-memory matcher, print trades, "
+        "balances and timings of both"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--events",
+            help="JSON lines file with events, generated if it isn't given",
+        )
+        parser.add_argument(
+            "--engine",
+            choices=sorted(ENGINES),
+            action="append",
+            help="Engine to replay with, all engines by default",
+        )
+        parser.add_argument(
+            "--match-interval",
+            type=float,
+            default=60,
+            help="Seconds of the stream between matching passes",
+        )
+        parser.add_argument("--count", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--items", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--cancel-rate", type=float, default=0.1)
+        parser.add_argument(
+            "--save-events", help="Write the replayed events to the file"
+        )
+        parser.add_argument(
+            "--output", help="Write trades and balances of every engine as JSON"
+        )
+
+    def handle(self, *args, **options):
+        if options["events"]:
+            try:
+                with open(options["events"]) as file:
+                    events = read_events(file=file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Can't read events: {error}")
+        else:
+            events = generate_events(
+                count=options["count"],
+                users=options["users"],
+                items=options["items"],
+                seed=options["seed"],
+                cancel_rate=options["cancel_rate"],
+            )
+
+        if options["save_events"]:
+            with open(options["save_events"], "w") as file:
+                write_events(events=events, file=file)
+
+        if Offer.objects.active().exists():
+            self.stderr.write(
+                "There are active offers in the database, "
+                "the legacy pass matches them too"
+            )
+
+        results = {}
+        for engine_name in options["engine"] or sorted(ENGINES):
+            results[engine_name] = replay(
+                events=events,
+                engine_name=engine_name,
+                match_interval=options["match_interval"],
+            )
+            self._write_summary(engine_name=engine_name, result=results[engine_name])
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+
+        if len(results) > 1:
+            (first_name, first), *others = results.items()
+            for other_name, other in others:
+                differences = compare_results(first=first, second=other)
+                if differences:
+                    self.stdout.write(
+                        f"\n{first_name} and {other_name} differ in: "
+                        f"{', '.join(differences)}"
+                    )
+                else:
+                    self.stdout.write(
+                        f"\n{first_name} and {other_name} give identical results"
+                    )
+
+    def _write_summary(self, engine_name: str, result: dict) -> None:
+        timings = result["timings"]
+        self.stdout.write(
+            f"\n=== {engine_name} ===\n"
+            f"trades: {len(result['trades'])}, "
+            f"traded stocks: {sum(trade[2] for trade in result['trades'])}, "
+            f"active offers: "
+            f"{sum(is_active for _, is_active in result['offers'].values())}\n"
+            f"total: {timings['total']:.3f}s, matching: {timings['matching']:.3f}s "
+            f"in {timings['passes']} passes"
+        )
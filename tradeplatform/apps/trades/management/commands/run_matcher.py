@@ -0,0 +1,93 @@
+import os
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.trades.services.matcher_logic import (Matcher, get_matcher_queue,
+                                                serve_health)
+
+
+class Command(BaseCommand):
+    """
+    Run matching process, which keeps books in memory and fills offers
+    as soon as it is notified about them. SIGTERM and SIGINT stop it
+    after the current batch is settled
+    """
+
+    help = "Match offers continuously with in-memory order books"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--poll-timeout",
+            type=float,
+            default=1.0,
+            help="Seconds to wait for notifications before checking the lease",
+        )
+        parser.add_argument(
+            "--resync-interval",
+            type=float,
+            default=300,
+            help="Seconds between full reloads of the books from the database",
+        )
+        parser.add_argument(
+            "--storage-dir",
+            default=settings.MATCHER_STORAGE_DIR,
+            help="Directory of books snapshot and journal, empty disables them",
+        )
+        parser.add_argument(
+            "--snapshot-interval",
+            type=float,
+            default=60,
+            help="Seconds between snapshots, the journal is truncated after them",
+        )
+        parser.add_argument(
+            "--health-port",
+            type=int,
+            default=8001,
+            help="Port of GET /health endpoint, 0 disables it",
+        )
+
+    def handle(self, *args, **options):
+        if options["storage_dir"]:
+            os.makedirs(options["storage_dir"], exist_ok=True)
+
+        matcher = Matcher(
+            queue=get_matcher_queue(),
+            batch_size=options["batch_size"],
+            poll_timeout=options["poll_timeout"],
+            resync_interval=options["resync_interval"],
+            lease_timeout=settings.START_TRADE_LEASE_TIMEOUT,
+            storage_dir=options["storage_dir"] or None,
+            snapshot_interval=options["snapshot_interval"],
+        )
+
+        def stop(signum, frame):
+            self.stdout.write("Stopping matcher after the current batch")
+            matcher.stop()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        server = None
+        if options["health_port"]:
+            server = serve_health(matcher=matcher, port=options["health_port"])
+
+        if matcher.queue is None:
+            self.stdout.write(
+                "MATCHER_REDIS_URL is not set, books are reloaded every "
+                f"{options['poll_timeout']} seconds"
+            )
+
+        try:
+            matcher.run()
+        finally:
+            if server is not None:
+                server.shutdown()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Matcher stopped, settled {matcher.settled_trades} trades"
+            )
+        )
@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.trades.services.seed_logic import MarketSeeder
+
+
+class Command(BaseCommand):
+    """
+    Fill the database with a market of production-like size for load tests,
+    benchmarks and index tuning
+    """
+
+    help = (
+        "Generate users, items, prices, offers and trades with bulk_create "
+        "in batches, the same seed gives the same market"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100000)
+        parser.add_argument("--items", type=int, default=1000)
+        parser.add_argument("--prices", type=int, default=1000000)
+        parser.add_argument("--offers", type=int, default=1000000)
+        parser.add_argument("--trades", type=int, default=1000000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Prefix of usernames and item names (latin letters and digits), "
+            "run with another prefix to add one more market. Item codes start "
+            "with its first letter",
+        )
+        parser.add_argument(
+            "--password",
+            default="seed-password",
+            help="Password of all seeded users, so load tests can log in",
+        )
+        parser.add_argument("--inventories-per-user", type=int, default=5)
+        parser.add_argument(
+            "--active-share",
+            type=float,
+            default=0.2,
+            help="Share of offers, which are still active",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["items"] < 1:
+            raise CommandError("Market needs at least one user and one item")
+
+        start = time.perf_counter()
+        try:
+            seeder = MarketSeeder(
+                prefix=options["prefix"],
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+                password=options["password"],
+                inventories_per_user=options["inventories_per_user"],
+                active_share=options["active_share"],
+                log=self.stdout.write,
+            )
+            counts = seeder.seed(
+                users=options["users"],
+                items=options["items"],
+                prices=options["prices"],
+                offers=options["offers"],
+                trades=options["trades"],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        self.stdout.write(
+            f"Seeded {', '.join(f'{count} {name}' for name, count in counts.items())} "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
@@ -52,6 +52,46 @@ class Price(models.Model):
     price = models.DecimalField(max_digits=7, decimal_places=2)
     date = models.DateTimeField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["item", "date"], name="price_item_date_idx"),
+        ]
+
+
+class ItemQuote(models.Model):
+    """Denormalized latest market data of the item, which is updated on writes"""
+
+    item = models.OneToOneField(
+        Item,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="quote",
+        related_query_name="quote",
+    )
+    price = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
+    currency = models.ForeignKey(
+        Currency,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    price_date = models.DateTimeField(null=True, blank=True)
+    best_bid = models.DecimalField(
+        max_digits=7, decimal_places=2, null=True, blank=True
+    )
+    best_ask = models.DecimalField(
+        max_digits=7, decimal_places=2, null=True, blank=True
+    )
+    last_trade_price = models.DecimalField(
+        max_digits=7, decimal_places=2, null=True, blank=True
+    )
+    last_trade_quantity = models.PositiveIntegerField(null=True, blank=True)
+    last_trade_date = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.item_id} : {self.price}"
+
 
 class WatchList(models.Model):
     """Current user, favorite list of stocks"""
@@ -128,12 +168,66 @@ class Offer(BaseUserItem):
     quantity = models.IntegerField("Current quantity", default=0)
     price = models.DecimalField(max_digits=7, decimal_places=2)
     is_active = models.BooleanField(default=True)
+    search_text = models.TextField(
+        "Lowercase username for search", blank=True, default="", editable=False
+    )
+    updated_at = models.DateTimeField("Last change", auto_now=True)
 
     objects = OfferManager()
 
     def __str__(self):
         return f"{self.status} - {self.price} - {self.user} - {self.item}"
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "is_active", "item", "price"],
+                name="offer_status_item_price_idx",
+            ),
+            models.Index(
+                fields=["item", "status", "price", "id"],
+                condition=models.Q(is_active=True),
+                name="offer_active_book_idx",
+            ),
+            models.Index(
+                fields=["user", "status", "item"],
+                condition=models.Q(is_active=True),
+                name="offer_active_user_idx",
+            ),
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(is_active=False),
+                name="offer_inactive_updated_idx",
+            ),
+        ]
+
+
+class OfferArchive(BaseUserItem):
+    """
+    Inactive offer moved out of the Offer table by archive_offers.
+    It keeps the id of the offer, so trades still refer to it
+    """
+
+    id = models.IntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    status = models.CharField(max_length=8, choices=StatusChoices.choices())
+    entry_quantity = models.IntegerField("Requested quantity")
+    quantity = models.IntegerField("Current quantity", default=0)
+    price = models.DecimalField(max_digits=7, decimal_places=2)
+    is_active = models.BooleanField(default=False)
+    search_text = models.TextField(
+        "Lowercase username for search", blank=True, default="", editable=False
+    )
+    updated_at = models.DateTimeField("Last change")
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.status} - {self.price} - {self.user} - {self.item}"
+
+    class Meta:
+        verbose_name = "Archived offer"
+        verbose_name_plural = "Archived offers"
+
 
 class Inventory(BaseUserItem):
     """The number of stocks in particular user has"""
@@ -192,10 +286,14 @@ class Trade(models.Model):
     quantity = models.PositiveIntegerField()
     unit_price = models.DecimalField(max_digits=7, decimal_places=2)
     description = models.TextField(blank=True, null=True)
+    # Offers are moved to OfferArchive with the same id, so there is no database
+    # constraint and the id is kept after archiving, which deletes offers with
+    # raw SQL. Offers deleted by Django (e.g. with their user) still null the id
     buyer_offer = models.ForeignKey(
         Offer,
         null=True,
         on_delete=models.SET_NULL,
+        db_constraint=False,
         related_name="buyer_trade",
         related_query_name="buyer_trade",
     )
@@ -203,7 +301,32 @@ class Trade(models.Model):
         Offer,
         null=True,
         on_delete=models.SET_NULL,
+        db_constraint=False,
         related_name="seller_trade",
         related_query_name="seller_trade",
     )
     date = models.DateTimeField(auto_now_add=True)
+    search_text = models.TextField(
+        "Lowercase item code, seller and buyer usernames for search",
+        blank=True,
+        default="",
+        editable=False,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["item", "date"], name="trade_item_date_idx"),
+            models.Index(fields=["buyer", "date"], name="trade_buyer_date_idx"),
+            models.Index(fields=["seller", "date"], name="trade_seller_date_idx"),
+        ]
+
+
+class TaskLease(models.Model):
+    """Lease of the periodic task, so only one worker runs it at a time"""
+
+    name = models.CharField(max_length=100, primary_key=True)
+    owner = models.CharField(max_length=64, blank=True, default="")
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} : {self.owner}"
@@ -2,13 +2,14 @@ from django.utils import timezone
 from rest_framework import serializers
 
 from apps.registration.serializers import UserSerializer
-from apps.trades.models import (Balance, Currency, Inventory, Item, Offer,
-                                Price, Trade, WatchList)
+from apps.trades.customserializers import DynamicFieldsSerializerMixin
+from apps.trades.models import (Balance, Currency, Inventory, Item, ItemQuote,
+                                Offer, Price, Trade, WatchList)
 from apps.trades.services.views_validators import (
     check_user_balance, check_user_quantity_stocks_for_given_item)
 
 
-class StockBaseSerializer(serializers.ModelSerializer):
+class StockBaseSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for StockBase base model"""
 
     code = serializers.CharField(max_length=8)
@@ -27,7 +28,7 @@ class CurrencySerializer(StockBaseSerializer):
         )
 
 
-class PriceSerializer(serializers.ModelSerializer):
+class PriceSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for Price model"""
 
     currency = CurrencySerializer(read_only=True)
@@ -58,10 +59,28 @@ class PriceCreateSerializer(serializers.ModelSerializer):
         )
 
 
+class LatestPriceSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
+    """Serializer for the latest price, which is denormalized into item's quote"""
+
+    currency = serializers.SlugRelatedField(read_only=True, slug_field="code")
+    date = serializers.DateTimeField(source="price_date", read_only=True)
+
+    class Meta:
+        model = ItemQuote
+        fields = (
+            "price",
+            "currency",
+            "date",
+        )
+
+
 class ItemSerializer(StockBaseSerializer):
     """Serializer for Item model"""
 
     price = PriceSerializer(many=True, read_only=True)
+    latest_price = LatestPriceSerializer(
+        source="quote", read_only=True, allow_null=True
+    )
 
     class Meta:
         model = Item
@@ -70,11 +89,12 @@ class ItemSerializer(StockBaseSerializer):
             "code",
             "name",
             "price",
+            "latest_price",
             "details",
         )
 
 
-class BaseUserItemSerializer(serializers.ModelSerializer):
+class BaseUserItemSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for BaseUserItem base model"""
 
     user = UserSerializer(read_only=True)
@@ -95,6 +115,30 @@ class WatchListSerializer(BaseUserItemSerializer):
         )
 
 
+class ItemQuoteSerializer(serializers.ModelSerializer):
+    """Serializer for the denormalized latest market data of the item"""
+
+    code = serializers.CharField(source="item.code", read_only=True)
+    name = serializers.CharField(source="item.name", read_only=True)
+    currency = serializers.SlugRelatedField(read_only=True, slug_field="code")
+
+    class Meta:
+        model = ItemQuote
+        fields = (
+            "item",
+            "code",
+            "name",
+            "price",
+            "currency",
+            "price_date",
+            "best_bid",
+            "best_ask",
+            "last_trade_price",
+            "last_trade_quantity",
+            "last_trade_date",
+        )
+
+
 class WatchListCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating Watchlist instance"""
 
@@ -198,7 +242,7 @@ class InventorySerializer(BaseUserItemSerializer):
         )
 
 
-class BalanceSerializer(serializers.ModelSerializer):
+class BalanceSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for Balance model"""
 
     user = UserSerializer(read_only=True)
@@ -214,7 +258,7 @@ class BalanceSerializer(serializers.ModelSerializer):
         )
 
 
-class TradeSerializer(serializers.ModelSerializer):
+class TradeSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for Trade model"""
 
     item = ItemSerializer(read_only=True)
@@ -0,0 +1,71 @@
+from datetime import timedelta
+from typing import Optional
+
+from django.db import connection, transaction
+from django.http import QueryDict
+from django.utils import timezone
+
+from apps.trades.models import Offer, OfferArchive
+
+ARCHIVED_QUERY_PARAM = "archived"
+
+ARCHIVE_FIELDS = (
+    "id",
+    "user_id",
+    "item_id",
+    "status",
+    "entry_quantity",
+    "quantity",
+    "price",
+    "is_active",
+    "search_text",
+    "updated_at",
+)
+
+
+def archive_offers(
+    older_than: timedelta, batch_size: int = 1000, limit: Optional[int] = None
+) -> int:
+    """
+    Move inactive offers, which didn't change during `older_than`, to OfferArchive.
+    Every batch is moved in its own transaction, so the hot table isn't locked
+    for long. Return number of moved offers
+    """
+
+    offers = Offer.objects.filter(
+        is_active=False, updated_at__lt=timezone.now() - older_than
+    ).order_by("id")
+    moved = 0
+
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        with transaction.atomic():
+            rows = list(offers.select_for_update().values(*ARCHIVE_FIELDS)[:size])
+            if not rows:
+                break
+            OfferArchive.objects.bulk_create(OfferArchive(**row) for row in rows)
+            _delete_offers(offer_ids=[row["id"] for row in rows])
+        moved += len(rows)
+
+    return moved
+
+
+def is_archived_request(query_params: QueryDict) -> bool:
+    """Archived offers are read only when the client asks for them"""
+
+    return query_params.get(ARCHIVED_QUERY_PARAM, "").lower() in ("1", "true")
+
+
+def _delete_offers(offer_ids: list) -> None:
+    """
+    Delete offers without QuerySet.delete(), which sends post_delete for every
+    offer, so the feed, quotes and the matcher would get removal of offers,
+    which were closed long ago
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {connection.ops.quote_name(Offer._meta.db_table)} "
+            f"WHERE id IN ({', '.join(['%s'] * len(offer_ids))})",
+            offer_ids,
+        )
@@ -0,0 +1,227 @@
+import mmap
+import os
+import struct
+from collections import defaultdict
+from typing import Optional, Tuple
+
+from django.db.models import Count, Sum
+
+from apps.trades.models import Offer
+from apps.trades.services.order_book_logic import (PURCHASE, SELL, BookOrder,
+                                                   OrderBooks)
+from apps.trades.services.tick_logic import to_ticks
+
+SNAPSHOT_FILE = "books.snapshot"
+JOURNAL_FILE = "books.journal"
+
+# Snapshot: magic, version, journal sequence included in it, number of orders
+SNAPSHOT_HEADER = struct.Struct("<4sHQQ")
+SNAPSHOT_MAGIC = b"TPOB"
+SNAPSHOT_VERSION = 1
+
+# Order: id, user id, item id, side, price in ticks, entry quantity, quantity
+ORDER_RECORD = struct.Struct("<qqqBqqq")
+
+# Journal event: sequence, operation and the order's state after the event
+JOURNAL_RECORD = struct.Struct("<QB" + ORDER_RECORD.format[1:])
+UPSERT = 1
+REMOVE = 2
+
+SIDES = {PURCHASE: 0, SELL: 1}
+STATUSES = {side: status for status, side in SIDES.items()}
+
+
+class BookJournal:
+    """
+    Append-only file of book changes since the last snapshot. Events are
+    buffered and written by flush() after their fills are committed
+    """
+
+    def __init__(self, path: str, sequence: int = 0):
+        self.path = path
+        self.sequence = sequence
+        self._buffer = []
+        self._file = open(path, "ab")
+
+    def upsert(self, order: BookOrder) -> None:
+        self._append(UPSERT, _pack_order(order=order))
+
+    def remove(self, order_id: int) -> None:
+        self._append(REMOVE, (order_id, 0, 0, 0, 0, 0, 0))
+
+    def flush(self) -> None:
+        """Write buffered events and wait until they reach the disk"""
+
+        if not self._buffer:
+            return
+
+        self._file.write(b"".join(self._buffer))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._buffer.clear()
+
+    def truncate(self) -> None:
+        """Drop events, which are included in the snapshot"""
+
+        self._buffer.clear()
+        self._file.truncate(0)
+        self._file.seek(0)
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+    def _append(self, operation: int, values: tuple) -> None:
+        self.sequence += 1
+        self._buffer.append(JOURNAL_RECORD.pack(self.sequence, operation, *values))
+
+
+def write_snapshot(books: OrderBooks, directory: str, sequence: int) -> str:
+    """
+    Write all orders into compact binary file. The file is replaced
+    atomically, so a crash leaves the previous snapshot
+    """
+
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    temporary_path = f"{path}.tmp"
+    orders = [order for book in books.books.values() for order in book.orders.values()]
+
+    with open(temporary_path, "wb") as snapshot:
+        snapshot.write(
+            SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC, SNAPSHOT_VERSION, sequence, len(orders)
+            )
+        )
+        snapshot.write(
+            b"".join(ORDER_RECORD.pack(*_pack_order(order=order)) for order in orders)
+        )
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+
+    os.replace(temporary_path, path)
+
+    return path
+
+
+def load_books(directory: str) -> Optional[Tuple[OrderBooks, int]]:
+    """
+    Load the snapshot and replay the journal. Return books with sequence of
+    the last event or None if there is no valid snapshot
+    """
+
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    if not os.path.exists(path) or os.path.getsize(path) < SNAPSHOT_HEADER.size:
+        return None
+
+    books = OrderBooks()
+
+    with open(path, "rb") as snapshot, mmap.mmap(
+        snapshot.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        magic, version, sequence, count = SNAPSHOT_HEADER.unpack_from(data)
+        end = SNAPSHOT_HEADER.size + count * ORDER_RECORD.size
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or len(data) < end:
+            return None
+
+        # Orders are read straight from the mapped pages, the view has to be
+        # released before the mapping is closed
+        records = memoryview(data)[SNAPSHOT_HEADER.size : end]
+        try:
+            for values in ORDER_RECORD.iter_unpack(records):
+                books.add(_unpack_order(values=values))
+        finally:
+            records.release()
+
+    return books, _replay_journal(books=books, directory=directory, sequence=sequence)
+
+
+def is_consistent(books: OrderBooks) -> bool:
+    """
+    Compare restored books with active offers of the database by one aggregate
+    query per side: number of orders, sums of their ids, quantities and price
+    ticks. Fills settled after the last journal flush make them differ
+    """
+
+    rows = (
+        Offer.objects.active()
+        .filter(item__isnull=False)
+        .values("status")
+        .annotate(
+            count=Count("id"),
+            ids=Sum("id"),
+            quantity=Sum("quantity"),
+            price=Sum("price"),
+        )
+        .order_by()
+    )
+    state = {
+        row["status"]: (
+            row["count"],
+            row["ids"],
+            row["quantity"],
+            to_ticks(row["price"]),
+        )
+        for row in rows
+    }
+
+    sides = defaultdict(lambda: [0, 0, 0, 0])
+    for book in books.books.values():
+        for order in book.orders.values():
+            side = sides[order.status]
+            side[0] += 1
+            side[1] += order.id
+            side[2] += order.quantity
+            side[3] += order.price_ticks
+
+    return state == {status: tuple(side) for status, side in sides.items()}
+
+
+def _replay_journal(books: OrderBooks, directory: str, sequence: int) -> int:
+    """Apply journal events, which are newer than the snapshot"""
+
+    path = os.path.join(directory, JOURNAL_FILE)
+    if not os.path.exists(path):
+        return sequence
+
+    with open(path, "rb") as journal:
+        data = journal.read()
+
+    # The last record could be written partially before crash
+    data = data[: len(data) - len(data) % JOURNAL_RECORD.size]
+
+    for event_sequence, operation, *values in JOURNAL_RECORD.iter_unpack(data):
+        if event_sequence <= sequence:
+            continue
+        if operation == UPSERT:
+            books.add(_unpack_order(values=values))
+        else:
+            books.remove(order_id=values[0])
+        sequence = event_sequence
+
+    return sequence
+
+
+def _pack_order(order: BookOrder) -> tuple:
+    return (
+        order.id,
+        order.user_id,
+        order.item_id,
+        SIDES[order.status],
+        order.price_ticks,
+        order.entry_quantity,
+        order.quantity,
+    )
+
+
+def _unpack_order(values) -> BookOrder:
+    order_id, user_id, item_id, side, price_ticks, entry_quantity, quantity = values
+
+    return BookOrder(
+        id=order_id,
+        user_id=user_id,
+        item_id=item_id,
+        status=STATUSES[side],
+        price_ticks=price_ticks,
+        entry_quantity=entry_quantity,
+        quantity=quantity,
+    )
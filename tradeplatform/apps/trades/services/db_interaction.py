@@ -7,9 +7,13 @@ from apps.trades.models import Balance, Currency, Inventory, Offer, Trade
 
 
 def get_all_purchase_active_offers() -> QuerySet:
-    """Return all active offer instances with PURCHASE status"""
+    """
+    Return all active offer instances with PURCHASE status in order of creation.
+    Without ordering the database returns them in order of an index or of rows
+    on disk, so results of the matching pass depended on the database
+    """
 
-    return Offer.objects.purchase_offers()
+    return Offer.objects.purchase_offers().order_by("id")
 
 
 def get_offer_by_id(offer_id: int) -> Optional[Offer]:
@@ -55,14 +59,15 @@ def get_user_id_related_to_offer(offer_id: int) -> int:
 def get_active_sell_offer_with_suitable_item(offer_id: int) -> QuerySet:
     """
     Return all active offer with SELL status and current item,
-    ordering by price in ascending order. The best offers come first in QuerySet
+    ordering by price in ascending order. The best offers come first in QuerySet,
+    offers with the same price are ordered by creation
     """
 
     offer = get_offer_by_id(offer_id=offer_id)
     sell_offers = (
         Offer.objects.sell_offers()
         .filter(item__id=offer.item.id, price__lte=offer.price)
-        .order_by("price")
+        .order_by("price", "id")
         .exclude(user__id=offer.user.id)
     )
 
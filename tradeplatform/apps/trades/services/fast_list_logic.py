@@ -0,0 +1,196 @@
+from collections import defaultdict
+from typing import Callable, Iterable, List, Optional
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models.query import QuerySet
+from rest_framework import serializers
+from rest_framework.relations import Hyperlink, PKOnlyObject
+
+
+class ListPlan:
+    """
+    Precompiled representation of a serializer, which renders rows
+    received from `QuerySet.values()` without creating model instances.
+    The plan doesn't keep the request, so it's compiled once and reused
+    by all requests, which pass their serializer context to serialize()
+    """
+
+    def __init__(self, serializer: serializers.Serializer):
+        self.lookups = {}
+        self.relations = []
+        self.render_row = _compile_fields(serializer=serializer, prefix="", plan=self)
+
+    def add_lookup(self, lookup: str) -> str:
+        """Register lookup for values() query and return it"""
+
+        self.lookups[lookup] = None
+        return lookup
+
+    def values(self, queryset: QuerySet, *extra_lookups: str) -> QuerySet:
+        """Return queryset, which selects only columns required by the plan"""
+
+        return queryset.prefetch_related(None).values(*self.lookups, *extra_lookups)
+
+    def serialize(
+        self, rows: Iterable[dict], context: Optional[dict] = None
+    ) -> List[dict]:
+        """Render the given rows with the same output as the compiled serializer"""
+
+        rows = list(rows)
+        state = _RenderState(context=context)
+        state.fetched.update(
+            (relation, relation.fetch(rows=rows, context=context))
+            for relation in self.relations
+        )
+
+        return [self.render_row(row, state) for row in rows]
+
+
+class _RenderState:
+    """Related rows and serializer context of one serialize() call"""
+
+    def __init__(self, context: Optional[dict]):
+        self.context = context or {}
+        self.fetched = {}
+
+
+class _ManyRelation:
+    """Reverse foreign key rendered by nested serializer with many=True"""
+
+    def __init__(self, model, remote_field: str, key_lookup: str, plan: ListPlan):
+        self.model = model
+        self.remote_field = remote_field
+        self.key_lookup = key_lookup
+        self.plan = plan
+
+    def fetch(self, rows: List[dict], context: Optional[dict]) -> dict:
+        """Return rendered related rows grouped by the parent primary key"""
+
+        keys = {row[self.key_lookup] for row in rows} - {None}
+        grouped = defaultdict(list)
+
+        if not keys:
+            return grouped
+
+        related_rows = list(
+            self.plan.values(
+                self.model.objects.filter(
+                    **{f"{self.remote_field}__in": keys}
+                ).order_by("pk"),
+                self.remote_field,
+            )
+        )
+
+        for row, data in zip(
+            related_rows, self.plan.serialize(rows=related_rows, context=context)
+        ):
+            grouped[row[self.remote_field]].append(data)
+
+        return grouped
+
+
+def _compile_fields(
+    serializer: serializers.Serializer, prefix: str, plan: ListPlan
+) -> Callable:
+    """Return function, which renders a values() row for the given serializer"""
+
+    model = serializer.Meta.model
+    writers = []
+
+    for field in serializer._readable_fields:
+        writers.append(
+            (
+                field.field_name,
+                _compile_field(field=field, model=model, prefix=prefix, plan=plan),
+            )
+        )
+
+    def render(row: dict, state: _RenderState) -> dict:
+        return {name: writer(row, state) for name, writer in writers}
+
+    return render
+
+
+def _compile_field(field, model, prefix: str, plan: ListPlan) -> Callable:
+    """Return function, which renders a single field from a values() row"""
+
+    if field.source == "*" or "." in field.source:
+        raise ImproperlyConfigured(
+            f"Field '{field.field_name}' can't be rendered from values()"
+        )
+
+    lookup = prefix + field.source
+
+    if isinstance(field, serializers.ListSerializer):
+        relation = model._meta.get_field(field.source)
+        if not relation.one_to_many:
+            raise ImproperlyConfigured(
+                f"Field '{field.field_name}' has to be a reverse foreign key"
+            )
+
+        many_relation = _ManyRelation(
+            model=relation.related_model,
+            remote_field=relation.field.name,
+            key_lookup=plan.add_lookup(prefix + "pk"),
+            plan=ListPlan(serializer=field.child),
+        )
+        plan.relations.append(many_relation)
+
+        return lambda row, state: state.fetched[many_relation].get(
+            row[many_relation.key_lookup], []
+        )
+
+    if isinstance(field, serializers.BaseSerializer):
+        plan.add_lookup(lookup)
+        render_nested = _compile_fields(
+            serializer=field, prefix=lookup + "__", plan=plan
+        )
+
+        return lambda row, state: (
+            None if row[lookup] is None else render_nested(row, state)
+        )
+
+    if isinstance(field, serializers.ManyRelatedField):
+        raise ImproperlyConfigured(
+            f"Field '{field.field_name}' can't be rendered from values()"
+        )
+
+    if isinstance(field, serializers.SlugRelatedField):
+        slug_lookup = plan.add_lookup(f"{lookup}__{field.slug_field}")
+
+        return lambda row, state: row[slug_lookup]
+
+    plan.add_lookup(lookup)
+
+    if isinstance(field, serializers.HyperlinkedRelatedField):
+        return lambda row, state: (
+            None
+            if row[lookup] is None
+            else _get_hyperlink(field=field, pk=row[lookup], context=state.context)
+        )
+
+    if isinstance(field, serializers.RelatedField):
+        return lambda row, state: (
+            None
+            if row[lookup] is None
+            else field.to_representation(PKOnlyObject(pk=row[lookup]))
+        )
+
+    return lambda row, state: (
+        None if row[lookup] is None else field.to_representation(row[lookup])
+    )
+
+
+def _get_hyperlink(field, pk, context: dict) -> Optional[Hyperlink]:
+    """
+    Build URL like HyperlinkedRelatedField.to_representation, but with the request
+    of the current call instead of the one the field was bound with
+    """
+
+    obj = PKOnlyObject(pk=pk)
+    url_format = context.get("format")
+    if url_format and field.format and field.format != url_format:
+        url_format = field.format
+
+    url = field.get_url(obj, field.view_name, context["request"], url_format)
+    return None if url is None else Hyperlink(url, obj)
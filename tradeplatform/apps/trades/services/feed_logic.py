@@ -0,0 +1,314 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.utils import encoders
+
+from apps.trades.models import Offer, Trade
+from apps.trades.services.market_data_logic import (decimal_to_string,
+                                                    get_order_book_level)
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "feed:"
+
+
+class Subscription:
+    """Queue of feed messages for one client connection"""
+
+    def __init__(self, backend, channels: Iterable[str], maxsize: int = 1000):
+        self.backend = backend
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_event_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    async def get(self) -> str:
+        """Wait for the next message"""
+
+        return await self.queue.get()
+
+    def put(self, data: str) -> None:
+        """Put message into the queue from any thread"""
+
+        try:
+            self.loop.call_soon_threadsafe(self._put, data)
+        except RuntimeError:
+            # The event loop of the connection is already closed
+            self.close()
+
+    def close(self) -> None:
+        """Stop receiving messages"""
+
+        self.backend.unsubscribe(subscription=self)
+
+    def _put(self, data: str) -> None:
+        """Slow clients lose the oldest messages instead of exhausting memory"""
+
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(data)
+
+
+class InMemoryFeedBackend:
+    """Fan-out messages to subscriptions of the current process"""
+
+    def __init__(self, **kwargs):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, data: str) -> None:
+        """Send encoded message to all subscribers of the channel"""
+
+        self._dispatch(channel=channel, data=data)
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        """Return subscription to the channels. Must be called in the event loop"""
+
+        subscription = Subscription(backend=self, channels=channels)
+
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+
+        return subscription
+
+    def has_subscribers(self, channel: str) -> bool:
+        """Return whether messages of the channel would reach anybody"""
+
+        return channel in self._subscriptions
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove the subscription from all its channels"""
+
+        with self._lock:
+            for channel in subscription.channels:
+                subscriptions = self._subscriptions.get(channel)
+                if subscriptions is None:
+                    continue
+
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[channel]
+
+    def _dispatch(self, channel: str, data: str) -> None:
+        """Put message into queues of the channel's subscriptions"""
+
+        with self._lock:
+            subscriptions = tuple(self._subscriptions.get(channel, ()))
+
+        for subscription in subscriptions:
+            subscription.put(data)
+
+
+class RedisFeedBackend(InMemoryFeedBackend):
+    """
+    Publish messages through Redis pub/sub, so trades settled by Celery workers
+    reach clients of every ASGI process. Each process holds one pattern
+    subscription and fans messages out to its own connections in memory
+    """
+
+    def __init__(self, url: Optional[str] = None, **kwargs):
+        super(RedisFeedBackend, self).__init__(**kwargs)
+
+        import redis
+
+        self._client = redis.Redis.from_url(url or settings.FEED_REDIS_URL)
+        self._listener = None
+
+    def publish(self, channel: str, data: str) -> None:
+        """Send encoded message to subscribers of all processes"""
+
+        self._client.publish(channel, data)
+
+    def has_subscribers(self, channel: str) -> bool:
+        """Subscribers of other processes are unknown, so the message is sent"""
+
+        return True
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        """Return subscription and start listening to Redis in this process"""
+
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name="feed-redis-listener", daemon=True
+                )
+                self._listener.start()
+
+        return super(RedisFeedBackend, self).subscribe(channels=channels)
+
+    def _listen(self) -> None:
+        """Read messages of all feed channels and dispatch them in this process"""
+
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+
+                for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        self._dispatch(
+                            channel=message["channel"].decode(),
+                            data=message["data"].decode(),
+                        )
+            except Exception:
+                logger.exception("Feed listener lost connection to Redis")
+                time.sleep(1)
+
+
+@lru_cache(maxsize=None)
+def get_feed_backend():
+    """Return backend configured with FEED_BACKEND setting or None if disabled"""
+
+    if not settings.FEED_BACKEND:
+        return None
+
+    return import_string(settings.FEED_BACKEND)()
+
+
+@receiver(setting_changed)
+def reset_feed_backend(setting, **kwargs):
+    """Create backend again when settings are overridden in tests"""
+
+    if setting in ("FEED_BACKEND", "FEED_REDIS_URL"):
+        get_feed_backend.cache_clear()
+
+
+def get_item_channel(item_id: int) -> str:
+    """Return channel with trades and order book changes of the item"""
+
+    return f"{CHANNEL_PREFIX}item:{item_id}"
+
+
+def get_user_channel(user_id: int) -> str:
+    """Return channel with offers and trades of the user"""
+
+    return f"{CHANNEL_PREFIX}user:{user_id}"
+
+
+def publish(channels: Iterable[str], event: str, data: dict) -> None:
+    """Encode message once per channel and send it to the feed backend"""
+
+    backend = get_feed_backend()
+    if backend is None:
+        return
+
+    for channel in channels:
+        if not backend.has_subscribers(channel=channel):
+            continue
+
+        message = {
+            "event": event,
+            "channel": channel[len(CHANNEL_PREFIX) :],
+            "data": data,
+        }
+        try:
+            backend.publish(
+                channel=channel, data=json.dumps(message, cls=encoders.JSONEncoder)
+            )
+        except Exception:
+            # Clients can always fall back to polling, so never break writes
+            logger.exception("Unable to publish feed message to %s", channel)
+
+
+def publish_trade(trade: Trade) -> None:
+    """Push settled trade to the item's channel and to the users of the trade"""
+
+    channels = [get_item_channel(item_id=trade.item_id)] if trade.item_id else []
+    channels.extend(
+        get_user_channel(user_id=user_id)
+        for user_id in {trade.seller_id, trade.buyer_id}
+        if user_id is not None
+    )
+
+    publish(
+        channels=channels,
+        event="trade",
+        data={
+            "id": trade.id,
+            "item": trade.item_id,
+            "seller": trade.seller_id,
+            "buyer": trade.buyer_id,
+            "seller_offer": trade.seller_offer_id,
+            "buyer_offer": trade.buyer_offer_id,
+            "quantity": trade.quantity,
+            "unit_price": decimal_to_string(trade.unit_price),
+            "date": trade.date,
+        },
+    )
+
+
+def publish_offer(offer: Offer) -> None:
+    """Push offer's acknowledgement or fill to the offer's user"""
+
+    publish(
+        channels=[get_user_channel(user_id=offer.user_id)],
+        event="offer",
+        data={
+            "id": offer.id,
+            "item": offer.item_id,
+            "status": offer.status,
+            "price": decimal_to_string(offer.price),
+            "entry_quantity": offer.entry_quantity,
+            "quantity": offer.quantity,
+            "is_active": offer.is_active,
+        },
+    )
+
+
+def publish_book_level(item_id: int, status: str, price) -> None:
+    """Push the current state of the order book's price level"""
+
+    channel = get_item_channel(item_id=item_id)
+    backend = get_feed_backend()
+    # The level is aggregated by a query, which nobody could be waiting for
+    if backend is None or not backend.has_subscribers(channel=channel):
+        return
+
+    level = get_order_book_level(item_id=item_id, status=status, price=price)
+    level.update(item=item_id, side="bids" if status == "PURCHASE" else "asks")
+
+    publish(channels=[channel], event="book", data=level)
+
+
+def schedule_offer_messages(offer: Offer) -> None:
+    """Publish offer and its price level after the transaction is committed"""
+
+    if get_feed_backend() is None:
+        return
+
+    transaction.on_commit(lambda: publish_offer(offer=offer))
+    if offer.item_id is not None:
+        schedule_book_level(
+            item_id=offer.item_id, status=offer.status, price=offer.price
+        )
+
+
+def schedule_book_level(item_id: int, status: str, price) -> None:
+    """Publish price level of the order book after the transaction is committed"""
+
+    if get_feed_backend() is None:
+        return
+
+    transaction.on_commit(
+        lambda: publish_book_level(item_id=item_id, status=status, price=price)
+    )
+
+
+def schedule_trade_message(trade: Trade) -> None:
+    """Publish trade after the transaction is committed"""
+
+    if get_feed_backend() is None:
+        return
+
+    transaction.on_commit(lambda: publish_trade(trade=trade))
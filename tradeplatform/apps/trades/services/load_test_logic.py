@@ -0,0 +1,373 @@
+import asyncio
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from typing import Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+async def run_load(
+    base_url: str,
+    paths: Iterable[str],
+    total: int,
+    concurrency: int,
+    headers: Optional[dict] = None,
+    slow_clients: int = 0,
+    slow_delay: float = 1.0,
+) -> dict:
+    """
+    Make `total` GET requests to the given paths in round robin with `concurrency`
+    parallel clients. Slow clients send request headers one line per `slow_delay`
+    seconds during the whole run to hold server connections.
+    Return latencies in seconds and errors grouped by path
+    """
+
+    paths = list(paths)
+    queue = asyncio.Queue()
+    for number in range(total):
+        queue.put_nowait(paths[number % len(paths)])
+
+    result = {"latencies": defaultdict(list), "errors": defaultdict(int)}
+    finished = asyncio.Event()
+
+    async def worker():
+        while not queue.empty():
+            path = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                status = await fetch(base_url=base_url, path=path, headers=headers)
+            except (OSError, asyncio.TimeoutError, ValueError):
+                status = None
+
+            if status == 200:
+                result["latencies"][path].append(time.perf_counter() - start)
+            else:
+                result["errors"][path] += 1
+
+    slow_tasks = [
+        asyncio.ensure_future(
+            _slow_client(
+                base_url=base_url, path=paths[0], delay=slow_delay, finished=finished
+            )
+        )
+        for _ in range(slow_clients)
+    ]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result["elapsed"] = time.perf_counter() - start
+
+    finished.set()
+    await asyncio.gather(*slow_tasks, return_exceptions=True)
+
+    return result
+
+
+async def fetch(
+    base_url: str, path: str, headers: Optional[dict] = None, timeout: float = 30
+) -> int:
+    """Make HTTP/1.0 GET request and return response status code"""
+
+    status, _ = await request(
+        base_url=base_url, method="GET", path=path, headers=headers, timeout=timeout
+    )
+    return status
+
+
+async def request(
+    base_url: str,
+    method: str,
+    path: str,
+    headers: Optional[dict] = None,
+    data: Optional[dict] = None,
+    timeout: float = 30,
+) -> tuple:
+    """
+    Make HTTP/1.0 request with JSON body. Return response status code
+    and decoded JSON body, which is None if the response isn't JSON
+    """
+
+    reader, writer = await _open_connection(base_url=base_url, timeout=timeout)
+
+    try:
+        writer.write(
+            _build_request(
+                base_url=base_url,
+                path=path,
+                headers=headers,
+                method=method,
+                body=None if data is None else json.dumps(data).encode(),
+            )
+        )
+        await writer.drain()
+
+        response = await asyncio.wait_for(reader.read(), timeout=timeout)
+    finally:
+        writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    try:
+        content = json.loads(body) if body else None
+    except ValueError:
+        content = None
+
+    return int(head.split(b" ", 2)[1]), content
+
+
+def summarize(latencies: list, elapsed: float) -> dict:
+    """Return count, throughput and latency percentiles in milliseconds"""
+
+    if not latencies:
+        return {"count": 0, "rps": 0, "p50": 0, "p95": 0, "p99": 0, "max": 0}
+
+    ordered = sorted(latencies)
+
+    return {
+        "count": len(ordered),
+        "rps": len(ordered) / elapsed if elapsed else 0,
+        "p50": _percentile(ordered=ordered, percent=50) * 1000,
+        "p95": _percentile(ordered=ordered, percent=95) * 1000,
+        "p99": _percentile(ordered=ordered, percent=99) * 1000,
+        "max": ordered[-1] * 1000,
+    }
+
+
+class Journey:
+    """
+    Scripted session of one virtual user: sign up, obtain JWT, then list items,
+    post offers, poll trades and read statistics. Latencies and errors are
+    recorded per endpoint
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        username: str,
+        password: str,
+        result: dict,
+        rand: random.Random,
+        think_time: float = 0,
+        timeout: float = 30,
+    ):
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.result = result
+        self.rand = rand
+        self.think_time = think_time
+        self.timeout = timeout
+        self.headers = {}
+
+    async def run(self, iterations: int, signup: bool = False) -> None:
+        if signup:
+            await self.call(
+                "POST /registration/signup/",
+                method="POST",
+                path="/registration/signup/",
+                data={
+                    "username": self.username,
+                    "email": f"{self.username}@example.com",
+                    "password": self.password,
+                    "password2": self.password,
+                },
+                expected=201,
+            )
+
+        token = await self.call(
+            "POST /api/token/",
+            method="POST",
+            path="/api/token/",
+            data={"username": self.username, "password": self.password},
+        )
+        if not token or "access" not in token:
+            return
+        self.headers = {"Authorization": f"JWT {token['access']}"}
+
+        for _ in range(iterations):
+            await self.trade()
+
+    async def trade(self) -> None:
+        """
+        One round of the journey. Lists are requested with the latest price only,
+        like a polling client does, not with the whole price history of items
+        """
+
+        items = await self.call(
+            "GET /api/v1/items/",
+            method="GET",
+            path="/api/v1/items/?limit=20&expand=latest_price",
+        )
+        if isinstance(items, dict):
+            items = items.get("results")
+        if not items:
+            return
+        item_id = self.rand.choice(items)["id"]
+
+        await self.call(
+            "POST /api/v1/offers/",
+            method="POST",
+            path="/api/v1/offers/",
+            data={
+                "status": self.rand.choice(("PURCHASE", "SELL")),
+                "item": item_id,
+                "entry_quantity": self.rand.randint(1, 5),
+                "price": self.rand.randint(1, 20),
+            },
+            expected=201,
+        )
+        for _ in range(2):
+            await self.call(
+                "GET /api/v1/trades/",
+                method="GET",
+                path="/api/v1/trades/?limit=20&expand=item.latest_price",
+            )
+        await self.call(
+            "GET /api/v1/statistics/{item}/",
+            method="GET",
+            path=f"/api/v1/statistics/{item_id}/",
+        )
+
+    async def call(
+        self,
+        name: str,
+        method: str,
+        path: str,
+        data: Optional[dict] = None,
+        expected: int = 200,
+    ):
+        """Make request, record its latency and return the body if it succeeded"""
+
+        if self.think_time:
+            await asyncio.sleep(self.rand.uniform(0, 2 * self.think_time))
+
+        start = time.perf_counter()
+        try:
+            status, content = await request(
+                base_url=self.base_url,
+                method=method,
+                path=path,
+                headers=self.headers,
+                data=data,
+                timeout=self.timeout,
+            )
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+            status, content = None, None
+
+        if status == expected:
+            self.result["latencies"][name].append(time.perf_counter() - start)
+            return content
+
+        self.result["errors"][name][status] += 1
+        return None
+
+
+async def run_journeys(
+    base_url: str,
+    users: Iterable[Tuple[str, str]],
+    iterations: int,
+    signup: bool = False,
+    ramp_up: float = 0,
+    think_time: float = 0,
+    seed: int = 42,
+    timeout: float = 30,
+) -> dict:
+    """
+    Run journeys of the given (username, password) pairs concurrently, starts
+    of the users are spread over `ramp_up` seconds. Return latencies in seconds
+    and errors by status code grouped by endpoint
+    """
+
+    users = list(users)
+    result = {
+        "latencies": defaultdict(list),
+        "errors": defaultdict(lambda: defaultdict(int)),
+    }
+
+    async def user(number: int, username: str, password: str):
+        if ramp_up:
+            await asyncio.sleep(ramp_up * number / len(users))
+        journey = Journey(
+            base_url=base_url,
+            username=username,
+            password=password,
+            result=result,
+            rand=random.Random(f"{seed}:{username}"),
+            think_time=think_time,
+            timeout=timeout,
+        )
+        await journey.run(iterations=iterations, signup=signup)
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            user(number=number, username=username, password=password)
+            for number, (username, password) in enumerate(users)
+        )
+    )
+    result["elapsed"] = time.perf_counter() - start
+
+    return result
+
+
+def _percentile(ordered: list, percent: float) -> float:
+    """Return percentile of the sorted values using the nearest rank method"""
+
+    rank = math.ceil(percent / 100 * len(ordered))
+
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+async def _slow_client(
+    base_url: str, path: str, delay: float, finished: asyncio.Event
+) -> None:
+    """Hold connections to the server by sending request headers slowly"""
+
+    while not finished.is_set():
+        reader, writer = await _open_connection(base_url=base_url, timeout=30)
+
+        try:
+            for line in _build_request(base_url=base_url, path=path).splitlines(
+                keepends=True
+            ):
+                writer.write(line)
+                await writer.drain()
+                try:
+                    await asyncio.wait_for(finished.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+            await reader.read()
+        finally:
+            writer.close()
+
+
+async def _open_connection(base_url: str, timeout: float):
+    """Open TCP connection to the host of the given url"""
+
+    url = urlsplit(base_url)
+    if url.scheme != "http":
+        raise ValueError("Only http urls are supported")
+
+    return await asyncio.wait_for(
+        asyncio.open_connection(url.hostname, url.port or 80), timeout=timeout
+    )
+
+
+def _build_request(
+    base_url: str,
+    path: str,
+    headers: Optional[dict] = None,
+    method: str = "GET",
+    body: Optional[bytes] = None,
+) -> bytes:
+    """Return bytes of HTTP/1.0 request, the body is sent as JSON"""
+
+    url = urlsplit(base_url)
+    lines = [f"{method} {url.path.rstrip('/')}{path} HTTP/1.0", f"Host: {url.netloc}"]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    if body is not None:
+        lines.extend(("Content-Type: application/json", f"Content-Length: {len(body)}"))
+
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b"")
@@ -0,0 +1,170 @@
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
+from typing import Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.trades.models import TaskLease
+from apps.trades.services.metrics_logic import (TASK_LEASE_HELD_SECONDS,
+                                                TASK_LEASE_LOST,
+                                                TASK_LEASE_SKIPPED)
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "lease:"
+
+# Compare owner's token before changing the key, so expired owner can't
+# extend or release the lease taken by another worker
+EXTEND_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LeaseLost(Exception):
+    """The lease expired and could be taken by another worker"""
+
+
+class DatabaseLockBackend:
+    """
+    Keep leases in TaskLease rows. Expired lease is taken over with one
+    conditional UPDATE and the first lease is created with INSERT, which fails
+    for all workers except one, so any database works without row locks
+    """
+
+    def acquire(self, name: str, token: str, timeout: int) -> bool:
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=timeout)
+
+        if TaskLease.objects.filter(name=name, expires_at__lte=now).update(
+            owner=token, expires_at=expires_at
+        ):
+            return True
+
+        try:
+            with transaction.atomic():
+                TaskLease.objects.create(name=name, owner=token, expires_at=expires_at)
+        except IntegrityError:
+            return False
+
+        return True
+
+    def extend(self, name: str, token: str, timeout: int) -> bool:
+        return bool(
+            TaskLease.objects.filter(
+                name=name, owner=token, expires_at__gt=timezone.now()
+            ).update(expires_at=timezone.now() + timedelta(seconds=timeout))
+        )
+
+    def release(self, name: str, token: str) -> None:
+        TaskLease.objects.filter(name=name, owner=token).delete()
+
+
+class RedisLockBackend:
+    """Keep leases in Redis keys with expiration time"""
+
+    def __init__(self, url: Optional[str] = None):
+        import redis
+
+        self._client = redis.Redis.from_url(url or settings.LOCK_REDIS_URL)
+        self._extend = self._client.register_script(EXTEND_SCRIPT)
+        self._release = self._client.register_script(RELEASE_SCRIPT)
+
+    def acquire(self, name: str, token: str, timeout: int) -> bool:
+        return bool(
+            self._client.set(f"{KEY_PREFIX}{name}", token, nx=True, px=timeout * 1000)
+        )
+
+    def extend(self, name: str, token: str, timeout: int) -> bool:
+        return bool(
+            self._extend(keys=[f"{KEY_PREFIX}{name}"], args=[token, timeout * 1000])
+        )
+
+    def release(self, name: str, token: str) -> None:
+        self._release(keys=[f"{KEY_PREFIX}{name}"], args=[token])
+
+
+@lru_cache(maxsize=None)
+def get_lock_backend():
+    """Return backend configured with LOCK_BACKEND setting"""
+
+    return import_string(settings.LOCK_BACKEND)()
+
+
+@receiver(setting_changed)
+def reset_lock_backend(setting, **kwargs):
+    """Create backend again when settings are overridden in tests"""
+
+    if setting in ("LOCK_BACKEND", "LOCK_REDIS_URL"):
+        get_lock_backend.cache_clear()
+
+
+class Lease:
+    """Lease held by the current worker"""
+
+    def __init__(self, backend, name: str, token: str, timeout: int):
+        self.backend = backend
+        self.name = name
+        self.token = token
+        self.timeout = timeout
+        self._extended_at = time.monotonic()
+
+    def keep_alive(self) -> None:
+        """
+        Extend the lease after half of its timeout has passed.
+        Raise LeaseLost if the lease has already expired
+        """
+
+        if time.monotonic() - self._extended_at < self.timeout / 2:
+            return
+
+        if not self.backend.extend(
+            name=self.name, token=self.token, timeout=self.timeout
+        ):
+            raise LeaseLost(f"Lease {self.name} expired")
+
+        self._extended_at = time.monotonic()
+
+
+@contextmanager
+def acquire_lease(name: str, timeout: int):
+    """
+    Hold the lease while the block runs. None is yielded if the lease is held
+    by another worker, so the caller skips its run
+    """
+
+    backend = get_lock_backend()
+    token = uuid.uuid4().hex
+
+    if not backend.acquire(name=name, token=token, timeout=timeout):
+        TASK_LEASE_SKIPPED.inc(name=name)
+        logger.info("Skip %s, the lease is held by another worker", name)
+        yield None
+        return
+
+    started = time.perf_counter()
+    try:
+        yield Lease(backend=backend, name=name, token=token, timeout=timeout)
+    except LeaseLost:
+        TASK_LEASE_LOST.inc(name=name)
+        raise
+    finally:
+        backend.release(name=name, token=token)
+        TASK_LEASE_HELD_SECONDS.observe(time.perf_counter() - started, name=name)
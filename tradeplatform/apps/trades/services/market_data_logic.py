@@ -0,0 +1,123 @@
+from decimal import Decimal
+
+from django.db.models import Count, F, Sum
+
+from apps.trades.models import Item, Offer, Trade
+
+
+def get_order_book_depth(item_id: int, levels: int = 10) -> dict:
+    """
+    Return available quantity of active offers aggregated by price level.
+    The best price levels come first for both sides
+    """
+
+    return {
+        "item": item_id,
+        "bids": _get_depth_side(item_id=item_id, status="PURCHASE", levels=levels),
+        "asks": _get_depth_side(item_id=item_id, status="SELL", levels=levels),
+    }
+
+
+def get_latest_prices() -> list:
+    """Return the latest price of every item from denormalized quotes"""
+
+    items = Item.objects.order_by("code").values(
+        "id", "code", "quote__price", "quote__currency__code", "quote__price_date"
+    )
+
+    return [
+        {
+            "item": item["id"],
+            "code": item["code"],
+            "price": decimal_to_string(item["quote__price"]),
+            "currency": item["quote__currency__code"],
+            "date": item["quote__price_date"],
+        }
+        for item in items
+    ]
+
+
+def get_recent_trades(item_id: int, limit: int = 20) -> list:
+    """Return the latest trades of the item, newest first"""
+
+    trades = (
+        Trade.objects.filter(item_id=item_id)
+        .order_by("-date", "-id")
+        .values(
+            "id",
+            "quantity",
+            "unit_price",
+            "date",
+            "seller__username",
+            "buyer__username",
+        )[:limit]
+    )
+
+    return [
+        {
+            "id": trade["id"],
+            "seller": trade["seller__username"],
+            "buyer": trade["buyer__username"],
+            "quantity": trade["quantity"],
+            "unit_price": decimal_to_string(trade["unit_price"]),
+            "date": trade["date"],
+        }
+        for trade in trades
+    ]
+
+
+def get_order_book_level(item_id: int, status: str, price) -> dict:
+    """Return available quantity of active offers with the given price"""
+
+    level = _get_price_levels(item_id=item_id, status=status).filter(price=price)
+
+    return _get_level_data(
+        next(iter(level), {"price": price, "quantity": 0, "offers": 0})
+    )
+
+
+def _get_depth_side(item_id: int, status: str, levels: int) -> list:
+    """Return price levels of one side of the order book"""
+
+    ordering = "-price" if status == "PURCHASE" else "price"
+    price_levels = _get_price_levels(item_id=item_id, status=status).order_by(ordering)[
+        :levels
+    ]
+
+    return [_get_level_data(level) for level in price_levels]
+
+
+def _get_price_levels(item_id: int, status: str):
+    """Return active offers of one side of the order book grouped by price"""
+
+    return (
+        Offer.objects.active()
+        .filter(item_id=item_id, status=status)
+        .values("price")
+        .annotate(
+            quantity=Sum(F("entry_quantity") - F("quantity")),
+            offers=Count("id"),
+        )
+    )
+
+
+def _get_level_data(level: dict) -> dict:
+    """Return representation of the price level"""
+
+    return {
+        "price": decimal_to_string(level["price"]),
+        "quantity": level["quantity"],
+        "offers": level["offers"],
+    }
+
+
+def decimal_to_string(value, decimal_places: int = 2):
+    """
+    Decimal values are represented as strings like in serializers.
+    Subquery annotations lose the scale of the column on some databases
+    """
+
+    if value is None:
+        return None
+
+    return str(Decimal(value).quantize(Decimal(1).scaleb(-decimal_places)))
@@ -0,0 +1,342 @@
+import json
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+
+from apps.trades.services.book_storage_logic import (JOURNAL_FILE, BookJournal,
+                                                     is_consistent, load_books,
+                                                     write_snapshot)
+from apps.trades.services.lock_logic import acquire_lease
+from apps.trades.services.metrics_logic import MATCHING_PASS_SECONDS
+from apps.trades.services.order_book_logic import OrderBooks, load_order_books
+from apps.trades.services.settlement_logic import settle_fills
+
+logger = logging.getLogger(__name__)
+
+MATCHING_LEASE = "start_trade"
+
+
+class RedisMatcherQueue:
+    """Redis list with ids of offers, which were changed since the last batch"""
+
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None):
+        import redis
+
+        self._client = redis.Redis.from_url(url or settings.MATCHER_REDIS_URL)
+        self._key = key or settings.MATCHER_QUEUE_KEY
+
+    def push(self, offer_id: int) -> None:
+        self._client.rpush(self._key, offer_id)
+
+    def pop(self, max_count: int, timeout: float) -> List[int]:
+        """Wait for the first id and take the others, which are already queued"""
+
+        first = self._client.blpop(self._key, timeout=max(int(timeout), 1))
+        if first is None:
+            return []
+
+        pipeline = self._client.pipeline()
+        pipeline.lrange(self._key, 0, max_count - 2)
+        pipeline.ltrim(self._key, max_count - 1, -1)
+        rest, _ = pipeline.execute()
+
+        return [int(first[1])] + [int(offer_id) for offer_id in rest]
+
+
+@lru_cache(maxsize=None)
+def get_matcher_queue() -> Optional[RedisMatcherQueue]:
+    """Return queue of the matcher or None if MATCHER_REDIS_URL is not set"""
+
+    if not settings.MATCHER_REDIS_URL:
+        return None
+
+    return RedisMatcherQueue()
+
+
+@receiver(setting_changed)
+def reset_matcher_queue(setting, **kwargs):
+    """Create queue again when settings are overridden in tests"""
+
+    if setting in ("MATCHER_REDIS_URL", "MATCHER_QUEUE_KEY"):
+        get_matcher_queue.cache_clear()
+
+
+def schedule_matcher_notification(offer_id: int) -> None:
+    """Notify the matcher about the changed offer after the transaction commits"""
+
+    queue = get_matcher_queue()
+    if queue is not None:
+        transaction.on_commit(lambda: _push_safely(queue=queue, offer_id=offer_id))
+
+
+def _push_safely(queue: RedisMatcherQueue, offer_id: int) -> None:
+    # The matcher reloads its books periodically, so a lost notification
+    # only delays the fill and mustn't fail the request
+    try:
+        queue.push(offer_id=offer_id)
+    except Exception:
+        logger.exception("Failed to notify matcher about offer %s", offer_id)
+
+
+class Matcher:
+    """
+    Long-running matching process. Books of all items are kept in memory,
+    offers are refreshed from notifications and only changed books are matched,
+    fills are settled in batches. The process holds the same lease as
+    the start_trade task, so periodic passes are skipped while it runs.
+    With storage directory books are restored from snapshot and journal
+    instead of loading all offers at startup
+    """
+
+    def __init__(
+        self,
+        queue: Optional[RedisMatcherQueue],
+        batch_size: int = 100,
+        poll_timeout: float = 1.0,
+        resync_interval: float = 300,
+        lease_timeout: int = 120,
+        storage_dir: Optional[str] = None,
+        snapshot_interval: float = 60,
+    ):
+        self.queue = queue
+        self.batch_size = batch_size
+        self.poll_timeout = poll_timeout
+        self.resync_interval = resync_interval
+        self.lease_timeout = lease_timeout
+        self.storage_dir = storage_dir
+        self.snapshot_interval = snapshot_interval
+        self.journal = None
+        self.books = OrderBooks()
+        self.stopping = threading.Event()
+        self.last_loop_at = None
+        self.has_lease = False
+        self.settled_trades = 0
+        self._synced_at = None
+        self._snapshot_at = None
+
+    def stop(self) -> None:
+        self.stopping.set()
+
+    def run(self) -> None:
+        """Wait for the lease and match offers until stop() is called"""
+
+        while not self.stopping.is_set():
+            with acquire_lease(
+                name=MATCHING_LEASE, timeout=self.lease_timeout
+            ) as lease:
+                if lease is None:
+                    # Another matcher or periodic pass holds the lease
+                    self.last_loop_at = time.monotonic()
+                    self.stopping.wait(self.poll_timeout)
+                    continue
+
+                logger.info("Matcher acquired the lease")
+                self.has_lease = True
+                items = self._restore()
+
+                try:
+                    self._settle(items=items)
+                    while not self.stopping.is_set():
+                        lease.keep_alive()
+                        self.run_once()
+                finally:
+                    self.has_lease = False
+                    self._close_storage()
+
+    def run_once(self) -> int:
+        """Process one batch of notifications, return number of settled trades"""
+
+        close_old_connections()
+
+        if time.monotonic() - self._synced_at >= self.resync_interval:
+            items = self._resync()
+        elif self.queue is not None:
+            offer_ids = self.queue.pop(
+                max_count=self.batch_size, timeout=self.poll_timeout
+            )
+            items = self.books.refresh(offer_ids=offer_ids)
+        else:
+            # Without notifications changes are found only by reloading the books,
+            # which are saved only by periodic snapshots
+            self.stopping.wait(self.poll_timeout)
+            items = self._resync(save=False)
+
+        settled = self._settle(items=items)
+        self.last_loop_at = time.monotonic()
+
+        if (
+            self.storage_dir
+            and time.monotonic() - self._snapshot_at >= self.snapshot_interval
+        ):
+            self._write_snapshot()
+
+        return settled
+
+    def get_health(self) -> dict:
+        """Return state of the loop, it is healthy if the last batch was recent"""
+
+        age = (
+            time.monotonic() - self.last_loop_at
+            if self.last_loop_at is not None
+            else None
+        )
+        return {
+            "healthy": age is not None
+            and age < max(self.poll_timeout * 5, 30)
+            and not self.stopping.is_set(),
+            "has_lease": self.has_lease,
+            "last_loop_seconds_ago": age,
+            "books": len(self.books.books),
+            "orders": len(self.books),
+            "settled_trades": self.settled_trades,
+        }
+
+    def _restore(self) -> set:
+        """
+        Restore books from the snapshot and journal if they match the database,
+        otherwise load them from the database. Return ids of the loaded items
+        """
+
+        restored = load_books(directory=self.storage_dir) if self.storage_dir else None
+
+        if restored is None or not is_consistent(books=restored[0]):
+            if restored is not None:
+                logger.warning("Snapshot is behind the database, reloading books")
+            return self._resync()
+
+        self.books, sequence = restored
+        self._synced_at = time.monotonic()
+        self._write_snapshot(sequence=sequence)
+        logger.info("Restored %s orders from the snapshot", len(self.books))
+
+        return set(self.books.books)
+
+    def _resync(self, save: bool = True) -> set:
+        """Reload all books from the database"""
+
+        self.books = load_order_books()
+        self._synced_at = time.monotonic()
+
+        if self.storage_dir and save:
+            self._write_snapshot()
+
+        return set(self.books.books)
+
+    def _write_snapshot(self, sequence: Optional[int] = None) -> None:
+        """Save the books and start the journal from the snapshot"""
+
+        if self.journal is None:
+            self.journal = BookJournal(
+                path=os.path.join(self.storage_dir, JOURNAL_FILE),
+                sequence=sequence or 0,
+            )
+
+        self.journal.flush()
+        write_snapshot(
+            books=self.books,
+            directory=self.storage_dir,
+            sequence=self.journal.sequence,
+        )
+        self.journal.truncate()
+        self.books.journal = self.journal
+        self._snapshot_at = time.monotonic()
+
+    def _close_storage(self) -> None:
+        """Save the books, so the next start doesn't replay the journal"""
+
+        if self.journal is None:
+            return
+
+        try:
+            self._write_snapshot()
+        finally:
+            self.journal.close()
+            self.journal = None
+
+    def _settle(self, items: set) -> int:
+        """Match books of the items and save their changes to the journal"""
+
+        settled = sum(self._match(item_id=item_id) for item_id in sorted(items))
+        if self.journal is not None:
+            self.journal.flush()
+
+        return settled
+
+    def _match(self, item_id: int, attempts: int = 3) -> int:
+        """
+        Match the item's book and settle its fills in batches. Orders of fills,
+        which the database refused, are reloaded and the book is matched again
+        """
+
+        with MATCHING_PASS_SECONDS.time(item=item_id):
+            fills = self.books.match(item_id=item_id)
+
+        settled = 0
+        stale_offer_ids = set()
+        try:
+            for start in range(0, len(fills), self.batch_size):
+                trades, stale = settle_fills(
+                    fills=fills[start : start + self.batch_size]
+                )
+                settled += len(trades)
+                stale_offer_ids |= stale
+        except Exception:
+            # Unsettled fills are already applied to the book, so it is reloaded
+            logger.exception("Failed to settle fills of item %s", item_id)
+            self.books.refresh(
+                offer_ids=[fill.sell_offer_id for fill in fills]
+                + [fill.purchase_offer_id for fill in fills]
+            )
+            stale_offer_ids = set()
+
+        self.settled_trades += settled
+
+        if stale_offer_ids:
+            logger.info(
+                "Dropped fills of %s changed offers of item %s",
+                len(stale_offer_ids),
+                item_id,
+            )
+            self.books.refresh(offer_ids=stale_offer_ids)
+            if attempts > 1:
+                settled += self._match(item_id=item_id, attempts=attempts - 1)
+
+        return settled
+
+
+def serve_health(matcher: Matcher, port: int) -> ThreadingHTTPServer:
+    """Serve health of the matcher at GET /health in a background thread"""
+
+    class HealthHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/health":
+                self.send_error(404)
+                return
+
+            health = matcher.get_health()
+            body = json.dumps(health).encode()
+
+            self.send_response(200 if health["healthy"] else 503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("", port), HealthHandler)
+    threading.Thread(
+        target=server.serve_forever, name="matcher-health", daemon=True
+    ).start()
+
+    return server
@@ -0,0 +1,304 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "metrics:"
+# Seconds to stop sending samples to Redis after it failed
+REDIS_RETRY_SECONDS = 5
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REGISTRY = []
+
+
+class InMemoryMetricsBackend:
+    """Keep samples in the memory of the current process"""
+
+    def __init__(self):
+        self._samples = defaultdict(lambda: defaultdict(float))
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, samples: dict) -> None:
+        """Add amounts to the samples of the metric"""
+
+        with self._lock:
+            for sample, amount in samples.items():
+                self._samples[name][sample] += amount
+
+    def collect(self, name: str) -> dict:
+        """Return samples of the metric"""
+
+        with self._lock:
+            return dict(self._samples[name])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+class RedisMetricsBackend:
+    """
+    Keep samples in Redis hashes, so gunicorn workers and Celery processes
+    increment the same values and any process exposes the totals.
+    While Redis is unavailable samples are dropped without waiting for it
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        import redis
+
+        self._client = redis.Redis.from_url(
+            url or settings.METRICS_REDIS_URL,
+            socket_timeout=settings.METRICS_REDIS_TIMEOUT,
+            socket_connect_timeout=settings.METRICS_REDIS_TIMEOUT,
+        )
+        self._retry_at = 0
+
+    def increment(self, name: str, samples: dict) -> None:
+        """Add amounts to the samples of the metric with one round trip"""
+
+        if time.monotonic() < self._retry_at:
+            return
+
+        pipeline = self._client.pipeline(transaction=False)
+        for sample, amount in samples.items():
+            pipeline.hincrbyfloat(f"{KEY_PREFIX}{name}", sample, amount)
+        try:
+            pipeline.execute()
+        except Exception:
+            self._retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+            raise
+
+    def collect(self, name: str) -> dict:
+        """Return samples of the metric"""
+
+        return {
+            sample.decode(): float(value)
+            for sample, value in self._client.hgetall(f"{KEY_PREFIX}{name}").items()
+        }
+
+    def clear(self) -> None:
+        for key in self._client.scan_iter(f"{KEY_PREFIX}*"):
+            self._client.delete(key)
+
+
+@lru_cache(maxsize=None)
+def get_metrics_backend():
+    """Return backend configured with METRICS_BACKEND setting or None if disabled"""
+
+    if not settings.METRICS_BACKEND:
+        return None
+
+    return import_string(settings.METRICS_BACKEND)()
+
+
+@receiver(setting_changed)
+def reset_metrics_backend(setting, **kwargs):
+    """Create backend again when settings are overridden in tests"""
+
+    if setting in ("METRICS_BACKEND", "METRICS_REDIS_URL", "METRICS_REDIS_TIMEOUT"):
+        get_metrics_backend.cache_clear()
+
+
+class Metric:
+    """Metric in Prometheus text format, which samples are kept by the backend"""
+
+    type = None
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        registry: Optional[list] = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        if registry is not None:
+            registry.append(self)
+
+    def render(self, samples: dict) -> list:
+        """Return lines of the metric in Prometheus text format"""
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for sample in sorted(samples):
+            lines.append(f"{sample} {_format_value(samples[sample])}")
+
+        return lines
+
+    def _increment(self, samples: dict) -> None:
+        backend = get_metrics_backend()
+        if backend is None:
+            return
+
+        try:
+            backend.increment(name=self.name, samples=samples)
+        except Exception:
+            # Lost samples are better than failed requests or settlement
+            logger.exception("Unable to increment metric %s", self.name)
+
+    def _get_labels(self, labels: dict, **extra) -> str:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} requires labels {self.labelnames}")
+
+        pairs = [(name, labels[name]) for name in self.labelnames]
+        pairs.extend(extra.items())
+        if not pairs:
+            return ""
+
+        return "{%s}" % ",".join(
+            f'{name}="{_escape(str(value))}"' for name, value in pairs
+        )
+
+
+class Counter(Metric):
+    """Value, which only goes up"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        self._increment({f"{self.name}{self._get_labels(labels)}": amount})
+
+
+class Histogram(Metric):
+    """Observations counted in cumulative buckets with their sum and count"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple = DEFAULT_BUCKETS,
+        registry: Optional[list] = REGISTRY,
+    ):
+        super(Histogram, self).__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        """Add the value to every bucket it fits, so buckets are stored cumulative"""
+
+        samples = {
+            f"{self.name}_bucket{self._get_labels(labels, le=_format_value(bound))}": 1
+            for bound in self.buckets
+            if value <= bound
+        }
+        samples[f"{self.name}_sum{self._get_labels(labels)}"] = value
+        samples[f"{self.name}_count{self._get_labels(labels)}"] = 1
+
+        self._increment(samples)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe duration of the block in seconds"""
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+OFFERS_CREATED = Counter(
+    "trades_offers_created_total", "Offers created", labelnames=("status",)
+)
+TRADES_SETTLED = Counter("trades_settled_total", "Trades settled")
+MATCHING_PASS_SECONDS = Histogram(
+    "trades_matching_pass_seconds",
+    "Duration of matching one purchase offer with sell offers",
+    labelnames=("item",),
+)
+SETTLEMENT_QUERIES = Histogram(
+    "trades_settlement_queries",
+    "SQL queries executed to settle one trade",
+    buckets=(5, 10, 20, 30, 40, 60, 80, 120),
+)
+CELERY_TASK_LATENCY_SECONDS = Histogram(
+    "celery_task_latency_seconds",
+    "Time between publishing the task and starting it by worker",
+    labelnames=("task",),
+)
+CELERY_TASK_DURATION_SECONDS = Histogram(
+    "celery_task_duration_seconds",
+    "Duration of the task execution",
+    labelnames=("task", "state"),
+    buckets=DEFAULT_BUCKETS + (30, 60, 120),
+)
+TASK_LEASE_SKIPPED = Counter(
+    "task_lease_skipped_total",
+    "Runs skipped, because the lease was held by another worker",
+    labelnames=("name",),
+)
+TASK_LEASE_LOST = Counter(
+    "task_lease_lost_total",
+    "Runs stopped, because the lease expired",
+    labelnames=("name",),
+)
+TASK_LEASE_HELD_SECONDS = Histogram(
+    "task_lease_held_seconds",
+    "Time the lease was held",
+    labelnames=("name",),
+    buckets=DEFAULT_BUCKETS + (30, 60, 120, 300),
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Requests handled", labelnames=("route", "method", "status")
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Duration of requests",
+    labelnames=("route", "method"),
+)
+
+
+def render_metrics(metrics: Iterable[Metric] = None) -> str:
+    """Return all registered metrics in Prometheus text format"""
+
+    backend = get_metrics_backend()
+    lines = []
+
+    for metric in REGISTRY if metrics is None else metrics:
+        samples = backend.collect(name=metric.name) if backend is not None else {}
+        lines.extend(metric.render(samples=samples))
+
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def count_queries():
+    """Count SQL queries executed in the block, the count is in the yielded list"""
+
+    counter = [0]
+
+    def execute_wrapper(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+
+    with connections[DEFAULT_DB_ALIAS].execute_wrapper(execute_wrapper):
+        yield counter
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
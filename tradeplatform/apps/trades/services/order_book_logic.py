@@ -0,0 +1,268 @@
+from bisect import bisect_left, insort
+from typing import Iterable, List, Optional
+
+from apps.trades.models import Offer
+from apps.trades.services.tick_logic import to_ticks
+
+PURCHASE = "PURCHASE"
+SELL = "SELL"
+
+ORDER_FIELDS = (
+    "id",
+    "user_id",
+    "item_id",
+    "status",
+    "price",
+    "entry_quantity",
+    "quantity",
+)
+
+
+class BookOrder:
+    """
+    Active offer resting in the in-memory book, price is in integer ticks.
+    Slots keep millions of orders much smaller than dicts or model instances
+    """
+
+    __slots__ = (
+        "id",
+        "user_id",
+        "item_id",
+        "status",
+        "price_ticks",
+        "entry_quantity",
+        "quantity",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        user_id: int,
+        item_id: int,
+        status: str,
+        price_ticks: int,
+        entry_quantity: int,
+        quantity: int,
+    ):
+        self.id = id
+        self.user_id = user_id
+        self.item_id = item_id
+        self.status = status
+        self.price_ticks = price_ticks
+        self.entry_quantity = entry_quantity
+        self.quantity = quantity
+
+    @property
+    def available(self) -> int:
+        return self.entry_quantity - self.quantity
+
+
+class Fill:
+    """Trade between two book orders, which has to be settled in the database"""
+
+    __slots__ = (
+        "item_id",
+        "sell_offer_id",
+        "purchase_offer_id",
+        "seller_id",
+        "buyer_id",
+        "price_ticks",
+        "quantity",
+    )
+
+    def __init__(self, sell_order: BookOrder, purchase_order: BookOrder, quantity: int):
+        self.item_id = sell_order.item_id
+        self.sell_offer_id = sell_order.id
+        self.purchase_offer_id = purchase_order.id
+        self.seller_id = sell_order.user_id
+        self.buyer_id = purchase_order.user_id
+        self.price_ticks = sell_order.price_ticks
+        self.quantity = quantity
+
+
+class OrderBook:
+    """
+    Active offers of one item. Purchase offers are kept in order of creation,
+    sell offers from the best price, so matching doesn't sort the book
+    """
+
+    def __init__(self, item_id: int):
+        self.item_id = item_id
+        self.orders = {}
+        self._purchase_keys = []
+        self._sell_keys = []
+
+    def __len__(self):
+        return len(self.orders)
+
+    def add(self, order: BookOrder) -> None:
+        self.remove(order_id=order.id)
+        self.orders[order.id] = order
+        insort(*self._get_keys(order=order))
+
+    def remove(self, order_id: int) -> Optional[BookOrder]:
+        order = self.orders.pop(order_id, None)
+        if order is not None:
+            keys, key = self._get_keys(order=order)
+            keys.remove(key)
+
+        return order
+
+    def match(self) -> List[Fill]:
+        """
+        Match purchase offers with sell offers like create_trades_between_users:
+        purchase offers in order of creation take the cheapest sell offers
+        of other users at the seller's price until they are filled
+        """
+
+        fills = []
+
+        for purchase_key in list(self._purchase_keys):
+            purchase_order = self.orders[purchase_key]
+            limit = bisect_left(self._sell_keys, (purchase_order.price_ticks + 1,))
+
+            for _, sell_id in self._sell_keys[:limit]:
+                sell_order = self.orders[sell_id]
+                if sell_order.user_id == purchase_order.user_id:
+                    continue
+
+                quantity = min(purchase_order.available, sell_order.available)
+                fills.append(Fill(sell_order, purchase_order, quantity))
+                sell_order.quantity += quantity
+                purchase_order.quantity += quantity
+
+                if sell_order.available == 0:
+                    self.remove(order_id=sell_order.id)
+                if purchase_order.available == 0:
+                    self.remove(order_id=purchase_order.id)
+                    break
+
+        return fills
+
+    def _get_keys(self, order: BookOrder) -> tuple:
+        if order.status == PURCHASE:
+            return self._purchase_keys, order.id
+        return self._sell_keys, (order.price_ticks, order.id)
+
+
+class OrderBooks:
+    """
+    Books of all items with index of orders, so any order is found by its id.
+    Changes are written to the journal if it is attached
+    """
+
+    def __init__(self):
+        self.books = {}
+        self.journal = None
+        self._order_items = {}
+
+    def __len__(self):
+        return len(self._order_items)
+
+    def add(self, order: BookOrder) -> None:
+        self._remove(order_id=order.id)
+
+        if order.item_id not in self.books:
+            self.books[order.item_id] = OrderBook(item_id=order.item_id)
+        self.books[order.item_id].add(order)
+        self._order_items[order.id] = order.item_id
+
+        if self.journal is not None:
+            self.journal.upsert(order=order)
+
+    def remove(self, order_id: int) -> Optional[int]:
+        """Remove the order and return id of its item"""
+
+        item_id = self._remove(order_id=order_id)
+        if item_id is not None and self.journal is not None:
+            self.journal.remove(order_id=order_id)
+
+        return item_id
+
+    def match(self, item_id: int) -> List[Fill]:
+        """Match the item's book and forget filled orders"""
+
+        book = self.books.get(item_id)
+        if book is None:
+            return []
+
+        fills = book.match()
+        changed = dict.fromkeys(
+            order_id
+            for fill in fills
+            for order_id in (fill.sell_offer_id, fill.purchase_offer_id)
+        )
+        for order_id in changed:
+            order = book.orders.get(order_id)
+            if order is None:
+                self._order_items.pop(order_id, None)
+            if self.journal is not None:
+                if order is None:
+                    self.journal.remove(order_id=order_id)
+                else:
+                    self.journal.upsert(order=order)
+
+        if not book:
+            del self.books[item_id]
+
+        return fills
+
+    def refresh(self, offer_ids: Iterable[int]) -> set:
+        """
+        Replace the given offers with their current database state.
+        Return ids of items, which books were changed
+        """
+
+        offer_ids = set(offer_ids)
+        items = {self.remove(order_id=offer_id) for offer_id in offer_ids}
+
+        for order in _load_orders(Offer.objects.filter(id__in=offer_ids)):
+            self.add(order)
+            items.add(order.item_id)
+
+        items.discard(None)
+        return items
+
+    def _remove(self, order_id: int) -> Optional[int]:
+        item_id = self._order_items.pop(order_id, None)
+        if item_id is not None:
+            book = self.books[item_id]
+            book.remove(order_id=order_id)
+            if not book:
+                del self.books[item_id]
+
+        return item_id
+
+
+def load_order_books(item_ids: Optional[Iterable[int]] = None) -> OrderBooks:
+    """Load active offers into books of their items"""
+
+    books = OrderBooks()
+    offers = Offer.objects.all()
+    if item_ids is not None:
+        offers = offers.filter(item_id__in=list(item_ids))
+
+    for order in _load_orders(offers=offers):
+        books.add(order)
+
+    return books
+
+
+def _load_orders(offers) -> Iterable[BookOrder]:
+    """
+    Return active offers with items as book orders. Rows are read as tuples,
+    so no model instances are created
+    """
+
+    rows = offers.filter(is_active=True, item__isnull=False).values_list(*ORDER_FIELDS)
+    for row in rows.iterator(chunk_size=10000):
+        order_id, user_id, item_id, status, price, entry_quantity, quantity = row
+        yield BookOrder(
+            order_id,
+            user_id,
+            item_id,
+            status,
+            to_ticks(price),
+            entry_quantity,
+            quantity,
+        )
@@ -0,0 +1,250 @@
+import datetime
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.trades.models import Price, Trade
+
+# Append-only tables, which are queried by time range, and their partition keys
+PARTITIONED_MODELS = ((Trade, "date"), (Price, "date"))
+
+
+def partition_tables(connection, months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Turn tables of PARTITIONED_MODELS into tables range-partitioned by month
+    on PostgreSQL and create partitions up to `months_ahead` months from now.
+    Other databases keep a single table. Return names of converted tables.
+    It's never run by migrate, but by `create_partitions --convert`
+    or migrate_partitions in a migration
+    """
+
+    if connection.vendor != "postgresql":
+        return []
+
+    converted = []
+    for model, field_name in PARTITIONED_MODELS:
+        if not is_partitioned(connection=connection, table=model._meta.db_table):
+            with transaction.atomic(using=connection.alias):
+                _convert_table(
+                    connection=connection, model=model, field_name=field_name
+                )
+            converted.append(model._meta.db_table)
+
+    create_partitions(connection=connection, months_ahead=months_ahead)
+    return converted
+
+
+def create_partitions(
+    connection,
+    months_ahead: Optional[int] = None,
+    now: Optional[datetime.datetime] = None,
+) -> List[str]:
+    """
+    Create missing monthly partitions from the current month to `months_ahead`
+    months ahead, rows of the new months are moved out of the default
+    partition. Return names of created partitions
+    """
+
+    if connection.vendor != "postgresql":
+        return []
+
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_MONTHS_AHEAD
+    month = get_month_start(now or timezone.now())
+    months = get_month_ranges(start=month, end=add_months(month, months_ahead + 1))
+
+    created = []
+    for model, field_name in PARTITIONED_MODELS:
+        table = model._meta.db_table
+        if not is_partitioned(connection=connection, table=table):
+            continue
+        column = model._meta.get_field(field_name).column
+        for start, end in months:
+            with transaction.atomic(using=connection.alias):
+                is_created = _create_partition(
+                    connection=connection,
+                    table=table,
+                    column=column,
+                    start=start,
+                    end=end,
+                )
+            if is_created:
+                created.append(get_partition_name(table=table, month=start))
+
+    return created
+
+
+def is_partitioned(connection, table: str) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table]
+        )
+        row = cursor.fetchone()
+    return row is not None and row[0] == "p"
+
+
+def migrate_partitions(apps, schema_editor) -> None:
+    """Function for migrations.RunPython, which partitions the tables"""
+
+    partition_tables(connection=schema_editor.connection)
+
+
+def get_month_start(moment: datetime.datetime) -> datetime.datetime:
+    """Return the first moment of the month in UTC"""
+
+    moment = moment.astimezone(datetime.timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime.datetime, count: int) -> datetime.datetime:
+    year, month_index = divmod(month.month - 1 + count, 12)
+    return month.replace(year=month.year + year, month=month_index + 1)
+
+
+def get_month_ranges(
+    start: datetime.datetime, end: datetime.datetime
+) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+    """Return [start, end) bounds of the months from the month of start to end"""
+
+    ranges = []
+    month = get_month_start(start)
+    while month < end:
+        ranges.append((month, add_months(month, 1)))
+        month = add_months(month, 1)
+    return ranges
+
+
+def get_partition_name(table: str, month: datetime.datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def get_default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def _convert_table(connection, model, field_name: str) -> None:
+    """
+    Replace the table with a partitioned one in a single transaction: columns,
+    the id sequence, foreign keys and indexes are kept, partitions are created
+    for all months of existing rows, rows without the date go to the default
+    partition. The primary key includes the partition key, as PostgreSQL
+    requires, so a nullable key only gets a plain index on id
+    """
+
+    table = model._meta.db_table
+    column = model._meta.get_field(field_name).column
+    old_table = f"{table}_unpartitioned"
+    quote = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(
+            "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+            "WHERE indrelid = to_regclass(%s) AND NOT indisprimary",
+            [table],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            f"SELECT min({quote(column)}), max({quote(column)}) FROM {quote(table)}"
+        )
+        first, last = cursor.fetchone()
+        cursor.execute(
+            "SELECT attnotnull FROM pg_attribute "
+            "WHERE attrelid = to_regclass(%s) AND attname = %s",
+            [table, column],
+        )
+        is_not_null = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(old_table)}")
+        cursor.execute(
+            f"CREATE TABLE {quote(table)} (LIKE {quote(old_table)} "
+            f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE ({quote(column)})"
+        )
+        if sequence:
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {quote(table)}.id")
+        cursor.execute(
+            f"CREATE TABLE {quote(get_default_partition_name(table))} "
+            f"PARTITION OF {quote(table)} DEFAULT"
+        )
+
+        if first is not None:
+            for start, end in get_month_ranges(
+                start=first, end=add_months(get_month_start(last), 1)
+            ):
+                _create_partition(
+                    connection=connection,
+                    table=table,
+                    column=column,
+                    start=start,
+                    end=end,
+                )
+
+        cursor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(old_table)}")
+        cursor.execute(f"DROP TABLE {quote(old_table)}")
+
+        # Names of the old primary key, foreign keys and indexes are free now
+        if is_not_null:
+            cursor.execute(
+                f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(table + '_pkey')} "
+                f"PRIMARY KEY (id, {quote(column)})"
+            )
+        else:
+            cursor.execute(
+                f"CREATE INDEX {quote(table + '_id_idx')} ON {quote(table)} (id)"
+            )
+
+        for name, definition in foreign_keys:
+            cursor.execute(
+                f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}"
+            )
+        for definition in indexes:
+            cursor.execute(
+                definition.replace(
+                    f" ON {old_table} ", f" ON {quote(table)} ", 1
+                ).replace(f" ON public.{old_table} ", f" ON {quote(table)} ", 1)
+            )
+
+
+def _create_partition(connection, table: str, column: str, start, end) -> bool:
+    """
+    Create the partition of the month unless it exists. It's attached after
+    rows of the month are moved from the default partition, because
+    PostgreSQL refuses a new partition for rows, which the default one has
+    """
+
+    partition = get_partition_name(table=table, month=start)
+    default = get_default_partition_name(table=table)
+    quote = connection.ops.quote_name
+    bounds = f"{quote(column)} >= %s AND {quote(column)} < %s"
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [partition])
+        if cursor.fetchone()[0]:
+            return False
+
+        cursor.execute(
+            f"CREATE TABLE {quote(partition)} (LIKE {quote(table)} "
+            f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {quote(default)} WHERE {bounds} "
+            f"RETURNING *) INSERT INTO {quote(partition)} SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(partition)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+
+    return True
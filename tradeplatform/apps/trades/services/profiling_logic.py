@@ -0,0 +1,155 @@
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger("apps.trades.profiling")
+
+MIDDLEWARE_PHASE = "middleware"
+VIEW_PHASE = "view"
+RENDER_PHASE = "render"
+
+
+class RequestProfile:
+    """
+    Timings of one sampled request. The instance is installed as
+    execute wrapper of database connections to record every SQL query
+    """
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.view = None
+        self.action = None
+        self.phase = MIDDLEWARE_PHASE
+        self.queries = []
+        self.durations = defaultdict(float)
+        self.total = None
+        self._phase_started = self._started = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Execute the query and record its duration"""
+
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started, self.phase))
+
+    def start_phase(self, phase: str) -> None:
+        """Finish the current phase and start the next one"""
+
+        now = time.perf_counter()
+        self.durations[self.phase] += now - self._phase_started
+        self.phase = phase
+        self._phase_started = now
+
+    def finish(self) -> None:
+        """Stop measuring the request"""
+
+        self.start_phase(MIDDLEWARE_PHASE)
+        self.total = time.perf_counter() - self._started
+
+    @property
+    def sql_time(self) -> float:
+        return sum(duration for _, duration, _ in self.queries)
+
+    def get_phase_time(self, phase: str) -> float:
+        """Return time spent in the phase without SQL queries"""
+
+        sql_time = sum(
+            duration
+            for _, duration, query_phase in self.queries
+            if query_phase == phase
+        )
+        return max(self.durations[phase] - sql_time, 0)
+
+
+def is_sampled_request() -> bool:
+    """Choose requests to profile according to PROFILING_SAMPLE_RATE setting"""
+
+    rate = settings.PROFILING_SAMPLE_RATE
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+def set_view(profile: RequestProfile, view_func) -> None:
+    """Attribute the request to the view class and the viewset's action"""
+
+    view_class = getattr(view_func, "cls", None)
+    if view_class is not None:
+        profile.view = f"{view_class.__module__}.{view_class.__name__}"
+        actions = getattr(view_func, "actions", None) or {}
+        profile.action = actions.get(profile.method.lower())
+    else:
+        profile.view = f"{view_func.__module__}.{view_func.__qualname__}"
+
+
+def get_server_timing(profile: RequestProfile) -> str:
+    """
+    Return value of Server-Timing header. `view` and `render` exclude SQL time,
+    serializers run in `view` phase and JSON is encoded in `render` phase
+    """
+
+    metrics = [
+        ("total", profile.total, None),
+        ("db", profile.sql_time, f"{len(profile.queries)} queries"),
+        ("view", profile.get_phase_time(VIEW_PHASE), None),
+        ("render", profile.get_phase_time(RENDER_PHASE), None),
+    ]
+
+    return ", ".join(
+        f"{name};dur={duration * 1000:.1f}"
+        + (f';desc="{description}"' if description else "")
+        for name, duration, description in metrics
+    )
+
+
+def get_duplicated_queries(profile: RequestProfile, limit: int = 5) -> list:
+    """Return SQL statements executed more than once, the most frequent first"""
+
+    statements = {}
+    for sql, duration, _ in profile.queries:
+        count, total = statements.get(sql, (0, 0))
+        statements[sql] = (count + 1, total + duration)
+
+    duplicated = sorted(
+        (
+            (count, total, sql)
+            for sql, (count, total) in statements.items()
+            if count > 1
+        ),
+        reverse=True,
+    )
+
+    return [
+        {"sql": sql, "count": count, "duration_ms": round(total * 1000, 1)}
+        for count, total, sql in duplicated[:limit]
+    ]
+
+
+def log_slow_request(profile: RequestProfile, status_code: int) -> Optional[dict]:
+    """Write sample of the request to the profiling log if it is slow"""
+
+    if profile.total * 1000 < settings.PROFILING_SLOW_REQUEST_MS:
+        return None
+
+    sample = {
+        "method": profile.method,
+        "path": profile.path,
+        "status": status_code,
+        "view": profile.view,
+        "action": profile.action,
+        "total_ms": round(profile.total * 1000, 1),
+        "sql_count": len(profile.queries),
+        "sql_ms": round(profile.sql_time * 1000, 1),
+        "view_ms": round(profile.get_phase_time(VIEW_PHASE) * 1000, 1),
+        "render_ms": round(profile.get_phase_time(RENDER_PHASE) * 1000, 1),
+        "duplicated_sql": get_duplicated_queries(profile=profile),
+    }
+    logger.warning(json.dumps(sample))
+
+    return sample
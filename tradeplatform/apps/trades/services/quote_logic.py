@@ -0,0 +1,99 @@
+from typing import Iterable, Optional
+
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.query import QuerySet
+
+from apps.trades.models import Item, ItemQuote, Offer, Price, Trade, WatchList
+
+PRICE_FIELDS = ("price", "currency", "price_date")
+BOOK_FIELDS = ("best_bid", "best_ask")
+TRADE_FIELDS = ("last_trade_price", "last_trade_quantity", "last_trade_date")
+QUOTE_FIELDS = PRICE_FIELDS + BOOK_FIELDS + TRADE_FIELDS
+
+
+def refresh_item_quote(
+    item_id: int, fields: Iterable[str] = QUOTE_FIELDS, create: bool = True
+) -> None:
+    """
+    Recalculate the given fields of the item's quote with one UPDATE query.
+    Quote is created if it doesn't exist and `create` is True
+    """
+
+    quotes = ItemQuote.objects.filter(item_id=item_id)
+    expressions = _get_quote_expressions(fields=fields)
+
+    if quotes.update(**expressions) or not create:
+        return
+
+    ItemQuote.objects.get_or_create(item_id=item_id)
+    quotes.update(**expressions)
+
+
+def create_item_quote(item_id: int) -> None:
+    """Create empty quote for the new item"""
+
+    ItemQuote.objects.get_or_create(item_id=item_id)
+
+
+def rebuild_item_quotes(items: Optional[QuerySet] = None) -> int:
+    """Create missing quotes and recalculate quotes of the items"""
+
+    items = Item.objects.all() if items is None else items
+
+    ItemQuote.objects.bulk_create(
+        [
+            ItemQuote(item_id=item_id)
+            for item_id in items.filter(quote__isnull=True).values_list("id", flat=True)
+        ],
+        batch_size=1000,
+    )
+
+    return ItemQuote.objects.filter(item__in=items).update(
+        **_get_quote_expressions(fields=QUOTE_FIELDS)
+    )
+
+
+def get_watchlist_quotes(watchlist_id: int) -> QuerySet:
+    """Return quotes of the watched items, ordered by item code"""
+
+    return (
+        ItemQuote.objects.filter(
+            item_id__in=_get_watchlist_items(watchlist_id=watchlist_id)
+        )
+        .select_related("item", "currency")
+        .order_by("item__code")
+    )
+
+
+def _get_watchlist_items(watchlist_id: int) -> QuerySet:
+    """Return ids of the watched items as subquery"""
+
+    return WatchList.item.through.objects.filter(watchlist_id=watchlist_id).values(
+        "item_id"
+    )
+
+
+def _get_quote_expressions(fields: Iterable[str]) -> dict:
+    """Return subqueries, which calculate the quote fields from source tables"""
+
+    latest_price = Price.objects.filter(item_id=OuterRef("item_id")).order_by(
+        F("date").desc(nulls_last=True), "-id"
+    )
+    bids = Offer.objects.purchase_offers().filter(item_id=OuterRef("item_id"))
+    asks = Offer.objects.sell_offers().filter(item_id=OuterRef("item_id"))
+    last_trade = Trade.objects.filter(item_id=OuterRef("item_id")).order_by(
+        "-date", "-id"
+    )
+
+    expressions = {
+        "price": Subquery(latest_price.values("price")[:1]),
+        "currency": Subquery(latest_price.values("currency")[:1]),
+        "price_date": Subquery(latest_price.values("date")[:1]),
+        "best_bid": Subquery(bids.order_by("-price").values("price")[:1]),
+        "best_ask": Subquery(asks.order_by("price").values("price")[:1]),
+        "last_trade_price": Subquery(last_trade.values("unit_price")[:1]),
+        "last_trade_quantity": Subquery(last_trade.values("quantity")[:1]),
+        "last_trade_date": Subquery(last_trade.values("date")[:1]),
+    }
+
+    return {field: expressions[field] for field in fields}
@@ -0,0 +1,278 @@
+import json
+import random
+import time
+from decimal import Decimal
+from typing import Iterable, List, TextIO
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from apps.trades.models import Balance, Inventory, Item, Offer, Trade
+from apps.trades.services.db_interaction import delete_offer_by_id
+from apps.trades.services.order_book_logic import (BookOrder, OrderBooks,
+                                                   load_order_books)
+from apps.trades.services.settlement_logic import settle_fills
+from apps.trades.services.tick_logic import to_ticks
+from apps.trades.services.trader_logic import create_trades_between_users
+
+CREATE = "create"
+CANCEL = "cancel"
+
+# Replayed users start rich, so no balance or inventory goes below zero
+REPLAY_BALANCE = 10**9
+REPLAY_INVENTORY = 10**6
+
+
+class LegacyEngine:
+    """Periodic matching pass of the start_trade task"""
+
+    name = "legacy"
+
+    def load(self) -> None:
+        pass
+
+    def add(self, offer: Offer) -> None:
+        pass
+
+    def cancel(self, offer_id: int) -> None:
+        pass
+
+    def match(self) -> None:
+        create_trades_between_users()
+
+
+class BookEngine:
+    """In-memory books of the run_matcher daemon with batch settlement"""
+
+    name = "matcher"
+
+    def __init__(self):
+        self.books = OrderBooks()
+
+    def load(self) -> None:
+        """Start from active offers, which are already in the database"""
+
+        self.books = load_order_books()
+
+    def add(self, offer: Offer) -> None:
+        self.books.add(
+            BookOrder(
+                offer.id,
+                offer.user_id,
+                offer.item_id,
+                offer.status,
+                to_ticks(Decimal(offer.price)),
+                offer.entry_quantity,
+                offer.quantity,
+            )
+        )
+
+    def cancel(self, offer_id: int) -> None:
+        self.books.remove(order_id=offer_id)
+
+    def match(self) -> None:
+        fills = []
+        for item_id in list(self.books.books):
+            fills.extend(self.books.match(item_id=item_id))
+        _, stale_offer_ids = settle_fills(fills=fills)
+        if stale_offer_ids:
+            self.books.refresh(offer_ids=stale_offer_ids)
+
+
+ENGINES = {engine.name: engine for engine in (LegacyEngine, BookEngine)}
+
+
+def generate_events(
+    count: int,
+    users: int = 20,
+    items: int = 3,
+    seed: int = 42,
+    cancel_rate: float = 0.1,
+    rate: float = 10.0,
+) -> List[dict]:
+    """
+    Return a reproducible stream of offer events. Offers arrive with `rate`
+    events per second on average and prices spread around the price of
+    their item, so most of them cross
+    """
+
+    rand = random.Random(seed)
+    mid_prices = [rand.randint(1000, 10000) for _ in range(items)]
+    events = []
+    created = []
+    moment = 0.0
+
+    for _ in range(count):
+        moment += rand.expovariate(rate)
+        if created and rand.random() < cancel_rate:
+            offer = created.pop(rand.randrange(len(created)))
+            events.append({"time": round(moment, 3), "event": CANCEL, "offer": offer})
+            continue
+
+        item = rand.randrange(items)
+        ticks = mid_prices[item] + rand.randint(-200, 200)
+        events.append(
+            {
+                "time": round(moment, 3),
+                "event": CREATE,
+                "offer": len(events),
+                "user": rand.randrange(users),
+                "item": item,
+                "status": rand.choice(("PURCHASE", "SELL")),
+                "price": str(Decimal(ticks).scaleb(-2)),
+                "quantity": rand.randint(1, 100),
+            }
+        )
+        created.append(len(events) - 1)
+
+    return events
+
+
+def read_events(file: TextIO) -> List[dict]:
+    """Read events from JSON lines"""
+
+    return [json.loads(line) for line in file if line.strip()]
+
+
+def write_events(events: Iterable[dict], file: TextIO) -> None:
+    """Write events as JSON lines"""
+
+    for event in events:
+        file.write(json.dumps(event) + "\n")
+
+
+def replay(events: List[dict], engine_name: str, match_interval: float = 60) -> dict:
+    """
+    Replay events with the engine in a transaction, which is rolled back, so
+    every replay starts from the same state. Matching runs every
+    `match_interval` seconds of the stream's time and after the last event.
+    Return trades, balances, inventories and offers keyed by references of
+    the stream, so replays with different engines are comparable
+    """
+
+    engine = ENGINES[engine_name]()
+    timings = {"total": 0.0, "matching": 0.0, "passes": 0}
+
+    with transaction.atomic():
+        users, items = _create_participants(events=events)
+        offers = {}
+        offer_ids = {}
+        next_match = match_interval
+        start = time.perf_counter()
+
+        for event in sorted(events, key=lambda event: event["time"]):
+            while event["time"] >= next_match:
+                _run_match(engine=engine, timings=timings)
+                next_match += match_interval
+
+            if event["event"] == CREATE:
+                offer = Offer.objects.create(
+                    user_id=users[event["user"]],
+                    item_id=items[event["item"]],
+                    status=event["status"],
+                    entry_quantity=event["quantity"],
+                    price=Decimal(event["price"]),
+                )
+                offers[offer.id] = event["offer"]
+                offer_ids[event["offer"]] = offer.id
+                engine.add(offer)
+            else:
+                offer_id = offer_ids[event["offer"]]
+                delete_offer_by_id(offer_id=offer_id)
+                engine.cancel(offer_id=offer_id)
+
+        _run_match(engine=engine, timings=timings)
+        timings["total"] = time.perf_counter() - start
+
+        result = _collect_result(users=users, items=items, offers=offers)
+        transaction.set_rollback(True)
+
+    result["timings"] = timings
+    return result
+
+
+def compare_results(first: dict, second: dict) -> List[str]:
+    """Return names of the parts, which differ in the two replays"""
+
+    return [
+        part
+        for part in ("trades", "balances", "inventories", "offers")
+        if first[part] != second[part]
+    ]
+
+
+def _create_participants(events: List[dict]) -> tuple:
+    """Create users with balances and inventories, return ids by stream references"""
+
+    created = [event for event in events if event["event"] == CREATE]
+
+    users = {
+        reference: User.objects.create(username=f"replay_{reference}").id
+        for reference in sorted({event["user"] for event in created})
+    }
+    items = {
+        reference: Item.objects.create(
+            code=f"RP{reference}", name=f"Replay item {reference}"
+        ).id
+        for reference in sorted({event["item"] for event in created})
+    }
+
+    # Balances are created with users
+    Balance.objects.filter(user_id__in=list(users.values())).update(
+        quantity=REPLAY_BALANCE
+    )
+    Inventory.objects.bulk_create(
+        Inventory(user_id=user_id, item_id=item_id, quantity=REPLAY_INVENTORY)
+        for user_id in users.values()
+        for item_id in items.values()
+    )
+
+    return users, items
+
+
+def _run_match(engine, timings: dict) -> None:
+    start = time.perf_counter()
+    engine.match()
+    timings["matching"] += time.perf_counter() - start
+    timings["passes"] += 1
+
+
+def _collect_result(users: dict, items: dict, offers: dict) -> dict:
+    """Read the state after the replay, trades are sorted as their order differs"""
+
+    user_references = {user_id: reference for reference, user_id in users.items()}
+    item_references = {item_id: reference for reference, item_id in items.items()}
+
+    trades = sorted(
+        (
+            offers[trade["seller_offer_id"]],
+            offers[trade["buyer_offer_id"]],
+            trade["quantity"],
+            str(trade["unit_price"]),
+        )
+        for trade in Trade.objects.filter(seller_offer_id__in=list(offers)).values(
+            "seller_offer_id", "buyer_offer_id", "quantity", "unit_price"
+        )
+    )
+
+    return {
+        "trades": [list(trade) for trade in trades],
+        "balances": {
+            user_references[user_id]: quantity
+            for user_id, quantity in Balance.objects.filter(
+                user_id__in=list(user_references)
+            ).values_list("user_id", "quantity")
+        },
+        "inventories": {
+            f"{user_references[user_id]}:{item_references[item_id]}": quantity
+            for user_id, item_id, quantity in Inventory.objects.filter(
+                user_id__in=list(user_references)
+            ).values_list("user_id", "item_id", "quantity")
+        },
+        "offers": {
+            offers[offer_id]: [quantity, is_active]
+            for offer_id, quantity, is_active in Offer.objects.filter(
+                id__in=list(offers)
+            ).values_list("id", "quantity", "is_active")
+        },
+    }
@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+# Alias of the database, which ReplicaRouter sends reads to, None is the default one
+_read_database = ContextVar("read_database", default=None)
+
+
+def get_replica_alias() -> Optional[str]:
+    """Return alias of the replica, if it's configured"""
+
+    alias = settings.REPLICA_DATABASE
+    return alias if alias in connections.databases else None
+
+
+def get_read_database() -> Optional[str]:
+    return _read_database.get()
+
+
+@contextmanager
+def read_from_replica(user=None):
+    """
+    Route reads of the block to the replica, unless the user wrote recently
+    and the replica could lag behind the write
+    """
+
+    with keep_read_database():
+        yield route_reads_to_replica(user=user)
+
+
+@contextmanager
+def keep_read_database():
+    """Restore the read database after the block, which could change it"""
+
+    token = _read_database.set(_read_database.get())
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def route_reads_to_replica(user=None) -> Optional[str]:
+    """
+    Send the following reads of the current context to the replica,
+    the caller restores the database with keep_read_database
+    """
+
+    alias = get_replica_alias()
+    if alias is not None and not has_recent_write(user=user):
+        _read_database.set(alias)
+        return alias
+    return None
+
+
+def mark_user_write(user) -> None:
+    """Read the user's requests from the primary while the replica catches up"""
+
+    if settings.REPLICA_STICKY_SECONDS > 0:
+        cache.set(
+            _get_write_key(user_id=user.id),
+            True,
+            timeout=settings.REPLICA_STICKY_SECONDS,
+        )
+
+
+def has_recent_write(user) -> bool:
+    if user is None or not user.is_authenticated:
+        return False
+    return cache.get(_get_write_key(user_id=user.id), False)
+
+
+def _get_write_key(user_id: int) -> str:
+    return f"replica:write:{user_id}"
@@ -0,0 +1,102 @@
+from django.contrib.auth.models import User
+from django.db.models import OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Lower
+from django.db.models.query import QuerySet
+
+from apps.trades.models import Item, Offer, Trade
+
+# Indexes for SearchFilter lookups, which are created only on PostgreSQL.
+# Django compiles istartswith/icontains to UPPER("column"::text) LIKE UPPER(%s),
+# so prefix indexes are built on the same expression
+POSTGRESQL_SEARCH_INDEXES = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS trades_item_code_like_idx "
+    'ON trades_item (UPPER("code"::text) text_pattern_ops)',
+    "CREATE INDEX IF NOT EXISTS trades_item_name_like_idx "
+    'ON trades_item (UPPER("name"::text) text_pattern_ops)',
+    "CREATE INDEX IF NOT EXISTS trades_currency_code_like_idx "
+    'ON trades_currency (UPPER("code"::text) text_pattern_ops)',
+    "CREATE INDEX IF NOT EXISTS trades_currency_name_like_idx "
+    'ON trades_currency (UPPER("name"::text) text_pattern_ops)',
+    "CREATE INDEX IF NOT EXISTS auth_user_username_trgm_idx "
+    'ON auth_user USING gin (UPPER("username"::text) gin_trgm_ops)',
+    "CREATE INDEX IF NOT EXISTS auth_user_email_trgm_idx "
+    'ON auth_user USING gin (UPPER("email"::text) gin_trgm_ops)',
+    "CREATE INDEX IF NOT EXISTS trades_offer_search_trgm_idx "
+    'ON trades_offer USING gin ("search_text" gin_trgm_ops)',
+    "CREATE INDEX IF NOT EXISTS trades_trade_search_trgm_idx "
+    'ON trades_trade USING gin ("search_text" gin_trgm_ops)',
+)
+
+
+def create_search_indexes(connection) -> None:
+    """Create prefix and trigram indexes. Other databases use plain LIKE scans"""
+
+    if connection.vendor != "postgresql":
+        return
+
+    with connection.cursor() as cursor:
+        for sql in POSTGRESQL_SEARCH_INDEXES:
+            cursor.execute(sql)
+
+
+def get_offer_search_text(username: str) -> str:
+    """Return value of the offer's search column"""
+
+    return (username or "").lower()
+
+
+def get_trade_search_text(
+    item_code: str, seller_username: str, buyer_username: str
+) -> str:
+    """
+    Return value of the trade's search column.
+    Values are separated by spaces, so a search term can't match two of them at once
+    """
+
+    return " ".join(
+        value or "" for value in (item_code, seller_username, buyer_username)
+    ).lower()
+
+
+def rebuild_offer_search_text(queryset: QuerySet) -> int:
+    """Recalculate search column for the given offers in the database"""
+
+    username = User.objects.filter(id=OuterRef("user_id")).values("username")[:1]
+
+    return queryset.update(search_text=Lower(Coalesce(Subquery(username), Value(""))))
+
+
+def rebuild_trade_search_text(queryset: QuerySet) -> int:
+    """Recalculate search column for the given trades in the database"""
+
+    item_code = Item.objects.filter(id=OuterRef("item_id")).values("code")[:1]
+    seller = User.objects.filter(id=OuterRef("seller_id")).values("username")[:1]
+    buyer = User.objects.filter(id=OuterRef("buyer_id")).values("username")[:1]
+
+    return queryset.update(
+        search_text=Lower(
+            Concat(
+                Coalesce(Subquery(item_code), Value("")),
+                Value(" "),
+                Coalesce(Subquery(seller), Value("")),
+                Value(" "),
+                Coalesce(Subquery(buyer), Value("")),
+            )
+        )
+    )
+
+
+def rebuild_user_search_text(user_id: int) -> None:
+    """Recalculate search columns, which contain the user's username"""
+
+    rebuild_offer_search_text(queryset=Offer.objects.filter(user_id=user_id))
+    rebuild_trade_search_text(
+        queryset=Trade.objects.filter(Q(seller_id=user_id) | Q(buyer_id=user_id))
+    )
+
+
+def rebuild_item_search_text(item_id: int) -> None:
+    """Recalculate search columns, which contain the item's code"""
+
+    rebuild_trade_search_text(queryset=Trade.objects.filter(item_id=item_id))
@@ -0,0 +1,381 @@
+import random
+import re
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from itertools import accumulate, islice
+from typing import Callable, Iterable, Optional
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from apps.registration.models import UserProfile
+from apps.trades.models import (Balance, Inventory, Item, Offer, Price, Trade,
+                                WatchList)
+from apps.trades.services.db_interaction import get_or_create_default_currency
+from apps.trades.services.quote_logic import rebuild_item_quotes
+from apps.trades.services.search_logic import (get_offer_search_text,
+                                               get_trade_search_text)
+
+MAX_PRICE = Decimal("99999.99")
+HISTORY_DAYS = 365
+BASE36_DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+PREFIX_PATTERN = re.compile(r"[A-Za-z0-9]{1,30}")
+
+
+class MarketSeeder:
+    """
+    Fill the database with a market of the given size. Rows are inserted with
+    bulk_create, so signals aren't sent and rows, which their receivers
+    create, are inserted in bulk too. Users and items are chosen with Zipf
+    distribution, so a few of them have most offers and trades like in
+    a real market
+    """
+
+    def __init__(
+        self,
+        prefix: str = "seed",
+        seed: int = 42,
+        batch_size: int = 5000,
+        password: str = "seed-password",
+        inventories_per_user: int = 5,
+        active_share: float = 0.2,
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        if not PREFIX_PATTERN.fullmatch(prefix):
+            raise ValueError("Prefix has to be 1-30 latin letters or digits")
+
+        self.prefix = prefix
+        self.rand = random.Random(seed)
+        self.batch_size = batch_size
+        self.password = password
+        self.inventories_per_user = inventories_per_user
+        self.active_share = active_share
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.currency = get_or_create_default_currency()
+        self.users = []
+        self.items = []
+        self._cum_weights = {}
+
+    def seed(self, users: int, items: int, prices: int, offers: int, trades: int):
+        """Create all tables of the market and return numbers of created rows"""
+
+        # Codes are checked before users are committed, so a failed run adds nothing
+        first_code = self.get_first_code_number(count=items)
+        counts = {
+            "users": self.seed_users(count=users),
+            "items": self.seed_items(count=items, first_code=first_code),
+        }
+        counts["inventories"] = self.seed_inventories()
+        counts["prices"] = self.seed_prices(count=prices)
+        counts["offers"] = self.seed_offers(count=offers)
+        counts["trades"] = self.seed_trades(count=trades)
+
+        if self.items:
+            start = time.perf_counter()
+            rebuild_item_quotes(items=Item.objects.filter(id__gte=self.items[0][0]))
+            self.log(f"item quotes rebuilt in {time.perf_counter() - start:.1f}s")
+
+        return counts
+
+    def seed_users(self, count: int) -> int:
+        """Create users with profiles, balances and watchlists"""
+
+        password = make_password(self.password)
+        last_id = _get_last_id(model=User)
+        first = User.objects.filter(username__startswith=f"{self.prefix}_").count()
+
+        created = self._create(
+            model=User,
+            objects=(
+                User(
+                    username=f"{self.prefix}_{number}",
+                    email=f"{self.prefix}_{number}@example.com",
+                    password=password,
+                )
+                for number in range(first, first + count)
+            ),
+        )
+        self.users = list(
+            User.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "username")
+        )
+
+        self._create(
+            model=UserProfile,
+            objects=(UserProfile(user_id=user_id) for user_id, _ in self.users),
+        )
+        self._create(
+            model=Balance,
+            objects=(
+                Balance(
+                    user_id=user_id,
+                    currency=self.currency,
+                    quantity=int(self.rand.lognormvariate(9, 1.5)),
+                )
+                for user_id, _ in self.users
+            ),
+        )
+        self._create(
+            model=WatchList,
+            objects=(WatchList(user_id=user_id) for user_id, _ in self.users),
+        )
+
+        return created
+
+    def seed_items(self, count: int, first_code: Optional[int] = None) -> int:
+        """
+        Create items, base prices of them are distributed log-normally.
+        Codes are the first letter of the prefix and a base36 number, which
+        continues after codes of all markets with the same letter
+        """
+
+        if first_code is None:
+            first_code = self.get_first_code_number(count=count)
+        last_id = _get_last_id(model=Item)
+        first = Item.objects.filter(name__startswith=f"{self.prefix} ").count()
+        letter = self.prefix[0].upper()
+
+        created = self._create(
+            model=Item,
+            objects=(
+                Item(
+                    code=f"{letter}{to_base36(first_code + number)}",
+                    name=f"{self.prefix} {first + number}",
+                )
+                for number in range(count)
+            ),
+        )
+        self.items = [
+            (item_id, code, min(self.rand.lognormvariate(3, 1), float(MAX_PRICE)))
+            for item_id, code in Item.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "code")
+        ]
+
+        return created
+
+    def get_first_code_number(self, count: int) -> int:
+        """
+        Return the number after the greatest code, which starts with the letter
+        of the prefix. Raise ValueError if codes of `count` items don't fit
+        """
+
+        letter = self.prefix[0].upper()
+        max_length = Item._meta.get_field("code").max_length
+        numbers = [
+            int(code[1:], 36)
+            for code in Item.objects.filter(code__istartswith=letter).values_list(
+                "code", flat=True
+            )
+            if 1 < len(code) <= max_length
+            and all(digit in BASE36_DIGITS for digit in code[1:].upper())
+        ]
+        first = max(numbers, default=-1) + 1
+
+        if count and len(letter + to_base36(first + count - 1)) > max_length:
+            raise ValueError(
+                f"Codes of {count} more items starting with {letter} "
+                f"don't fit into {max_length} characters"
+            )
+
+        return first
+
+    def seed_inventories(self) -> int:
+        """Give every user stocks of a few popular items"""
+
+        per_user = min(self.inventories_per_user, len(self.items))
+
+        def inventories():
+            for user_id, _ in self.users:
+                item_ids = {item[0] for item in self._choose_items(count=per_user * 2)}
+                for item_id in islice(item_ids, per_user):
+                    yield Inventory(
+                        user_id=user_id,
+                        item_id=item_id,
+                        quantity=int(self.rand.expovariate(1 / 500)),
+                    )
+
+        return self._create(model=Inventory, objects=inventories())
+
+    def seed_prices(self, count: int) -> int:
+        """Create price history of the last year around base prices of items"""
+
+        def prices():
+            for batch in self._in_batches(count=count):
+                for item_id, _, base in self._choose_items(count=batch):
+                    yield Price(
+                        item_id=item_id,
+                        currency=self.currency,
+                        price=self._get_price(base=base, spread=0.1),
+                        date=self._get_date(),
+                    )
+
+        return self._create(model=Price, objects=prices())
+
+    def seed_offers(self, count: int) -> int:
+        """
+        Create offers around base prices. Most of them are filled or cancelled,
+        active ones are partially filled sometimes. Active purchase offers are
+        cheaper than the base price and sell offers are dearer, so the seeded
+        book isn't crossed
+        """
+
+        def offers():
+            for batch in self._in_batches(count=count):
+                users = self._choose_users(count=batch)
+                for (item_id, _, base), (user_id, username) in zip(
+                    self._choose_items(count=batch), users
+                ):
+                    entry_quantity = int(self.rand.expovariate(1 / 20)) + 1
+                    is_active = self.rand.random() < self.active_share
+                    status = self.rand.choice(("PURCHASE", "SELL"))
+                    yield Offer(
+                        user_id=user_id,
+                        item_id=item_id,
+                        status=status,
+                        entry_quantity=entry_quantity,
+                        quantity=(
+                            self.rand.choice(
+                                (0, 0, 0, self.rand.randrange(entry_quantity))
+                            )
+                            if is_active
+                            else entry_quantity
+                        ),
+                        price=self._get_price(
+                            base=base,
+                            spread=0.02,
+                            side=(
+                                (-1 if status == "PURCHASE" else 1) if is_active else 0
+                            ),
+                        ),
+                        is_active=is_active,
+                        search_text=get_offer_search_text(username=username),
+                    )
+
+        return self._create(model=Offer, objects=offers())
+
+    def seed_trades(self, count: int) -> int:
+        """Create trades of the last year between different users"""
+
+        def trades():
+            for batch in self._in_batches(count=count):
+                sellers = self._choose_users(count=batch)
+                buyers = self._choose_users(count=batch)
+                for (item_id, code, base), seller, buyer in zip(
+                    self._choose_items(count=batch), sellers, buyers
+                ):
+                    while seller == buyer and len(self.users) > 1:
+                        buyer = self.rand.choice(self.users)
+                    yield Trade(
+                        item_id=item_id,
+                        seller_id=seller[0],
+                        buyer_id=buyer[0],
+                        quantity=int(self.rand.expovariate(1 / 10)) + 1,
+                        unit_price=self._get_price(base=base, spread=0.02),
+                        description=f"Trade between {seller[1]} and {buyer[1]}",
+                        date=self._get_date(),
+                        search_text=get_trade_search_text(
+                            item_code=code,
+                            seller_username=seller[1],
+                            buyer_username=buyer[1],
+                        ),
+                    )
+
+        with _keep_given_dates(model=Trade, field_name="date"):
+            return self._create(model=Trade, objects=trades())
+
+    def _create(self, model, objects: Iterable) -> int:
+        """
+        Insert objects in batches, each batch in its own transaction,
+        so memory doesn't grow with the number of rows
+        """
+
+        start = time.perf_counter()
+        objects = iter(objects)
+        created = 0
+
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            created += len(batch)
+
+        self.log(
+            f"{model._meta.verbose_name_plural}: {created} rows "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        return created
+
+    def _in_batches(self, count: int) -> Iterable[int]:
+        for start in range(0, count, self.batch_size):
+            yield min(self.batch_size, count - start)
+
+    def _choose_users(self, count: int) -> list:
+        return self._choose(population=self.users, count=count)
+
+    def _choose_items(self, count: int) -> list:
+        return self._choose(population=self.items, count=count)
+
+    def _choose(self, population: list, count: int) -> list:
+        """Choose with Zipf distribution by position in the population"""
+
+        if not population:
+            raise ValueError("Population to choose from is empty")
+
+        size = len(population)
+        if size not in self._cum_weights:
+            self._cum_weights[size] = list(
+                accumulate(1 / rank for rank in range(1, size + 1))
+            )
+
+        return self.rand.choices(
+            population, cum_weights=self._cum_weights[size], k=count
+        )
+
+    def _get_price(self, base: float, spread: float, side: int = 0) -> Decimal:
+        """Return price around the base one, below or above it if side is given"""
+
+        deviation = self.rand.gauss(0, spread)
+        if side:
+            deviation = side * abs(deviation)
+
+        price = Decimal(base * (1 + deviation))
+        return min(max(price, Decimal("0.01")), MAX_PRICE).quantize(Decimal("0.01"))
+
+    def _get_date(self):
+        return self.now - timezone.timedelta(
+            seconds=self.rand.randrange(HISTORY_DAYS * 24 * 60 * 60)
+        )
+
+
+@contextmanager
+def _keep_given_dates(model, field_name: str):
+    """Don't replace dates of seeded rows with the current time"""
+
+    field = model._meta.get_field(field_name)
+    auto_now_add = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = auto_now_add
+
+
+def _get_last_id(model) -> int:
+    return model.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def to_base36(number: int) -> str:
+    result = ""
+    while True:
+        number, digit = divmod(number, 36)
+        result = BASE36_DIGITS[digit] + result
+        if not number:
+            return result
@@ -0,0 +1,174 @@
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+
+from apps.trades.models import Balance, Inventory, Item, Offer, Trade
+from apps.trades.services.order_book_logic import Fill
+from apps.trades.services.tick_logic import (from_ticks, get_balance_changes,
+                                             to_ticks)
+
+
+def settle_fills(fills: List[Fill]) -> Tuple[List[Trade], Set[int]]:
+    """
+    Write fills of the in-memory book to the database in one transaction,
+    with the same result as create_trades_between_users: seller gets money
+    and stocks, buyer pays and gives stocks, balances are rounded down to
+    whole money units after every trade and empty offers are deactivated.
+    Offers are locked and checked first, fills of offers, which were cancelled
+    or changed after the book was loaded, are dropped. Return created trades
+    and ids of offers of the dropped fills, which book orders are stale
+    """
+
+    if not fills:
+        return [], set()
+
+    with transaction.atomic():
+        offers = _lock_offers(fills=fills)
+        fills, stale_offer_ids = _get_valid_fills(fills=fills, offers=offers)
+        trades = _create_trades(fills=fills)
+        _change_balances(fills=fills)
+        _change_inventories(fills=fills)
+        _change_offers(fills=fills, offers=offers)
+
+    return trades, stale_offer_ids
+
+
+def _lock_offers(fills: List[Fill]) -> Dict[int, Offer]:
+    """Lock offers of the fills in order of ids, so passes don't deadlock"""
+
+    offer_ids = {fill.sell_offer_id for fill in fills} | {
+        fill.purchase_offer_id for fill in fills
+    }
+    return {
+        offer.id: offer
+        for offer in Offer.objects.select_for_update()
+        .filter(id__in=offer_ids)
+        .order_by("id")
+    }
+
+
+def _get_valid_fills(
+    fills: List[Fill], offers: Dict[int, Offer]
+) -> Tuple[List[Fill], Set[int]]:
+    """
+    Keep fills, which offers are still active at the book's prices and have
+    the filled quantity left. Return them and ids of offers of the others
+    """
+
+    available = {
+        offer.id: offer.entry_quantity - offer.quantity for offer in offers.values()
+    }
+    valid = []
+    stale_offer_ids = set()
+
+    for fill in fills:
+        sell_offer = offers.get(fill.sell_offer_id)
+        purchase_offer = offers.get(fill.purchase_offer_id)
+        if (
+            sell_offer is None
+            or purchase_offer is None
+            or not _is_valid_side(offer=sell_offer, fill=fill, user_id=fill.seller_id)
+            or not _is_valid_side(
+                offer=purchase_offer, fill=fill, user_id=fill.buyer_id
+            )
+            or to_ticks(sell_offer.price) != fill.price_ticks
+            or to_ticks(purchase_offer.price) < fill.price_ticks
+            or available[sell_offer.id] < fill.quantity
+            or available[purchase_offer.id] < fill.quantity
+        ):
+            stale_offer_ids.update((fill.sell_offer_id, fill.purchase_offer_id))
+            continue
+
+        available[sell_offer.id] -= fill.quantity
+        available[purchase_offer.id] -= fill.quantity
+        valid.append(fill)
+
+    return valid, stale_offer_ids
+
+
+def _is_valid_side(offer: Offer, fill: Fill, user_id: int) -> bool:
+    return (
+        offer.is_active and offer.item_id == fill.item_id and offer.user_id == user_id
+    )
+
+
+def _create_trades(fills: List[Fill]) -> List[Trade]:
+    """Create trades one by one, so their signals update quotes and the feed"""
+
+    users = User.objects.in_bulk(
+        {fill.seller_id for fill in fills} | {fill.buyer_id for fill in fills}
+    )
+    items = Item.objects.in_bulk({fill.item_id for fill in fills})
+
+    return [
+        Trade.objects.create(
+            item=items[fill.item_id],
+            seller=users[fill.seller_id],
+            buyer=users[fill.buyer_id],
+            quantity=fill.quantity,
+            unit_price=from_ticks(fill.price_ticks),
+            description=(
+                f"Trade between {users[fill.seller_id].username} "
+                f"and {users[fill.buyer_id].username}"
+            ),
+            seller_offer_id=fill.sell_offer_id,
+            buyer_offer_id=fill.purchase_offer_id,
+        )
+        for fill in fills
+    ]
+
+
+def _change_balances(fills: List[Fill]) -> None:
+    """
+    Changes of every trade are rounded down to whole money units,
+    so they give the same result in any order of trades
+    """
+
+    changes = defaultdict(int)
+    for fill in fills:
+        seller_change, buyer_change = get_balance_changes(
+            price_ticks=fill.price_ticks, quantity=fill.quantity
+        )
+        changes[fill.seller_id] += seller_change
+        changes[fill.buyer_id] += buyer_change
+
+    for user_id, change in changes.items():
+        if change:
+            Balance.objects.filter(user_id=user_id).update(
+                quantity=F("quantity") + change
+            )
+
+
+def _change_inventories(fills: List[Fill]) -> None:
+    """New inventories start with the default quantity like get_or_create does"""
+
+    changes = defaultdict(int)
+    for fill in fills:
+        changes[(fill.seller_id, fill.item_id)] += fill.quantity
+        changes[(fill.buyer_id, fill.item_id)] -= fill.quantity
+
+    for (user_id, item_id), change in changes.items():
+        Inventory.objects.get_or_create(user_id=user_id, item_id=item_id)
+        if change:
+            Inventory.objects.filter(user_id=user_id, item_id=item_id).update(
+                quantity=F("quantity") + change
+            )
+
+
+def _change_offers(fills: List[Fill], offers: Dict[int, Offer]) -> None:
+    """Save filled offers, so their signals update quotes and the feed"""
+
+    filled = defaultdict(int)
+    for fill in fills:
+        filled[fill.sell_offer_id] += fill.quantity
+        filled[fill.purchase_offer_id] += fill.quantity
+
+    for offer_id, quantity in filled.items():
+        offer = offers[offer_id]
+        offer.quantity += quantity
+        if offer.entry_quantity == offer.quantity:
+            offer.is_active = False
+        offer.save()
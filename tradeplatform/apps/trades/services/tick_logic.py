@@ -0,0 +1,27 @@
+from decimal import Decimal
+
+# Prices are stored with 2 decimal places, so a tick is one cent
+TICKS_PER_UNIT = 100
+
+
+def to_ticks(price: Decimal) -> int:
+    """Convert price from the database into integer number of ticks"""
+
+    return int(price * TICKS_PER_UNIT)
+
+
+def from_ticks(ticks: int) -> Decimal:
+    """Convert number of ticks into price for the database"""
+
+    return Decimal(ticks).scaleb(-2)
+
+
+def get_balance_changes(price_ticks: int, quantity: int) -> tuple:
+    """
+    Return seller's and buyer's balance changes in whole money units.
+    Balances are integer, so both changes are rounded down like saving
+    the Decimal sum into the balance used to do
+    """
+
+    amount = price_ticks * quantity
+    return amount // TICKS_PER_UNIT, -amount // TICKS_PER_UNIT
@@ -1,16 +1,30 @@
+from typing import Optional
+
 from apps.trades.services.db_interaction import (
     change_offer_current_quantity, change_user_balance_by_id,
     change_user_inventory, create_trade, delete_offer_by_id,
     get_active_sell_offer_with_suitable_item, get_all_purchase_active_offers,
-    get_available_quantity_stocks, get_full_price,
-    get_item_id_related_to_offer, get_user_id_related_to_offer)
+    get_available_quantity_stocks, get_item_id_related_to_offer,
+    get_offer_by_id, get_user_id_related_to_offer)
+from apps.trades.services.lock_logic import Lease
+from apps.trades.services.metrics_logic import (MATCHING_PASS_SECONDS,
+                                                SETTLEMENT_QUERIES,
+                                                count_queries)
+from apps.trades.services.tick_logic import get_balance_changes, to_ticks
 
 
-def create_trades_between_users() -> None:
-    """Try to make trades with all purchase offers"""
+def create_trades_between_users(lease: Optional[Lease] = None) -> None:
+    """
+    Try to make trades with all purchase offers. The lease is extended
+    between offers and the pass stops before the next offer if it is lost
+    """
 
     for purchase_offer in get_all_purchase_active_offers():
-        _make_trades(offer_id=purchase_offer.id)
+        if lease is not None:
+            lease.keep_alive()
+
+        with MATCHING_PASS_SECONDS.time(item=purchase_offer.item_id):
+            _make_trades(offer_id=purchase_offer.id)
 
 
 def _change_user_balance_by_offer_id(offer_id: int, money_quantity: int) -> None:
@@ -56,13 +70,18 @@ def _create_trade(sell_offer_id: int, purchase_offer_id: int) -> None:
     final_quantity = _stocks_quantity_for_trade_by_given_offers(
         sell_offer_id=sell_offer_id, purchase_offer_id=purchase_offer_id
     )
-    full_price = get_full_price(sell_offer_id=sell_offer_id, quantity=final_quantity)
+    seller_change, buyer_change = get_balance_changes(
+        price_ticks=to_ticks(get_offer_by_id(offer_id=sell_offer_id).price),
+        quantity=final_quantity,
+    )
 
     _prepare_for_trade(
-        offer_id=sell_offer_id, money_quantity=full_price, quantity=final_quantity
+        offer_id=sell_offer_id, money_quantity=seller_change, quantity=final_quantity
     )
     _prepare_for_trade(
-        offer_id=purchase_offer_id, money_quantity=-full_price, quantity=-final_quantity
+        offer_id=purchase_offer_id,
+        money_quantity=buyer_change,
+        quantity=-final_quantity,
     )
 
     create_trade(
@@ -101,10 +120,14 @@ def _confirm_trade(sell_offer_id: int, purchase_offer_id: int) -> bool:
     Return true if user bought requested quantity of stocks
     """
 
-    _create_trade(sell_offer_id=sell_offer_id, purchase_offer_id=purchase_offer_id)
-    _delete_empty_offer(offer_id=sell_offer_id)
+    with count_queries() as queries:
+        _create_trade(sell_offer_id=sell_offer_id, purchase_offer_id=purchase_offer_id)
+        _delete_empty_offer(offer_id=sell_offer_id)
+        is_completed = _delete_empty_offer(offer_id=purchase_offer_id)
+
+    SETTLEMENT_QUERIES.observe(queries[0])
 
-    return _delete_empty_offer(offer_id=purchase_offer_id)
+    return is_completed
 
 
 def _make_trades(offer_id: int) -> None:
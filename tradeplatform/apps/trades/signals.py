@@ -0,0 +1,235 @@
+import time
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from apps.trades.models import Item, Offer, Price, Trade
+from apps.trades.services.feed_logic import (schedule_book_level,
+                                             schedule_offer_messages,
+                                             schedule_trade_message)
+from apps.trades.services.matcher_logic import schedule_matcher_notification
+from apps.trades.services.metrics_logic import (CELERY_TASK_DURATION_SECONDS,
+                                                CELERY_TASK_LATENCY_SECONDS,
+                                                OFFERS_CREATED, TRADES_SETTLED)
+from apps.trades.services.quote_logic import (BOOK_FIELDS, PRICE_FIELDS,
+                                              TRADE_FIELDS, create_item_quote,
+                                              refresh_item_quote)
+from apps.trades.services.search_logic import (create_search_indexes,
+                                               get_offer_search_text,
+                                               get_trade_search_text,
+                                               rebuild_item_search_text,
+                                               rebuild_user_search_text)
+
+
+@receiver(pre_save, sender=Offer)
+def fill_offer_search_text(sender, instance, **kwargs):
+    """Fill denormalized search column for the new offer"""
+
+    if instance._state.adding:
+        instance.search_text = get_offer_search_text(username=instance.user.username)
+
+
+@receiver(pre_save, sender=Trade)
+def fill_trade_search_text(sender, instance, **kwargs):
+    """Fill denormalized search column for the new trade"""
+
+    if instance._state.adding:
+        instance.search_text = get_trade_search_text(
+            item_code=instance.item.code if instance.item_id else None,
+            seller_username=instance.seller.username if instance.seller_id else None,
+            buyer_username=instance.buyer.username if instance.buyer_id else None,
+        )
+
+
+@receiver(pre_save, sender=User)
+def remember_saved_username(sender, instance, using, update_fields, **kwargs):
+    """Load the stored username, so search columns are rebuilt only when it changes"""
+
+    instance._saved_username = _get_saved_value(
+        instance=instance,
+        field_name="username",
+        using=using,
+        update_fields=update_fields,
+    )
+
+
+@receiver(post_save, sender=User)
+def update_user_search_text(sender, instance, created, **kwargs):
+    """Update search columns, which contain the username, after it's changed"""
+
+    if created or instance._saved_username in (None, instance.username):
+        return
+
+    rebuild_user_search_text(user_id=instance.id)
+
+
+@receiver(pre_save, sender=Item)
+def remember_saved_item_code(sender, instance, using, update_fields, **kwargs):
+    """Load the stored code, so search columns are rebuilt only when it changes"""
+
+    instance._saved_code = _get_saved_value(
+        instance=instance, field_name="code", using=using, update_fields=update_fields
+    )
+
+
+@receiver(post_save, sender=Item)
+def update_item_search_text(sender, instance, created, **kwargs):
+    """Update search columns, which contain the item code, after it's changed"""
+
+    if created or instance._saved_code in (None, instance.code):
+        return
+
+    rebuild_item_search_text(item_id=instance.id)
+
+
+def _get_saved_value(instance, field_name: str, using: str, update_fields):
+    """Return value of the field in the database or None, if it isn't saved"""
+
+    if instance._state.adding or (
+        update_fields is not None and field_name not in update_fields
+    ):
+        return None
+
+    return (
+        type(instance)
+        ._base_manager.using(using)
+        .filter(pk=instance.pk)
+        .values_list(field_name, flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Item)
+def create_new_item_quote(sender, instance, created, **kwargs):
+    """Every item has quote row, so quotes are read without outer joins"""
+
+    if created:
+        create_item_quote(item_id=instance.id)
+
+
+@receiver(post_save, sender=Price)
+@receiver(post_delete, sender=Price)
+def update_quote_price(sender, instance, **kwargs):
+    """Keep the latest price of the item's quote up to date"""
+
+    refresh_item_quote(
+        item_id=instance.item_id,
+        fields=PRICE_FIELDS,
+        create=kwargs["signal"] is post_save,
+    )
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def update_quote_best_prices(sender, instance, **kwargs):
+    """Keep the best bid and ask of the item's quote up to date"""
+
+    if instance.item_id is not None:
+        refresh_item_quote(
+            item_id=instance.item_id,
+            fields=BOOK_FIELDS,
+            create=kwargs["signal"] is post_save,
+        )
+
+
+@receiver(post_save, sender=Trade)
+def update_quote_last_trade(sender, instance, created, **kwargs):
+    """Keep the last trade of the item's quote up to date"""
+
+    if created and instance.item_id is not None:
+        refresh_item_quote(item_id=instance.item_id, fields=TRADE_FIELDS)
+
+
+@receiver(post_save, sender=Offer)
+def push_offer_changes(sender, instance, **kwargs):
+    """Push offer's acknowledgement and order book change to the live feed"""
+
+    schedule_offer_messages(offer=instance)
+
+
+@receiver(post_delete, sender=Offer)
+def push_deleted_offer(sender, instance, **kwargs):
+    """Push order book change after the offer is removed from the database"""
+
+    if instance.item_id is not None:
+        schedule_book_level(
+            item_id=instance.item_id, status=instance.status, price=instance.price
+        )
+
+
+@receiver(post_save, sender=Trade)
+def push_new_trade(sender, instance, created, **kwargs):
+    """Push settled trade to the live feed"""
+
+    if created:
+        schedule_trade_message(trade=instance)
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def notify_matcher(sender, instance, **kwargs):
+    """Let run_matcher refresh the offer in its in-memory book"""
+
+    schedule_matcher_notification(offer_id=instance.id)
+
+
+@receiver(post_save, sender=Offer)
+def count_new_offer(sender, instance, created, **kwargs):
+    """Count created offers for the metrics endpoint"""
+
+    if created:
+        OFFERS_CREATED.inc(status=instance.status)
+
+
+@receiver(post_save, sender=Trade)
+def count_new_trade(sender, instance, created, **kwargs):
+    """Count settled trades for the metrics endpoint"""
+
+    if created:
+        TRADES_SETTLED.inc()
+
+
+@before_task_publish.connect
+def mark_task_published(headers=None, **kwargs):
+    """Send publishing time with the task to measure its latency in the worker"""
+
+    if headers is not None:
+        headers["published_at"] = time.time()
+
+
+@task_prerun.connect
+def observe_task_latency(task=None, **kwargs):
+    """Observe time, which the task spent in the queue"""
+
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is not None:
+        CELERY_TASK_LATENCY_SECONDS.observe(
+            max(time.time() - published_at, 0), task=task.name
+        )
+
+    task.request.started_at = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task_duration(task=None, state=None, **kwargs):
+    """Observe duration of the finished task"""
+
+    started_at = getattr(task.request, "started_at", None)
+    if started_at is not None:
+        CELERY_TASK_DURATION_SECONDS.observe(
+            time.perf_counter() - started_at, task=task.name, state=state or "UNKNOWN"
+        )
+
+
+@receiver(post_migrate)
+def create_database_search_indexes(sender, using, **kwargs):
+    """Create database specific search indexes after trades app is migrated"""
+
+    if sender.label != "trades":
+        return
+
+    create_search_indexes(connection=connections[using])
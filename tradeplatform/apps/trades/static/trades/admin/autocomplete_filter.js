@@ -0,0 +1,16 @@
+'use strict';
+{
+    const $ = django.jQuery;
+
+    // Reload the changelist with the chosen object, like links of other filters do
+    $(document).on('change', '.trades-autocomplete-filter', function() {
+        const $select = $(this);
+        const value = $select.val();
+        let url = $select.data('query-string');
+        if (value) {
+            url += (url === '?' ? '' : '&') +
+                encodeURIComponent($select.data('lookup')) + '=' + encodeURIComponent(value);
+        }
+        window.location.href = url;
+    });
+}
@@ -1,10 +1,41 @@
 from celery import shared_task
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
 
+from apps.trades.services.archive_logic import archive_offers
+from apps.trades.services.lock_logic import acquire_lease
+from apps.trades.services.matcher_logic import MATCHING_LEASE
+from apps.trades.services.partition_logic import create_partitions
 from apps.trades.services.trader_logic import create_trades_between_users
 
 
 @shared_task()
 def start_trade():
-    """Start creating trades between users"""
+    """
+    Start creating trades between users, unless another pass
+    or run_matcher process is running
+    """
 
-    create_trades_between_users()
+    with acquire_lease(
+        name=MATCHING_LEASE, timeout=settings.START_TRADE_LEASE_TIMEOUT
+    ) as lease:
+        if lease is not None:
+            create_trades_between_users(lease=lease)
+
+
+@shared_task()
+def archive_old_offers():
+    """Move filled and cancelled offers, which are old enough, to the archive"""
+
+    return archive_offers(
+        older_than=timezone.timedelta(days=settings.OFFER_ARCHIVE_AFTER_DAYS),
+        batch_size=settings.OFFER_ARCHIVE_BATCH_SIZE,
+    )
+
+
+@shared_task()
+def create_future_partitions():
+    """Create partitions of Trade and Price tables for the next months"""
+
+    return create_partitions(connection=connection)
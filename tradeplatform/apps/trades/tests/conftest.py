@@ -1,5 +1,6 @@
 import pytest
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from mixer.backend.django import mixer
 
 from apps.trades.models import Balance, Currency, Item, Offer
@@ -12,6 +13,13 @@ def enable_db_access_for_all_tests(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Throttling buckets and cached principals mustn't leak between tests"""
+
+    cache.clear()
+
+
 @pytest.fixture()
 def user_instance():
     """User instance without balance"""
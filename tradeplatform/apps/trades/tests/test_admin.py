@@ -0,0 +1,115 @@
+import pytest
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from apps.trades.admin import OfferAdmin
+from apps.trades.customadmin import EstimatedCountPaginator
+from apps.trades.models import Offer
+
+
+@pytest.fixture()
+def offers(user_instances, item_instance):
+    """Five offers of two users, ids grow with creation"""
+
+    return [
+        mixer.blend(
+            Offer,
+            user=user_instances[number % 2],
+            item=item_instance,
+            status="SELL",
+            price=number + 1,
+            entry_quantity=5,
+            quantity=5,
+        )
+        for number in range(5)
+    ]
+
+
+@pytest.fixture()
+def small_pages(monkeypatch):
+    monkeypatch.setattr(OfferAdmin, "list_per_page", 2)
+
+
+def get_changelist(client, **params):
+    return client.get(reverse("admin:trades_offer_changelist"), params)
+
+
+def test_keyset_paging(admin_client, offers, small_pages):
+    """Ensure that pages are linked by the last id and the newest offers are first"""
+
+    response = get_changelist(admin_client)
+    cl = response.context["cl"]
+
+    assert cl.is_keyset
+    assert [offer.id for offer in cl.result_list] == [offers[4].id, offers[3].id]
+    assert cl.next_page_url == f"?after={offers[3].id}"
+
+    response = get_changelist(admin_client, after=offers[1].id)
+    cl = response.context["cl"]
+
+    assert [offer.id for offer in cl.result_list] == [offers[0].id]
+    assert cl.next_cursor is None
+    assert b"First page" in response.content
+
+
+def test_keyset_paging_with_filter(admin_client, offers, user_instances, small_pages):
+    """Ensure that the autocomplete filter shows the chosen user and keeps paging"""
+
+    user = user_instances[0]
+    response = get_changelist(admin_client, user__id__exact=user.id)
+    cl = response.context["cl"]
+
+    assert [offer.id for offer in cl.result_list] == [offers[4].id, offers[2].id]
+    assert cl.result_count == 3
+    assert cl.next_page_url == f"?after={offers[2].id}&user__id__exact={user.id}"
+    assert reverse("admin:auth_user_autocomplete").encode() in response.content
+    assert f'<option value="{user.id}" selected>{user}</option>'.encode() in (
+        response.content
+    )
+
+
+def test_other_ordering_uses_page_numbers(admin_client, offers, small_pages):
+    """Ensure that sorting by a column falls back to the default paging"""
+
+    response = get_changelist(admin_client, o="5")
+    cl = response.context["cl"]
+
+    assert not cl.is_keyset
+    assert cl.multi_page
+    assert [offer.price for offer in cl.result_list] == [1, 2]
+
+
+def test_changelist_queries_do_not_grow_with_rows(
+    admin_client, offers, django_assert_max_num_queries
+):
+    """Ensure that users and items of the page are joined"""
+
+    with django_assert_max_num_queries(8):
+        get_changelist(admin_client)
+
+
+def test_estimated_count_is_limited(offers):
+    """Ensure that rows are counted only up to the limit"""
+
+    paginator = EstimatedCountPaginator(Offer.objects.order_by("-id"), 2)
+    paginator.count_limit = 3
+
+    assert paginator.count == 4
+    assert paginator.is_estimated
+
+    paginator = EstimatedCountPaginator(Offer.objects.order_by("-id"), 2)
+
+    assert paginator.count == 5
+    assert not paginator.is_estimated
+
+
+@pytest.mark.parametrize(
+    "model_name", ("trade", "price", "balance", "inventory", "offerarchive")
+)
+def test_large_table_changelists(admin_client, offer_instances, model_name):
+    """Ensure that changelists of other large tables render with keyset paging"""
+
+    response = admin_client.get(reverse(f"admin:trades_{model_name}_changelist"))
+
+    assert response.status_code == 200
+    assert response.context["cl"].is_keyset
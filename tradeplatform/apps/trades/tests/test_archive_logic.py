@@ -0,0 +1,185 @@
+from unittest import mock
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+from rest_framework.test import APIClient
+
+from apps.trades.models import Offer, OfferArchive, Trade
+from apps.trades.services.archive_logic import archive_offers
+
+OLDER_THAN = timezone.timedelta(days=30)
+
+
+def make_old(offers) -> None:
+    """Move last change of the offers before the archival threshold"""
+
+    Offer.objects.filter(id__in=[offer.id for offer in offers]).update(
+        updated_at=timezone.now() - timezone.timedelta(days=31)
+    )
+
+
+def create_offers(user, item, count: int, is_active: bool = False) -> list:
+    return [
+        mixer.blend(
+            Offer,
+            user=user,
+            item=item,
+            status="SELL",
+            price=10,
+            entry_quantity=5,
+            quantity=5,
+            is_active=is_active,
+        )
+        for _ in range(count)
+    ]
+
+
+def test_archive_only_old_inactive_offers(user_instance, item_instance):
+    """Ensure that active and recently changed offers stay in the hot table"""
+
+    old_inactive = create_offers(user=user_instance, item=item_instance, count=2)
+    old_active = create_offers(
+        user=user_instance, item=item_instance, count=1, is_active=True
+    )
+    recent_inactive = create_offers(user=user_instance, item=item_instance, count=1)
+    make_old(offers=old_inactive + old_active)
+
+    assert archive_offers(older_than=OLDER_THAN) == 2
+
+    assert set(Offer.objects.values_list("id", flat=True)) == {
+        old_active[0].id,
+        recent_inactive[0].id,
+    }
+    archived = OfferArchive.objects.get(id=old_inactive[0].id)
+    assert (archived.user_id, archived.item_id, archived.price) == (
+        user_instance.id,
+        item_instance.id,
+        old_inactive[0].price,
+    )
+    assert archived.updated_at < timezone.now() - OLDER_THAN
+
+
+def test_archive_in_batches_with_limit(user_instance, item_instance):
+    """Ensure that the limit is kept, when it isn't divisible by the batch size"""
+
+    offers = create_offers(user=user_instance, item=item_instance, count=5)
+    make_old(offers=offers)
+
+    assert archive_offers(older_than=OLDER_THAN, batch_size=2, limit=3) == 3
+    assert sorted(OfferArchive.objects.values_list("id", flat=True)) == [
+        offer.id for offer in offers[:3]
+    ]
+
+    assert archive_offers(older_than=OLDER_THAN, batch_size=2) == 2
+    assert not Offer.objects.exists()
+
+
+def test_trades_keep_ids_of_archived_offers(user_instances, item_instance):
+    """Ensure that trades still refer to offers after archival"""
+
+    seller_offer, buyer_offer = (
+        create_offers(user=user, item=item_instance, count=1)[0]
+        for user in user_instances[:2]
+    )
+    trade = Trade.objects.create(
+        item=item_instance,
+        seller=user_instances[0],
+        buyer=user_instances[1],
+        quantity=5,
+        unit_price=10,
+        seller_offer=seller_offer,
+        buyer_offer=buyer_offer,
+    )
+    make_old(offers=[seller_offer, buyer_offer])
+
+    archive_offers(older_than=OLDER_THAN)
+
+    trade = Trade.objects.get(id=trade.id)
+    assert (trade.seller_offer_id, trade.buyer_offer_id) == (
+        seller_offer.id,
+        buyer_offer.id,
+    )
+    assert (
+        OfferArchive.objects.filter(
+            id__in=(trade.seller_offer_id, trade.buyer_offer_id)
+        ).count()
+        == 2
+    )
+
+
+def test_deleted_offers_are_unlinked_from_trades(user_instances, item_instance):
+    """Ensure that trades don't refer to offers deleted with their user"""
+
+    seller_offer, buyer_offer = (
+        create_offers(user=user, item=item_instance, count=1)[0]
+        for user in user_instances[:2]
+    )
+    trade = Trade.objects.create(
+        item=item_instance,
+        seller=user_instances[0],
+        buyer=user_instances[1],
+        quantity=5,
+        unit_price=10,
+        seller_offer=seller_offer,
+        buyer_offer=buyer_offer,
+    )
+
+    user_instances[0].delete()
+
+    trade = Trade.objects.get(id=trade.id)
+    assert trade.seller_id is None
+    assert trade.seller_offer_id is None
+    assert trade.buyer_offer_id == buyer_offer.id
+
+
+def test_archive_does_not_send_offer_signals(user_instance, item_instance):
+    """Ensure that quotes and the feed don't get removal of closed offers"""
+
+    make_old(offers=create_offers(user=user_instance, item=item_instance, count=2))
+
+    with mock.patch(
+        "apps.trades.signals.refresh_item_quote"
+    ) as refresh_item_quote, mock.patch(
+        "apps.trades.signals.schedule_book_level"
+    ) as schedule_book_level:
+        archive_offers(older_than=OLDER_THAN)
+
+    refresh_item_quote.assert_not_called()
+    schedule_book_level.assert_not_called()
+
+
+def test_api_reads_archive_only_when_asked(user_instance, item_instance):
+    """Ensure that archived offers are listed with archived=true and retrieved by id"""
+
+    archived, kept = create_offers(user=user_instance, item=item_instance, count=2)
+    make_old(offers=[archived])
+    archive_offers(older_than=OLDER_THAN)
+
+    client = APIClient()
+    client.force_authenticate(user=user_instance)
+
+    response = client.get(reverse("offer-list"))
+    assert [offer["id"] for offer in response.data["results"]] == [kept.id]
+
+    response = client.get(reverse("offer-list"), {"archived": "true"})
+    assert [offer["id"] for offer in response.data["results"]] == [archived.id]
+
+    response = client.get(reverse("offer-detail", args=(archived.id,)))
+    assert response.status_code == 200
+    assert response.data["id"] == archived.id
+
+    response = client.delete(reverse("offer-detail", args=(archived.id,)))
+    assert response.status_code == 404
+
+
+def test_archive_offers_command(user_instance, item_instance):
+    """Ensure that the command moves old offers with the given limit"""
+
+    make_old(offers=create_offers(user=user_instance, item=item_instance, count=3))
+
+    call_command("archive_offers", "--days", "30", "--limit", "2", stdout=mock.Mock())
+
+    assert OfferArchive.objects.count() == 2
+    assert Offer.objects.count() == 1
@@ -0,0 +1,126 @@
+import os
+
+from apps.trades.models import Offer
+from apps.trades.services.book_storage_logic import (JOURNAL_FILE, BookJournal,
+                                                     is_consistent, load_books,
+                                                     write_snapshot)
+from apps.trades.services.matcher_logic import Matcher
+from apps.trades.services.order_book_logic import load_order_books
+
+
+def get_state(books) -> dict:
+    """Return orders of the books as comparable tuples"""
+
+    return {
+        order.id: (
+            order.user_id,
+            order.item_id,
+            order.status,
+            order.price_ticks,
+            order.entry_quantity,
+            order.quantity,
+        )
+        for book in books.books.values()
+        for order in book.orders.values()
+    }
+
+
+def test_snapshot_and_journal_restore_books(tmp_path, offer_instances):
+    """Ensure that snapshot with replayed journal gives the same books"""
+
+    books = load_order_books()
+    journal = BookJournal(path=os.path.join(tmp_path, JOURNAL_FILE))
+    write_snapshot(books=books, directory=tmp_path, sequence=journal.sequence)
+    books.journal = journal
+
+    books.match(item_id=offer_instances[0].item_id)
+    books.remove(order_id=offer_instances[1].id)
+    journal.close()
+
+    restored, sequence = load_books(directory=tmp_path)
+
+    assert sequence == journal.sequence
+    assert get_state(restored) == get_state(books)
+
+
+def test_partially_written_journal_record_is_ignored(tmp_path, offer_instances):
+    """Ensure that the record interrupted by crash doesn't break restoring"""
+
+    books = load_order_books()
+    write_snapshot(books=books, directory=tmp_path, sequence=0)
+    journal = BookJournal(path=os.path.join(tmp_path, JOURNAL_FILE))
+    journal.remove(order_id=offer_instances[1].id)
+    journal.remove(order_id=offer_instances[2].id)
+    journal.close()
+
+    with open(os.path.join(tmp_path, JOURNAL_FILE), "r+b") as file:
+        file.truncate(os.path.getsize(file.name) - 1)
+
+    restored, sequence = load_books(directory=tmp_path)
+
+    assert sequence == 1
+    assert offer_instances[1].id not in get_state(restored)
+    assert offer_instances[2].id in get_state(restored)
+
+
+def test_consistency_with_database(offer_instances):
+    """Ensure that fills missing in the books are detected"""
+
+    books = load_order_books()
+    assert is_consistent(books=books)
+
+    Offer.objects.filter(id=offer_instances[2].id).update(quantity=7)
+    assert not is_consistent(books=books)
+
+
+def test_consistency_checks_price_and_side(offer_instances):
+    """Ensure that changes, which keep the number and quantities, are detected"""
+
+    books = load_order_books()
+    offer = offer_instances[2]
+
+    Offer.objects.filter(id=offer.id).update(price=offer.price + 1)
+    assert not is_consistent(books=books)
+
+    Offer.objects.filter(id=offer.id).update(
+        price=offer.price,
+        status="SELL" if offer.status == "PURCHASE" else "PURCHASE",
+    )
+    assert not is_consistent(books=books)
+
+
+def test_matcher_restores_books_without_loading_offers(
+    tmp_path, offer_instances, django_assert_num_queries
+):
+    """Ensure that restarted matcher reads offers from the snapshot"""
+
+    matcher = Matcher(queue=None, storage_dir=str(tmp_path))
+    matcher._settle(items=matcher._restore())
+    matcher._close_storage()
+    state = get_state(matcher.books)
+
+    restarted = Matcher(queue=None, storage_dir=str(tmp_path))
+    with django_assert_num_queries(1):
+        restarted._restore()
+
+    assert state and get_state(restarted.books) == state
+
+
+def test_matcher_reloads_books_behind_database(tmp_path, offer_instances):
+    """Ensure that fills, which didn't reach the journal, are loaded from the database"""
+
+    matcher = Matcher(queue=None, storage_dir=str(tmp_path))
+    matcher._restore()
+    matcher._close_storage()
+
+    Offer.objects.filter(id=offer_instances[2].id).update(quantity=7)
+
+    restarted = Matcher(queue=None, storage_dir=str(tmp_path))
+    restarted._restore()
+
+    assert (
+        restarted.books.books[offer_instances[2].item_id]
+        .orders[offer_instances[2].id]
+        .quantity
+        == 7
+    )
@@ -0,0 +1,144 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F, Max, Min
+from django.utils import timezone
+
+from apps.registration.models import UserProfile
+from apps.trades.models import (Balance, Item, ItemQuote, Offer, Price, Trade,
+                                WatchList)
+
+
+def get_index_names() -> set:
+    with connection.cursor() as cursor:
+        return {
+            (model._meta.db_table, name)
+            for model in (Offer, Trade, Price)
+            for name, info in connection.introspection.get_constraints(
+                cursor, model._meta.db_table
+            ).items()
+            if info["index"]
+        }
+
+
+def test_benchmark_queries(transactional_db):
+    """Ensure that benchmark runs both phases, keeps indexes and rolls back matching"""
+
+    output = StringIO()
+    options = dict(users=10, items=3, prices=20, offers=60, trades=30, repeat=1)
+    with connection.schema_editor() as schema_editor:
+        schema_editor.remove_index(Trade, Trade._meta.indexes[0])
+    indexes = get_index_names()
+
+    call_command("benchmark_queries", force=True, stdout=output, **options)
+
+    assert "=== without indexes ===" in output.getvalue()
+    assert "=== with indexes ===" in output.getvalue()
+    assert "matching pass" in output.getvalue()
+    assert Offer.objects.count() == 60
+    assert Trade.objects.count() == 30
+    assert get_index_names() == indexes
+
+    call_command("benchmark_queries", force=True, seed=7, stdout=StringIO(), **options)
+
+    assert Item.objects.filter(name__startswith="Bench item ").count() == 6
+    assert get_index_names() == indexes
+
+    with connection.schema_editor() as schema_editor:
+        schema_editor.add_index(Trade, Trade._meta.indexes[0])
+
+
+def test_benchmark_queries_requires_force(db):
+    """Ensure that the configured database isn't changed without confirmation"""
+
+    with pytest.raises(CommandError):
+        call_command("benchmark_queries", stdout=StringIO())
+
+    assert not Item.objects.filter(name__startswith="Bench item ").exists()
+
+
+def test_benchmark_books(transactional_db):
+    """Ensure that benchmark measures both loaders and removes seeded offers"""
+
+    output = StringIO()
+
+    call_command("benchmark_books", offers=50, users=3, items=2, stdout=output)
+
+    assert "model instances" in output.getvalue()
+    assert "book orders" in output.getvalue()
+    assert "Peak RSS" in output.getvalue()
+    assert not Offer.objects.exists()
+
+
+def test_seed_market(db):
+    """Ensure that seeded rows have everything, which signals create for new rows"""
+
+    output = StringIO()
+    options = dict(users=20, items=4, prices=50, offers=100, trades=60, batch_size=7)
+
+    call_command("seed_market", stdout=output, **options)
+
+    users = User.objects.filter(username__startswith="seed_")
+    assert users.count() == 20
+    assert Balance.objects.filter(user__in=users).count() == 20
+    assert UserProfile.objects.filter(user__in=users).count() == 20
+    assert WatchList.objects.filter(user__in=users).count() == 20
+    assert ItemQuote.objects.filter(item__name__startswith="seed ").count() == 4
+    assert Price.objects.count() == 50
+    assert not Offer.objects.filter(search_text="").exists()
+    assert not Trade.objects.filter(search_text="").exists()
+    assert not Trade.objects.filter(seller=F("buyer")).exists()
+    assert Trade.objects.filter(date__lt=timezone.now() - timedelta(days=1)).exists()
+
+    for item in Item.objects.filter(name__startswith="seed "):
+        best_bid = (
+            Offer.objects.purchase_offers()
+            .filter(item=item)
+            .aggregate(price=Max("price"))["price"]
+        )
+        best_ask = (
+            Offer.objects.sell_offers()
+            .filter(item=item)
+            .aggregate(price=Min("price"))["price"]
+        )
+        assert best_bid is None or best_ask is None or best_bid <= best_ask
+
+    prices = list(Offer.objects.order_by("id").values_list("price", flat=True))
+    call_command("seed_market", prefix="again", stdout=StringIO(), **options)
+    assert (
+        list(Offer.objects.order_by("id").values_list("price", flat=True)[100:])
+        == prices
+    )
+
+
+def test_seed_markets_with_the_same_letter(db):
+    """Ensure that item codes of prefixes with the same first letter don't collide"""
+
+    options = dict(users=3, items=40, prices=5, offers=5, trades=5)
+    Item.objects.create(code="S1", name="Existing")
+
+    call_command("seed_market", prefix="seed", stdout=StringIO(), **options)
+    call_command("seed_market", prefix="stress", stdout=StringIO(), **options)
+
+    codes = list(
+        Item.objects.filter(name__regex=r"^(seed|stress) ").values_list(
+            "code", flat=True
+        )
+    )
+    assert len(set(codes)) == 80
+    assert all(code.startswith("S") and len(code) <= 8 for code in codes)
+    assert "S1" not in codes
+    assert Item.objects.filter(name__startswith="stress ").count() == 40
+
+
+def test_seed_market_rejects_prefix(db):
+    """Ensure that nothing is created with a prefix, which can't form codes"""
+
+    with pytest.raises(CommandError):
+        call_command("seed_market", prefix="bad prefix", stdout=StringIO())
+
+    assert not User.objects.filter(username__startswith="bad").exists()
@@ -18,6 +18,17 @@ def test_get_all_purchase_active_offers(offer_purchase_instance, offer_sell_inst
     assert offers[0] == offer_purchase_instance
 
 
+def test_get_all_purchase_active_offers_in_order_of_creation(offer_instances):
+    """Ensure that cheaper purchase offers don't come before older ones"""
+
+    Offer.objects.filter(id=offer_instances[0].id).update(price=99)
+
+    offers = get_all_purchase_active_offers()
+
+    assert offers[0].id == offer_instances[0].id
+    assert [offer.id for offer in offers] == sorted(offer.id for offer in offers)
+
+
 def test_get_offer_by_id(offer_purchase_instance):
     """Ensure that function return right offer instance"""
 
@@ -79,7 +90,8 @@ def test_get_active_sell_offer_with_suitable_item(offer_instances):
 
     assert offers.count() == 3
     assert offers.first() == offer_instances[3]
-    assert offers.last() == offer_instances[5]
+    assert list(offers)[1] == offer_instances[5]
+    assert offers.last() == offer_instances[6]
 
 
 def test_get_available_quantity_stocks(offer_purchase_instance):
@@ -1,12 +1,17 @@
 from decimal import Decimal
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
 from django.urls import reverse
-from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework import serializers, status, viewsets
+from rest_framework.test import APIRequestFactory, APITestCase
 
-from apps.trades.models import (Balance, Currency, Inventory, Item, Offer,
-                                Price, Trade, WatchList)
+from apps.trades import customviews
+from apps.trades.models import (Balance, Currency, Inventory, Item, ItemQuote,
+                                Offer, Price, Trade, WatchList)
 
 
 class TestCurrency(APITestCase):
@@ -721,6 +726,62 @@ class TestPrice(APITestCase):
         assert response.data["price"][0]["id"] == price_1["id"]
         assert response.data["price"][1]["id"] == price_2["id"]
 
+    def test_latest_price_representation_item(self):
+        """
+        Ensure that item contains its latest price without the price history
+        """
+
+        self.post_price(
+            {
+                "currency": self.currency_1.id,
+                "item": self.item_2.id,
+                "price": Decimal("10"),
+                "date": "2020-12-23T13:05:00Z",
+            }
+        )
+        self.post_price(
+            {
+                "currency": self.currency_2.id,
+                "item": self.item_2.id,
+                "price": Decimal("20"),
+                "date": "2020-12-23T10:05:00Z",
+            }
+        )
+
+        url = reverse("item-detail", None, {self.item_2.id})
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {"expand": "latest_price"}, format="json")
+
+        assert "price" not in response.data
+        assert response.data["latest_price"] == {
+            "price": "10.00",
+            "currency": "USD",
+            "date": "2020-12-23T13:05:00Z",
+        }
+
+    def test_items_filter_by_latest_price(self):
+        """
+        Ensure that items are filtered and ordered by their latest prices
+        """
+
+        for item, price in ((self.item_1, "5"), (self.item_2, "15")):
+            self.post_price(
+                {
+                    "currency": self.currency_1.id,
+                    "item": item.id,
+                    "price": Decimal(price),
+                }
+            )
+
+        url = reverse("item-list")
+        response = self.client.get(url, {"min_price": 10}, format="json")
+
+        assert [item["code"] for item in response.data["results"]] == ["AMZN"]
+
+        response = self.client.get(url, {"ordering": "-quote__price"}, format="json")
+
+        assert [item["code"] for item in response.data["results"]] == ["AMZN", "AAPL"]
+
     def test_check_permission_list_non_authenticated(self):
         """
         Ensure that unauthenticated users can't make GET request on price list
@@ -936,6 +997,49 @@ class TestWatchlist(APITestCase):
         assert response.data["item"][1] == new_data["item"][1]
         assert response.data["item"][2] == new_data["item"][2]
 
+    def test_watchlist_quotes(self):
+        """
+        Ensure we can get quotes of the watched items with one query for all items
+        """
+
+        watchlist = WatchList.objects.get(user=self.user_1)
+        watchlist.item.set([self.item_1, self.item_2])
+
+        currency = Currency.objects.get(code="USD")
+        Price.objects.create(item=self.item_2, currency=currency, price=Decimal("10"))
+        Offer.objects.create(
+            user=self.user_2,
+            item=self.item_2,
+            status="SELL",
+            entry_quantity=1,
+            price=Decimal("11"),
+        )
+        Offer.objects.create(
+            user=self.user_2,
+            item=self.item_2,
+            status="PURCHASE",
+            entry_quantity=1,
+            price=Decimal("9"),
+        )
+        Trade.objects.create(item=self.item_2, quantity=2, unit_price=Decimal("10.5"))
+
+        url = reverse("watchlist-quotes", None, {watchlist.id})
+        with self.assertNumQueries(4):
+            response = self.client.get(url, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [quote["code"] for quote in response.data] == ["AAPL", "AMZN"]
+
+        assert response.data[0]["price"] == "10.00"
+        assert response.data[0]["currency"] == "USD"
+        assert response.data[0]["best_bid"] == "9.00"
+        assert response.data[0]["best_ask"] == "11.00"
+        assert response.data[0]["last_trade_price"] == "10.50"
+        assert response.data[0]["last_trade_quantity"] == 2
+
+        assert response.data[1]["price"] is None
+        assert response.data[1]["best_ask"] is None
+
     def test_permission_list(self):
         """Check that unauthorized users can't make request to view the collection of watchlists"""
 
@@ -1107,6 +1211,102 @@ class TestOffer(APITestCase):
         assert response.data["results"][1]["price"] == data_offer_2["price"].__str__()
         assert response.data["results"][1]["is_active"] == False
 
+    def test_offers_list_sparse_fields(self):
+        """
+        Ensure we can retrieve only requested fields of the offers collection
+        """
+
+        data = {
+            "item": self.item_1.id,
+            "status": "PURCHASE",
+            "entry_quantity": 6,
+            "price": Decimal("100.00"),
+        }
+        self.post_offer(data)
+
+        url = reverse("offer-list")
+        response = self.client.get(
+            url, {"fields": "id,price,user.username"}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data["results"][0]) == {"id", "price", "user"}
+        assert response.data["results"][0]["user"] == {"username": self.user_1.username}
+        assert response.data["results"][0]["price"] == data["price"].__str__()
+
+    def test_offers_search_by_username(self):
+        """
+        Ensure we can search offers by part of username in any case
+        """
+
+        user_2 = User.objects.create_user(username="another_trader", password="test")
+        Offer.objects.create(
+            item=self.item_1,
+            user=user_2,
+            status="SELL",
+            entry_quantity=3,
+            price=Decimal("10.00"),
+        )
+        self.post_offer(
+            {
+                "item": self.item_2.id,
+                "status": "PURCHASE",
+                "entry_quantity": 6,
+                "price": Decimal("100.00"),
+            }
+        )
+
+        url = reverse("offer-list")
+        response = self.client.get(url, {"search": "TRADER"}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 1
+        assert response.data["results"][0]["user"]["username"] == user_2.username
+
+    def test_offers_list_expand(self):
+        """
+        Ensure nested serializers, which are not expanded, are skipped
+        """
+
+        data = {
+            "item": self.item_1.id,
+            "status": "PURCHASE",
+            "entry_quantity": 6,
+            "price": Decimal("100.00"),
+        }
+        self.post_offer(data)
+
+        url = reverse("offer-list")
+        response = self.client.get(url, {"expand": "item"}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "user" not in response.data["results"][0]
+        assert response.data["results"][0]["item"]["id"] == data["item"]
+        assert "price" not in response.data["results"][0]["item"]
+        assert response.data["results"][0]["status"] == data["status"]
+
+    def test_offers_list_without_nested_serializers_queries(self):
+        """
+        Ensure skipped nested serializers don't make additional queries
+        """
+
+        for price in ("100.00", "101.00", "102.00"):
+            data = {
+                "item": self.item_1.id,
+                "status": "PURCHASE",
+                "entry_quantity": 6,
+                "price": Decimal(price),
+            }
+            self.post_offer(data)
+
+        url = reverse("offer-list")
+
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {"expand": ""}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 3
+
     def test_offer_get(self):
         """
         Ensure we can get a single offer by id
@@ -1801,3 +2001,357 @@ class TestTrade(APITestCase):
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert str(response.data["detail"]) == error_message
+
+
+class TestFastListSerialization(APITestCase):
+    """Test class for list endpoints, which are built from QuerySet.values()"""
+
+    def setUp(self):
+        """Initialize trades, balances and inventories with nested data"""
+
+        self.user_1 = User.objects.create_user(username="test_user", password="test")
+        self.user_2 = User.objects.create_user(username="test_user2", password="test")
+        self.client.login(username="test_user", password="test")
+
+        currency = Currency.objects.get(code="USD")
+        self.item_1 = Item.objects.create(
+            code="AAPL", name="Apple", details="Stocks of Apple\u2028Inc."
+        )
+        self.item_2 = Item.objects.create(code="AMZN", name="Амазон")
+        ItemQuote.objects.filter(item=self.item_2).delete()
+
+        Price.objects.create(item=self.item_1, currency=currency, price=Decimal("1.1"))
+        Price.objects.create(
+            item=self.item_1, currency=currency, price=Decimal("12.25"), date=None
+        )
+
+        purchase_offer = Offer.objects.create(
+            item=self.item_1,
+            user=self.user_1,
+            status="PURCHASE",
+            entry_quantity=10,
+            price=Decimal("123.12"),
+        )
+        sell_offer = Offer.objects.create(
+            item=self.item_1,
+            user=self.user_2,
+            status="SELL",
+            entry_quantity=10,
+            price=Decimal("120.00"),
+        )
+
+        Trade.objects.create(
+            item=self.item_1,
+            seller=self.user_2,
+            buyer=self.user_1,
+            quantity=10,
+            unit_price=Decimal("120"),
+            description="Trade between two users",
+            buyer_offer=purchase_offer,
+            seller_offer=sell_offer,
+        )
+        Trade.objects.create(item=None, quantity=3, unit_price=Decimal("7.5"))
+
+        Inventory.objects.create(user=self.user_1, item=self.item_1, quantity=5)
+        Inventory.objects.create(user=self.user_2, item=self.item_2, quantity=7)
+        Inventory.objects.create(user=None, item=None, quantity=1)
+
+    def assert_same_response(self, url_name, params=None):
+        """Ensure that the fast path returns the same JSON as the serializer"""
+
+        url = reverse(url_name)
+
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            expected = self.client.get(url, params, format="json")
+        with override_settings(FAST_LIST_SERIALIZATION=True):
+            response = self.client.get(url, params, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == expected.content
+
+    def test_trades_list(self):
+        """
+        Ensure the trades collection is the same for both serialization paths
+        """
+
+        self.assert_same_response("trade-list")
+        self.assert_same_response("trade-list", {"ordering": "-unit_price"})
+        self.assert_same_response("trade-list", {"item__code": "AAPL"})
+
+    def test_balances_list(self):
+        """
+        Ensure the balances collection is the same for both serialization paths
+        """
+
+        self.assert_same_response("balance-list")
+        self.assert_same_response("balance-list", {"search": "test_user2"})
+
+    def test_inventories_list(self):
+        """
+        Ensure the inventories collection is the same for both serialization paths
+        """
+
+        self.assert_same_response("inventory-list")
+        self.assert_same_response("inventory-list", {"limit": 2, "offset": 1})
+
+    def test_plan_is_compiled_once(self):
+        """
+        Ensure that the plan is reused and links are built for each request's host
+        """
+
+        customviews._list_plans.clear()
+        url = reverse("trade-list")
+
+        with mock.patch(
+            "apps.trades.customviews.ListPlan", wraps=customviews.ListPlan
+        ) as list_plan:
+            first = self.client.get(url, format="json")
+            second = self.client.get(url, format="json", HTTP_HOST="127.0.0.1")
+
+        assert list_plan.call_count == 1
+        assert first.data["results"][0]["buyer_offer"].startswith("http://testserver/")
+        assert second.data["results"][0]["buyer_offer"].startswith("http://127.0.0.1/")
+
+    def test_fallback_for_fields_without_values(self):
+        """
+        Ensure that serializers, which can't be compiled, are listed as usual
+        """
+
+        class CurrencyNameSerializer(serializers.ModelSerializer):
+            lower_code = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Currency
+                fields = ("id", "lower_code")
+
+            def get_lower_code(self, obj):
+                return obj.code.lower()
+
+        class CurrencyNameViewSet(
+            customviews.FastListMixin, viewsets.ReadOnlyModelViewSet
+        ):
+            queryset = Currency.objects.filter(code="USD")
+            serializer_class = CurrencyNameSerializer
+            pagination_class = None
+            permission_classes = ()
+
+        view = CurrencyNameViewSet.as_view({"get": "list"})
+        response = view(APIRequestFactory().get("/"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [currency["lower_code"] for currency in response.data] == ["usd"]
+        assert (
+            customviews._list_plans[(CurrencyNameViewSet, CurrencyNameSerializer)]
+            is None
+        )
+
+
+class TestMarketData(APITestCase):
+    """Test class for async market data endpoints"""
+
+    def setUp(self):
+        """Initialize offers, prices and trades of one item"""
+
+        self.user_1 = User.objects.create_user(username="test_user", password="test")
+        self.user_2 = User.objects.create_user(username="test_user2", password="test")
+        self.client.login(username="test_user", password="test")
+
+        currency = Currency.objects.get(code="USD")
+        self.item = Item.objects.create(code="AAPL", name="Apple")
+        Item.objects.create(code="AMZN", name="Amazon")
+
+        Price.objects.create(item=self.item, currency=currency, price=Decimal("10.5"))
+
+        for user, status_, price, quantity in (
+            (self.user_1, "SELL", "11", 5),
+            (self.user_2, "SELL", "11", 3),
+            (self.user_2, "SELL", "12", 1),
+            (self.user_1, "PURCHASE", "9", 4),
+        ):
+            Offer.objects.create(
+                item=self.item,
+                user=user,
+                status=status_,
+                entry_quantity=quantity,
+                price=Decimal(price),
+            )
+
+        self.trade = Trade.objects.create(
+            item=self.item,
+            seller=self.user_1,
+            buyer=self.user_2,
+            quantity=2,
+            unit_price=Decimal("10"),
+        )
+
+    def test_order_book_depth(self):
+        """Ensure that offers are aggregated by price level, best first"""
+
+        url = reverse("market-depth", None, {self.item.id})
+        response = self.client.get(url, {"levels": 1})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "item": self.item.id,
+            "bids": [{"price": "9.00", "quantity": 4, "offers": 1}],
+            "asks": [{"price": "11.00", "quantity": 8, "offers": 2}],
+        }
+
+    def test_latest_prices(self):
+        """Ensure that every item is returned with its latest price"""
+
+        response = self.client.get(reverse("market-prices"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [(row["code"], row["price"]) for row in response.json()] == [
+            ("AAPL", "10.50"),
+            ("AMZN", None),
+        ]
+
+    def test_recent_trades(self):
+        """Ensure that trades of the item are returned"""
+
+        url = reverse("market-trades", None, {self.item.id})
+        response = self.client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()[0]["id"] == self.trade.id
+        assert response.json()[0]["seller"] == "test_user"
+        assert response.json()[0]["unit_price"] == "10.00"
+
+    def test_item_statistics(self):
+        """Ensure that statistics endpoint returns statistics of the item"""
+
+        url = reverse("market-statistics", None, {self.item.id})
+        response = self.client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_unauthenticated_request(self):
+        """Ensure that anonymous users can't get market data"""
+
+        self.client.logout()
+        response = self.client.get(reverse("market-prices"))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestThrottling(APITestCase):
+    """Test class for token bucket throttles"""
+
+    rates = {"reads": "3/min", "offer_create": "2/min", "statistics": "1/min"}
+
+    def setUp(self):
+        """Log in user and use small budgets"""
+
+        User.objects.create_user(username="test_user", password="test")
+        self.client.login(username="test_user", password="test")
+        self.item = Item.objects.create(code="AAPL", name="Apple")
+
+        cache.clear()
+        settings_override = override_settings(
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_RATES": self.rates,
+            }
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def post_offer(self):
+        """Post offer through web-api"""
+
+        data = {
+            "item": self.item.id,
+            "status": "PURCHASE",
+            "entry_quantity": 1,
+            "price": Decimal("1"),
+        }
+        return self.client.post(reverse("offer-list"), data, format="json")
+
+    def test_offer_create_budget(self):
+        """
+        Ensure that offers creation is throttled separately from reading offers
+        """
+
+        assert self.post_offer().status_code == status.HTTP_201_CREATED
+        assert self.post_offer().status_code == status.HTTP_201_CREATED
+
+        response = self.post_offer()
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response["Retry-After"] == "30"
+        assert Offer.objects.count() == 2
+
+        response = self.client.get(reverse("offer-list"), format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_statistics_budget(self):
+        """
+        Ensure that statistics has its own budget
+        """
+
+        url = reverse("statistic-detail", None, {self.item.id})
+
+        assert self.client.get(url).status_code == status.HTTP_200_OK
+        assert self.client.get(url).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert self.client.get(reverse("item-list")).status_code == status.HTTP_200_OK
+
+    def test_async_statistics_budget(self):
+        """
+        Ensure that async statistics shares the budget of statistics view
+        """
+
+        url = reverse("market-statistics", None, {self.item.id})
+
+        assert self.client.get(url).status_code == status.HTTP_200_OK
+
+        response = self.client.get(url)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert "Retry-After" in response
+        assert (
+            self.client.get(
+                reverse("statistic-detail", None, {self.item.id})
+            ).status_code
+            == status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        assert (
+            self.client.get(reverse("market-prices")).status_code == status.HTTP_200_OK
+        )
+
+    def test_bucket_refill(self):
+        """
+        Ensure that tokens are returned to the bucket over time
+        """
+
+        url = reverse("item-list")
+
+        with mock.patch("apps.trades.customthrottles.time.time", return_value=1000):
+            for _ in range(3):
+                assert self.client.get(url).status_code == status.HTTP_200_OK
+
+            response = self.client.get(url)
+
+            assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+            assert response["Retry-After"] == "20"
+
+        with mock.patch("apps.trades.customthrottles.time.time", return_value=1020):
+            assert self.client.get(url).status_code == status.HTTP_200_OK
+            assert self.client.get(url).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_async_market_data_budget(self):
+        """
+        Ensure that async market data endpoints share the reads budget
+        """
+
+        url = reverse("market-prices")
+
+        for _ in range(3):
+            assert self.client.get(url).status_code == status.HTTP_200_OK
+
+        response = self.client.get(url)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert "Retry-After" in response
@@ -0,0 +1,262 @@
+import asyncio
+import json
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.trades.consumers import FEED_PATH, feed_application
+from apps.trades.models import Offer, Trade
+from apps.trades.services.feed_logic import (InMemoryFeedBackend, Subscription,
+                                             get_feed_backend,
+                                             get_item_channel,
+                                             get_user_channel, publish,
+                                             publish_book_level, publish_trade)
+
+
+@pytest.fixture(autouse=True)
+def feed_backend(settings):
+    """The feed is disabled by default"""
+
+    settings.FEED_BACKEND = "apps.trades.services.feed_logic.InMemoryFeedBackend"
+
+
+def test_in_memory_backend_fan_out():
+    """Ensure that messages are delivered only to subscribers of the channel"""
+
+    async def scenario():
+        backend = InMemoryFeedBackend()
+        item_subscription = backend.subscribe(channels=["feed:item:1"])
+        both_subscription = backend.subscribe(channels=["feed:item:1", "feed:user:1"])
+        other_subscription = backend.subscribe(channels=["feed:item:2"])
+
+        backend.publish(channel="feed:item:1", data="first")
+        assert await item_subscription.get() == "first"
+        assert await both_subscription.get() == "first"
+
+        both_subscription.close()
+        backend.publish(channel="feed:user:1", data="second")
+        await asyncio.sleep(0)
+
+        assert both_subscription.queue.empty()
+        assert other_subscription.queue.empty()
+
+    async_to_sync(scenario)()
+
+
+def test_slow_subscription_drops_oldest_messages():
+    """Ensure that the queue of slow client doesn't grow over the limit"""
+
+    async def scenario():
+        subscription = Subscription(
+            backend=InMemoryFeedBackend(), channels=["feed:item:1"], maxsize=2
+        )
+        for data in ("first", "second", "third"):
+            subscription._put(data)
+
+        assert [await subscription.get(), await subscription.get()] == [
+            "second",
+            "third",
+        ]
+
+    async_to_sync(scenario)()
+
+
+def test_publish_trade(user_instances, item_instance):
+    """Ensure that trade is pushed to the item's channel and users' channels"""
+
+    trade = Trade.objects.create(
+        item=item_instance,
+        seller=user_instances[0],
+        buyer=user_instances[1],
+        quantity=3,
+        unit_price=Decimal("10.50"),
+    )
+
+    async def scenario():
+        subscriptions = [
+            get_feed_backend().subscribe(channels=[channel])
+            for channel in (
+                get_item_channel(item_id=item_instance.id),
+                get_user_channel(user_id=user_instances[0].id),
+                get_user_channel(user_id=user_instances[1].id),
+            )
+        ]
+
+        publish_trade(trade=trade)
+
+        messages = [json.loads(await item.get()) for item in subscriptions]
+        for subscription in subscriptions:
+            subscription.close()
+
+        return messages
+
+    messages = async_to_sync(scenario)()
+
+    assert [message["channel"] for message in messages] == [
+        f"item:{item_instance.id}",
+        f"user:{user_instances[0].id}",
+        f"user:{user_instances[1].id}",
+    ]
+    assert messages[0]["event"] == "trade"
+    assert messages[0]["data"]["id"] == trade.id
+    assert messages[0]["data"]["unit_price"] == "10.50"
+
+
+def test_offer_messages_after_commit(transactional_db, user_instance, item_instance):
+    """Ensure that the new offer is acknowledged and its price level is pushed"""
+
+    async def scenario():
+        subscription = get_feed_backend().subscribe(
+            channels=[
+                get_item_channel(item_id=item_instance.id),
+                get_user_channel(user_id=user_instance.id),
+            ]
+        )
+
+        offer = await sync_to_async(Offer.objects.create)(
+            user=user_instance,
+            item=item_instance,
+            status="SELL",
+            entry_quantity=5,
+            price=Decimal("12"),
+        )
+
+        messages = {}
+        for _ in range(2):
+            message = json.loads(await subscription.get())
+            messages[message["event"]] = message["data"]
+        subscription.close()
+
+        return offer, messages
+
+    offer, messages = async_to_sync(scenario)()
+
+    assert messages["offer"]["id"] == offer.id
+    assert messages["offer"]["is_active"] is True
+    assert messages["book"] == {
+        "item": item_instance.id,
+        "side": "asks",
+        "price": "12.00",
+        "quantity": 5,
+        "offers": 1,
+    }
+
+
+def test_book_level_without_subscribers(item_instance, django_assert_num_queries):
+    """Ensure that the price level isn't aggregated, when nobody watches the item"""
+
+    subscription_of_other_item = get_feed_backend().subscribe(
+        channels=[get_item_channel(item_id=item_instance.id + 1)]
+    )
+
+    with django_assert_num_queries(0):
+        publish_book_level(item_id=item_instance.id, status="SELL", price=Decimal("12"))
+
+    assert subscription_of_other_item.queue.empty()
+
+
+def get_scope(scope_type: str, query_string: str = "", headers=()) -> dict:
+    """Return ASGI connection scope of the live feed"""
+
+    return {
+        "type": scope_type,
+        "path": FEED_PATH,
+        "query_string": query_string.encode(),
+        "headers": list(headers),
+    }
+
+
+async def communicate(scope: dict, channel: str = None) -> list:
+    """
+    Connect to the live feed, publish message to the channel after
+    the connection is accepted and return everything sent by the application
+    """
+
+    incoming = asyncio.Queue()
+    sent = []
+    delivered = asyncio.Event()
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] in ("websocket.accept", "http.response.start"):
+            if message.get("status", 200) == 200:
+                publish(channels=[channel], event="test", data={"value": 1})
+        elif message["type"] in ("websocket.send", "websocket.close"):
+            delivered.set()
+        elif message["type"] == "http.response.body":
+            delivered.set()
+
+    if scope["type"] == "websocket":
+        incoming.put_nowait({"type": "websocket.connect"})
+
+    application = asyncio.ensure_future(feed_application(scope, incoming.get, send))
+    await asyncio.wait_for(delivered.wait(), timeout=5)
+
+    incoming.put_nowait(
+        {
+            "type": (
+                "websocket.disconnect"
+                if scope["type"] == "websocket"
+                else "http.disconnect"
+            )
+        }
+    )
+    await asyncio.wait_for(application, timeout=5)
+
+    return sent
+
+
+def test_websocket_feed(user_instance, item_instance):
+    """Ensure that WebSocket client receives messages of subscribed item"""
+
+    token = AccessToken.for_user(user_instance)
+    scope = get_scope(
+        "websocket", query_string=f"items={item_instance.id}&user=1&token={token}"
+    )
+
+    sent = async_to_sync(communicate)(
+        scope, channel=get_item_channel(item_id=item_instance.id)
+    )
+
+    assert sent[0] == {"type": "websocket.accept"}
+    assert json.loads(sent[1]["text"]) == {
+        "event": "test",
+        "channel": f"item:{item_instance.id}",
+        "data": {"value": 1},
+    }
+
+
+def test_event_stream_feed(user_instance):
+    """Ensure that Server-Sent Events client receives messages of its user"""
+
+    token = AccessToken.for_user(user_instance)
+    scope = get_scope(
+        "http",
+        query_string="user=1",
+        headers=[(b"authorization", f"JWT {token}".encode())],
+    )
+
+    sent = async_to_sync(communicate)(
+        scope, channel=get_user_channel(user_id=user_instance.id)
+    )
+
+    assert sent[0]["status"] == 200
+    assert (b"content-type", b"text/event-stream") in sent[0]["headers"]
+    assert sent[1]["body"].startswith(b'data: {"event": "test"')
+    assert sent[1]["more_body"] is True
+
+
+def test_feed_without_token(item_instance):
+    """Ensure that anonymous clients are rejected"""
+
+    sent = async_to_sync(communicate)(
+        get_scope("websocket", query_string=f"items={item_instance.id}")
+    )
+    assert sent == [{"type": "websocket.close", "code": 4401}]
+
+    sent = async_to_sync(communicate)(
+        get_scope("http", query_string=f"items={item_instance.id}&token=wrong")
+    )
+    assert sent[0]["status"] == 401
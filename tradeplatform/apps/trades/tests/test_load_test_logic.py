@@ -0,0 +1,101 @@
+import asyncio
+
+from django.contrib.auth.models import User
+
+from apps.trades.models import Offer
+from apps.trades.services.load_test_logic import (_build_request, run_journeys,
+                                                  summarize)
+
+
+def test_summarize_percentiles():
+    """Ensure that percentiles are calculated with the nearest rank method"""
+
+    summary = summarize(latencies=[i / 1000 for i in range(100, 0, -1)], elapsed=2)
+
+    assert summary["count"] == 100
+    assert summary["rps"] == 50
+    assert round(summary["p50"]) == 50
+    assert round(summary["p95"]) == 95
+    assert round(summary["p99"]) == 99
+    assert round(summary["max"]) == 100
+
+
+def test_summarize_without_latencies():
+    """Ensure that empty results don't raise errors"""
+
+    assert summarize(latencies=[], elapsed=0)["count"] == 0
+
+
+def test_build_request():
+    """Ensure that request contains path prefix of the base url and headers"""
+
+    request = _build_request(
+        base_url="http://localhost:8000/prefix/",
+        path="/api/v1/market/prices/",
+        headers={"Authorization": "JWT token"},
+    )
+
+    assert request == (
+        b"GET /prefix/api/v1/market/prices/ HTTP/1.0\r\n"
+        b"Host: localhost:8000\r\n"
+        b"Authorization: JWT token\r\n\r\n"
+    )
+
+
+def test_build_request_with_body():
+    """Ensure that JSON body is sent with its type and length"""
+
+    request = _build_request(
+        base_url="http://localhost:8000",
+        path="/api/token/",
+        method="POST",
+        body=b'{"a": 1}',
+    )
+
+    assert request == (
+        b"POST /api/token/ HTTP/1.0\r\n"
+        b"Host: localhost:8000\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: 8\r\n\r\n"
+        b'{"a": 1}'
+    )
+
+
+def test_run_journeys(live_server, item_instances):
+    """Ensure that journeys log in, post offers and record every endpoint"""
+
+    for number in range(2):
+        User.objects.create_user(username=f"journey_{number}", password="journey")
+
+    result = asyncio.run(
+        run_journeys(
+            base_url=live_server.url,
+            users=[("journey_0", "journey"), ("journey_1", "journey")],
+            iterations=2,
+        )
+    )
+
+    assert not result["errors"]
+    assert {
+        name: len(latencies) for name, latencies in result["latencies"].items()
+    } == {
+        "POST /api/token/": 2,
+        "GET /api/v1/items/": 4,
+        "POST /api/v1/offers/": 4,
+        "GET /api/v1/trades/": 8,
+        "GET /api/v1/statistics/{item}/": 4,
+    }
+    assert Offer.objects.count() == 4
+
+
+def test_run_journeys_records_errors(live_server):
+    """Ensure that failed login is counted as error of the endpoint"""
+
+    result = asyncio.run(
+        run_journeys(
+            base_url=live_server.url, users=[("nobody", "wrong")], iterations=1
+        )
+    )
+
+    assert result["errors"]["POST /api/token/"] == {401: 1}
+    assert not result["latencies"]
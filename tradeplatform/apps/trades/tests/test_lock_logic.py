@@ -0,0 +1,74 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+
+from apps.trades.models import TaskLease, Trade
+from apps.trades.services.lock_logic import (DatabaseLockBackend, Lease,
+                                             LeaseLost, acquire_lease)
+from apps.trades.services.metrics_logic import render_metrics
+from apps.trades.tasks import start_trade
+
+
+def test_database_lease_is_exclusive():
+    """Ensure that only one owner holds the lease until it is released"""
+
+    backend = DatabaseLockBackend()
+
+    assert backend.acquire(name="task", token="first", timeout=60)
+    assert not backend.acquire(name="task", token="second", timeout=60)
+
+    backend.release(name="task", token="second")
+    assert not backend.acquire(name="task", token="second", timeout=60)
+
+    backend.release(name="task", token="first")
+    assert backend.acquire(name="task", token="second", timeout=60)
+
+
+def test_expired_database_lease_is_taken_over():
+    """Ensure that expired lease is taken by another worker and can't be extended"""
+
+    backend = DatabaseLockBackend()
+    TaskLease.objects.create(
+        name="task", owner="first", expires_at=timezone.now() - timedelta(seconds=1)
+    )
+
+    assert backend.acquire(name="task", token="second", timeout=60)
+    assert not backend.extend(name="task", token="first", timeout=60)
+    assert backend.extend(name="task", token="second", timeout=60)
+
+
+def test_lost_lease_stops_keep_alive():
+    """Ensure that the holder finds out that its lease was taken over"""
+
+    backend = DatabaseLockBackend()
+    backend.acquire(name="task", token="first", timeout=60)
+    lease = Lease(backend=backend, name="task", token="first", timeout=60)
+    TaskLease.objects.filter(name="task").update(owner="second")
+
+    lease.keep_alive()
+
+    with mock.patch("apps.trades.services.lock_logic.time.monotonic") as monotonic:
+        monotonic.return_value = lease._extended_at + 30
+        with pytest.raises(LeaseLost):
+            lease.keep_alive()
+
+
+def test_overlapping_run_is_skipped(offer_instances):
+    """Ensure that start_trade doesn't match offers while another pass holds the lease"""
+
+    with acquire_lease(name="start_trade", timeout=60) as lease:
+        assert lease is not None
+        start_trade()
+
+        assert not Trade.objects.exists()
+
+    start_trade()
+
+    metrics = render_metrics()
+
+    assert Trade.objects.exists()
+    assert not TaskLease.objects.exists()
+    assert 'task_lease_skipped_total{name="start_trade"}' in metrics
+    assert 'task_lease_held_seconds_count{name="start_trade"}' in metrics
@@ -0,0 +1,141 @@
+import json
+import time
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from apps.trades.models import Balance, Inventory, Offer, Trade
+from apps.trades.services.db_interaction import delete_offer_by_id
+from apps.trades.services.matcher_logic import Matcher, serve_health
+from apps.trades.services.order_book_logic import load_order_books
+from apps.trades.services.settlement_logic import settle_fills
+
+
+def test_book_matches_like_legacy_pass(offer_instances):
+    """Ensure that the best sell offers of other users are taken at the seller's price"""
+
+    books = load_order_books()
+    item_id = offer_instances[0].item_id
+
+    fills = books.match(item_id=item_id)
+
+    assert [
+        (fill.purchase_offer_id, fill.sell_offer_id, fill.quantity) for fill in fills
+    ] == [
+        (offer_instances[0].id, offer_instances[3].id, 7),
+        (offer_instances[0].id, offer_instances[5].id, 30),
+        (offer_instances[7].id, offer_instances[8].id, 36),
+        (offer_instances[7].id, offer_instances[5].id, 1),
+    ]
+    assert offer_instances[3].id not in books.books[item_id].orders
+    assert offer_instances[0].id not in books.books[item_id].orders
+
+
+def test_matcher_settles_fills(offer_instances, user_instances):
+    """Ensure that the matcher writes trades, balances, inventories and offers"""
+
+    buyer = user_instances[0]
+    buyer_balance = Balance.objects.get(user=buyer).quantity
+
+    matcher = Matcher(queue=None, poll_timeout=0)
+    matcher._resync()
+
+    assert matcher.run_once() == 4
+
+    trade = Trade.objects.get(
+        buyer_offer=offer_instances[0], seller_offer_id=offer_instances[3].id
+    )
+    assert trade.quantity == 7
+    assert trade.unit_price == 7
+    # The buyer also sells 36 stocks to the third user
+    assert (
+        Balance.objects.get(user=buyer).quantity
+        == buyer_balance - 7 * 7 - 8 * 30 + 5 * 36
+    )
+    assert (
+        Inventory.objects.get(user=buyer, item=offer_instances[0].item).quantity
+        == 1000 - 37 + 36
+    )
+    assert not Offer.objects.get(id=offer_instances[0].id).is_active
+    assert Offer.objects.get(id=offer_instances[5].id).quantity == 7 + 31
+
+    assert matcher.run_once() == 0
+
+
+def test_refresh_changed_offer(offer_instances):
+    """Ensure that deactivated offer is removed from the book and new one is added"""
+
+    books = load_order_books()
+    Offer.objects.filter(id=offer_instances[3].id).update(is_active=False)
+    new_offer = Offer.objects.create(
+        user=offer_instances[0].user,
+        item=offer_instances[1].item,
+        status="PURCHASE",
+        entry_quantity=1,
+        price=60,
+    )
+
+    items = books.refresh(offer_ids=[offer_instances[3].id, new_offer.id])
+
+    assert items == {offer_instances[0].item_id, offer_instances[1].item_id}
+    assert offer_instances[3].id not in books.books[offer_instances[0].item_id].orders
+    assert [
+        (fill.purchase_offer_id, fill.sell_offer_id)
+        for fill in books.match(item_id=offer_instances[1].item_id)
+    ] == [(new_offer.id, offer_instances[1].id)]
+
+
+def test_health_endpoint():
+    """Ensure that health endpoint reports the state of the loop"""
+
+    matcher = Matcher(queue=None)
+    server = serve_health(matcher=matcher, port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/health"
+
+    try:
+        with pytest.raises(HTTPError) as error:
+            urlopen(url)
+        assert error.value.code == 503
+
+        matcher.last_loop_at = time.monotonic()
+        health = json.loads(urlopen(url).read())
+    finally:
+        server.shutdown()
+
+    assert health["healthy"] is True
+    assert health["orders"] == 0
+
+
+def test_fills_of_offer_cancelled_after_loading_are_dropped(offer_instances):
+    """Ensure that the book doesn't fill an offer, which was cancelled meanwhile"""
+
+    cancelled = offer_instances[3]
+    quantity = cancelled.quantity
+    books = load_order_books()
+    delete_offer_by_id(offer_id=cancelled.id)
+
+    fills = books.match(item_id=cancelled.item_id)
+    trades, stale_offer_ids = settle_fills(fills=fills)
+
+    cancelled.refresh_from_db()
+    assert not cancelled.is_active
+    assert cancelled.quantity == quantity
+    assert not Trade.objects.filter(seller_offer_id=cancelled.id).exists()
+    assert {cancelled.id, offer_instances[0].id} <= stale_offer_ids
+    assert len(trades) == len(fills) - 1
+
+
+def test_matcher_rematches_after_dropped_fills(offer_instances):
+    """Ensure that the matcher reloads stale orders and matches the book again"""
+
+    cancelled = offer_instances[3]
+    matcher = Matcher(queue=None, poll_timeout=0)
+    matcher._resync()
+    delete_offer_by_id(offer_id=cancelled.id)
+
+    matcher._match(item_id=cancelled.item_id)
+
+    assert not Trade.objects.filter(seller_offer_id=cancelled.id).exists()
+    assert Trade.objects.filter(buyer_offer_id=offer_instances[0].id).exists()
+    assert cancelled.id not in matcher.books.books.get(cancelled.item_id).orders
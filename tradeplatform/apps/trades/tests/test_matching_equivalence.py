@@ -0,0 +1,101 @@
+import random
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from apps.trades.models import Balance, Inventory, Item, Offer, Trade
+from apps.trades.services.replay_logic import ENGINES, LegacyEngine
+
+EXAMPLES = 60
+
+# Few price levels with odd cents, so books have ties and balances are rounded
+PRICE_LEVELS = [Decimal(ticks).scaleb(-2) for ticks in (99, 101, 150, 333, 1001)]
+
+
+def create_random_book(rand: random.Random) -> None:
+    """
+    Create users, items and offers, some of them partially filled, exhausted,
+    inactive or of the same user on both sides
+    """
+
+    users = [
+        User.objects.create(username=f"equivalence_{number}")
+        for number in range(rand.randint(1, 4))
+    ]
+    items = [
+        Item.objects.create(code=f"EQ{number}", name=f"Equivalence {number}")
+        for number in range(rand.randint(1, 3))
+    ]
+
+    Balance.objects.filter(user__in=users).update(quantity=10**6)
+    Inventory.objects.bulk_create(
+        Inventory(user=user, item=item, quantity=10**6)
+        for user in users
+        for item in items
+    )
+
+    for _ in range(rand.randint(0, 30)):
+        entry_quantity = rand.randint(1, 20)
+        Offer.objects.create(
+            user=rand.choice(users),
+            item=rand.choice(items),
+            status=rand.choice(("PURCHASE", "SELL")),
+            entry_quantity=entry_quantity,
+            quantity=rand.choice((0, 0, rand.randint(0, entry_quantity))),
+            price=rand.choice(PRICE_LEVELS),
+            is_active=rand.random() < 0.9,
+        )
+
+
+def run_engine(engine_name: str) -> dict:
+    """Run the engine over the book and return the state, the run is rolled back"""
+
+    with transaction.atomic():
+        engine = ENGINES[engine_name]()
+        engine.load()
+        engine.match()
+        state = get_state()
+        transaction.set_rollback(True)
+
+    return state
+
+
+def get_state() -> dict:
+    """Return trades, balances, inventories and offers, trades are sorted"""
+
+    return {
+        "trades": sorted(
+            Trade.objects.values_list(
+                "seller_offer_id", "buyer_offer_id", "quantity", "unit_price"
+            )
+        ),
+        "balances": dict(Balance.objects.values_list("user_id", "quantity")),
+        "inventories": {
+            (user_id, item_id): quantity
+            for user_id, item_id, quantity in Inventory.objects.values_list(
+                "user_id", "item_id", "quantity"
+            )
+        },
+        "offers": {
+            offer_id: (quantity, is_active)
+            for offer_id, quantity, is_active in Offer.objects.values_list(
+                "id", "quantity", "is_active"
+            )
+        },
+    }
+
+
+@pytest.mark.parametrize("seed", range(EXAMPLES))
+@pytest.mark.parametrize("engine_name", sorted(set(ENGINES) - {LegacyEngine.name}))
+def test_engine_is_equivalent_to_legacy_pass(db, engine_name, seed):
+    """Ensure that the engine makes the same changes as create_trades_between_users"""
+
+    create_random_book(rand=random.Random(seed))
+
+    expected = run_engine(engine_name=LegacyEngine.name)
+    state = run_engine(engine_name=engine_name)
+
+    for part in ("trades", "balances", "inventories", "offers"):
+        assert state[part] == expected[part], f"{part} differ for seed {seed}"
@@ -0,0 +1,140 @@
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from apps.trades.models import Trade
+from apps.trades.services.metrics_logic import (Counter, Histogram,
+                                                RedisMetricsBackend,
+                                                get_metrics_backend,
+                                                render_metrics)
+from apps.trades.services.trader_logic import create_trades_between_users
+
+
+class FailingMetricsBackend:
+    """Backend, which lost connection to its storage"""
+
+    def increment(self, name, samples):
+        raise ConnectionError("Metrics storage is unavailable")
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    """Samples of the in-memory backend mustn't leak between tests"""
+
+    get_metrics_backend().clear()
+
+
+def test_render_counter_and_histogram():
+    """Ensure that samples are rendered in Prometheus text format"""
+
+    counter = Counter(
+        "test_events_total", "Events", labelnames=("kind",), registry=None
+    )
+    histogram = Histogram(
+        "test_duration_seconds", "Duration", buckets=(0.1, 1), registry=None
+    )
+
+    counter.inc(kind='a"b')
+    counter.inc(2, kind='a"b')
+    histogram.observe(0.5)
+    histogram.observe(0.05)
+
+    assert render_metrics(metrics=[counter, histogram]).splitlines() == [
+        "# HELP test_events_total Events",
+        "# TYPE test_events_total counter",
+        'test_events_total{kind="a\\"b"} 3',
+        "# HELP test_duration_seconds Duration",
+        "# TYPE test_duration_seconds histogram",
+        'test_duration_seconds_bucket{le="+Inf"} 2',
+        'test_duration_seconds_bucket{le="0.1"} 1',
+        'test_duration_seconds_bucket{le="1"} 2',
+        "test_duration_seconds_count 2",
+        "test_duration_seconds_sum 0.55",
+    ]
+
+
+def test_labels_are_required():
+    """Ensure that samples with missing labels are rejected"""
+
+    counter = Counter(
+        "test_labeled_total", "Events", labelnames=("kind",), registry=None
+    )
+
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+def test_matching_metrics(offer_instances):
+    """Ensure that matching pass, settled trades and settlement queries are measured"""
+
+    create_trades_between_users()
+    metrics = render_metrics()
+
+    assert "trades_settled_total 4" in metrics
+    assert "trades_settlement_queries_count 4" in metrics
+    assert (
+        f'trades_matching_pass_seconds_count{{item="{offer_instances[0].item_id}"}}'
+        in metrics
+    )
+
+
+def test_metrics_endpoint(client, user_instance):
+    """Ensure that requests are counted per route"""
+
+    client.force_login(user_instance)
+    client.get(reverse("offer-list"))
+
+    response = client.get(reverse("metrics"))
+    metrics = response.content.decode()
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'http_requests_total{route="offer-list",method="GET",status="200"} 1' in metrics
+    )
+    assert (
+        'http_request_duration_seconds_count{route="offer-list",method="GET"} 1'
+        in metrics
+    )
+
+
+@override_settings(METRICS_TOKEN="secret")
+def test_metrics_endpoint_token(client):
+    """Ensure that metrics are hidden without the configured token"""
+
+    assert client.get(reverse("metrics")).status_code == 401
+    assert (
+        client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret").status_code
+        == 200
+    )
+
+
+@override_settings(
+    METRICS_BACKEND="apps.trades.tests.test_metrics_logic.FailingMetricsBackend"
+)
+def test_failing_backend_breaks_nothing(client, user_instance, offer_instances, caplog):
+    """Ensure that requests and settlement succeed, when samples can't be stored"""
+
+    client.force_login(user_instance)
+    response = client.get(reverse("offer-list"))
+    create_trades_between_users()
+
+    assert response.status_code == 200
+    assert Trade.objects.exists()
+    assert "Unable to increment metric trades_settled_total" in caplog.text
+
+
+@override_settings(METRICS_REDIS_TIMEOUT=0.1)
+def test_unavailable_redis_is_not_waited_for():
+    """Ensure that Redis is retried only after a pause, not on every sample"""
+
+    backend = RedisMetricsBackend(url="redis://127.0.0.1:1/0")
+    connection_kwargs = backend._client.connection_pool.connection_kwargs
+
+    with pytest.raises(Exception):
+        backend.increment(name="test_total", samples={"test_total": 1})
+    backend.increment(name="test_total", samples={"test_total": 1})
+
+    assert connection_kwargs["socket_timeout"] == 0.1
+    assert connection_kwargs["socket_connect_timeout"] == 0.1
+    assert backend._retry_at > 0
@@ -0,0 +1,165 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from apps.trades.models import Price, Trade
+from apps.trades.services.partition_logic import (add_months,
+                                                  create_partitions,
+                                                  get_month_ranges,
+                                                  get_partition_name,
+                                                  is_partitioned,
+                                                  partition_tables)
+
+UTC = datetime.timezone.utc
+
+
+class RecordingCursor:
+    """Cursor of a fake PostgreSQL connection, which answers catalog queries"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params=None):
+        self.connection.executed.append((sql, params))
+        if sql.startswith("SELECT relkind"):
+            self.row = ("p",)
+        elif sql.startswith("SELECT to_regclass"):
+            self.row = (params[0] in self.connection.existing,)
+
+    def fetchone(self):
+        return self.row
+
+
+class RecordingConnection:
+    vendor = "postgresql"
+    alias = "default"
+    ops = connection.ops
+
+    def __init__(self, existing=()):
+        self.existing = set(existing)
+        self.executed = []
+
+    def cursor(self):
+        return RecordingCursor(connection=self)
+
+
+def test_get_month_ranges_over_year_end():
+    """Ensure that months are bounded by the first moments of the months in UTC"""
+
+    start = datetime.datetime(2020, 11, 15, 12, tzinfo=UTC)
+
+    assert get_month_ranges(start=start, end=add_months(start, 2)) == [
+        (
+            datetime.datetime(2020, 11, 1, tzinfo=UTC),
+            datetime.datetime(2020, 12, 1, tzinfo=UTC),
+        ),
+        (
+            datetime.datetime(2020, 12, 1, tzinfo=UTC),
+            datetime.datetime(2021, 1, 1, tzinfo=UTC),
+        ),
+        (
+            datetime.datetime(2021, 1, 1, tzinfo=UTC),
+            datetime.datetime(2021, 2, 1, tzinfo=UTC),
+        ),
+    ]
+
+
+def test_create_partitions_skips_existing_ones():
+    """Ensure that only missing partitions are created and attached"""
+
+    now = datetime.datetime(2021, 12, 20, tzinfo=UTC)
+    fake_connection = RecordingConnection(
+        existing={get_partition_name(table="trades_trade", month=now)}
+    )
+
+    created = create_partitions(connection=fake_connection, months_ahead=1, now=now)
+
+    assert created == [
+        "trades_trade_p202201",
+        "trades_price_p202112",
+        "trades_price_p202201",
+    ]
+    attached = [sql for sql, _ in fake_connection.executed if "ATTACH" in sql]
+    assert len(attached) == 3
+    assert attached[0].startswith(
+        'ALTER TABLE "trades_trade" ATTACH PARTITION "trades_trade_p202201"'
+    )
+
+
+def test_sqlite_keeps_single_tables():
+    """Ensure that other databases than PostgreSQL aren't touched"""
+
+    assert partition_tables(connection=connection) == []
+    assert create_partitions(connection=connection) == []
+
+    out = StringIO()
+    call_command("create_partitions", "--convert", stdout=out)
+    assert "single tables" in out.getvalue()
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Partitions require PostgreSQL"
+)
+def test_convert_tables_on_postgresql(user_instances, item_instance, currency_instance):
+    """
+    Ensure that migrate keeps single tables and the explicit conversion keeps
+    rows and ids, new rows go to the month partitions. The conversion is
+    rolled back with the transaction of the test
+    """
+
+    assert not is_partitioned(connection=connection, table="trades_trade")
+
+    trade = Trade.objects.create(
+        item=item_instance,
+        seller=user_instances[0],
+        buyer=user_instances[1],
+        quantity=3,
+        unit_price=Decimal("10"),
+    )
+    price = Price.objects.create(
+        item=item_instance, currency=currency_instance, price=Decimal("10")
+    )
+
+    out = StringIO()
+    call_command("create_partitions", "--convert", "--months", "1", stdout=out)
+
+    assert "Partitioned trades_trade" in out.getvalue()
+    assert "Partitioned trades_price" in out.getvalue()
+    assert is_partitioned(connection=connection, table="trades_trade")
+    assert partition_tables(connection=connection) == []
+
+    assert Trade.objects.get(id=trade.id).quantity == 3
+    assert Price.objects.get(id=price.id).date is None
+    new_trade = Trade.objects.create(
+        item=item_instance,
+        seller=user_instances[1],
+        buyer=user_instances[0],
+        quantity=1,
+        unit_price=Decimal("11"),
+    )
+    assert new_trade.id > trade.id
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT tableoid::regclass::text FROM trades_trade WHERE id = %s",
+            [new_trade.id],
+        )
+        assert cursor.fetchone()[0] == get_partition_name(
+            table="trades_trade", month=new_trade.date
+        )
+        cursor.execute(
+            "SELECT tableoid::regclass::text FROM trades_price WHERE id = %s",
+            [price.id],
+        )
+        assert cursor.fetchone()[0] == "trades_price_default"
@@ -0,0 +1,105 @@
+import json
+import logging
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+
+from apps.trades.services import profiling_logic
+from apps.trades.services.profiling_logic import (RequestProfile,
+                                                  get_duplicated_queries)
+
+
+def test_requests_are_not_profiled_by_default(client, user_instance):
+    """Ensure that profiling is disabled without sample rate"""
+
+    client.force_login(user_instance)
+    response = client.get(reverse("offer-list"))
+
+    assert response.status_code == 200
+    assert "Server-Timing" not in response
+
+
+@override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_SLOW_REQUEST_MS=10000)
+def test_server_timing_header(client, user_instance, offer_sell_instance):
+    """Ensure that sampled request has timings of SQL, view and render"""
+
+    client.force_login(user_instance)
+
+    with mock.patch.object(profiling_logic.logger, "warning") as warning:
+        response = client.get(reverse("offer-list"))
+
+    metrics = {
+        metric.split(";")[0]: metric for metric in response["Server-Timing"].split(", ")
+    }
+
+    assert response.status_code == 200
+    assert list(metrics) == ["total", "db", "view", "render"]
+    assert "queries" in metrics["db"]
+    warning.assert_not_called()
+
+
+@override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_SLOW_REQUEST_MS=0)
+def test_slow_request_sample(client, user_instance, offer_sell_instance):
+    """Ensure that slow request is attributed to view and action in the log"""
+
+    client.force_login(user_instance)
+
+    with mock.patch.object(profiling_logic.logger, "warning") as warning:
+        client.get(reverse("offer-list"))
+
+    sample = json.loads(warning.call_args[0][0])
+
+    assert sample["view"] == "apps.trades.views.OfferViewSet"
+    assert sample["action"] == "list"
+    assert sample["status"] == 200
+    assert sample["sql_count"] > 0
+
+
+def test_asgi_middleware_chain_stays_async(settings, caplog):
+    """Ensure that no middleware of the ASGI handler is adapted to a thread"""
+
+    settings.DEBUG = True
+    caplog.set_level(logging.DEBUG, logger="django.request")
+
+    ASGIHandler()
+
+    assert "adapted" not in caplog.text
+
+
+@override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_SLOW_REQUEST_MS=10000)
+def test_async_request_is_profiled(user_instance, item_instance):
+    """Ensure that queries of async views are recorded through the async chain"""
+
+    client = AsyncClient()
+    client.force_login(user_instance)
+
+    async def get():
+        return await client.get(reverse("market-depth", args=(item_instance.id,)))
+
+    response = async_to_sync(get)()
+
+    metrics = {
+        metric.split(";")[0]: metric for metric in response["Server-Timing"].split(", ")
+    }
+
+    assert response.status_code == 200
+    assert "queries" in metrics["db"]
+
+
+def test_duplicated_queries():
+    """Ensure that only repeated statements are reported, the most frequent first"""
+
+    profile = RequestProfile(method="GET", path="/")
+    execute = mock.Mock()
+    for sql in ("SELECT 1", "SELECT 2", "SELECT 2", "SELECT 3", "SELECT 2", "SELECT 1"):
+        profile(execute, sql, (), False, {})
+
+    duplicated = get_duplicated_queries(profile=profile)
+
+    assert [(query["sql"], query["count"]) for query in duplicated] == [
+        ("SELECT 2", 3),
+        ("SELECT 1", 2),
+    ]
@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from mixer.backend.django import mixer
+
+from apps.trades.models import ItemQuote, Offer, Price, Trade
+from apps.trades.services.db_interaction import delete_offer_by_id
+from apps.trades.services.quote_logic import rebuild_item_quotes
+
+
+def test_quote_created_with_item(item_instance):
+    """Ensure that every new item has empty quote"""
+
+    quote = ItemQuote.objects.get(item=item_instance)
+
+    assert quote.price is None
+    assert quote.best_bid is None
+    assert quote.last_trade_date is None
+
+
+def test_quote_latest_price(item_instance, currency_instance):
+    """Ensure that quote contains the newest price of the item"""
+
+    old_price = Price.objects.create(
+        item=item_instance, currency=currency_instance, price=Decimal("1")
+    )
+    Price.objects.create(
+        item=item_instance, currency=currency_instance, price=Decimal("2")
+    )
+    assert ItemQuote.objects.get(item=item_instance).price == Decimal("2")
+
+    Price.objects.exclude(id=old_price.id).delete()
+    quote = ItemQuote.objects.get(item=item_instance)
+
+    assert quote.price == Decimal("1")
+    assert quote.currency_id == currency_instance.id
+
+
+def test_quote_best_prices(user_instance, item_instance):
+    """Ensure that quote contains the best prices of active offers"""
+
+    offers = [
+        mixer.blend(
+            Offer,
+            user=user_instance,
+            item=item_instance,
+            status=status,
+            price=Decimal(price),
+            is_active=True,
+        )
+        for status, price in (
+            ("SELL", "12"),
+            ("SELL", "11"),
+            ("PURCHASE", "8"),
+            ("PURCHASE", "9"),
+        )
+    ]
+    quote = ItemQuote.objects.get(item=item_instance)
+    assert (quote.best_bid, quote.best_ask) == (Decimal("9"), Decimal("11"))
+
+    delete_offer_by_id(offer_id=offers[1].id)
+    delete_offer_by_id(offer_id=offers[3].id)
+    quote = ItemQuote.objects.get(item=item_instance)
+
+    assert (quote.best_bid, quote.best_ask) == (Decimal("8"), Decimal("12"))
+
+
+def test_quote_last_trade(user_instances, item_instance):
+    """Ensure that quote contains the last trade of the item"""
+
+    for quantity in (1, 2):
+        Trade.objects.create(
+            item=item_instance,
+            seller=user_instances[0],
+            buyer=user_instances[1],
+            quantity=quantity,
+            unit_price=Decimal("5"),
+        )
+    quote = ItemQuote.objects.get(item=item_instance)
+
+    assert quote.last_trade_quantity == 2
+    assert quote.last_trade_price == Decimal("5")
+
+
+def test_rebuild_item_quotes(item_instances, currency_instance):
+    """Ensure that rebuild creates missing quotes and recalculates them"""
+
+    Price.objects.create(
+        item=item_instances[0], currency=currency_instance, price=Decimal("3")
+    )
+    ItemQuote.objects.all().delete()
+
+    assert rebuild_item_quotes() == len(item_instances)
+    assert ItemQuote.objects.get(item=item_instances[0]).price == Decimal("3")
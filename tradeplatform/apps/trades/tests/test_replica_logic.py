@@ -0,0 +1,174 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.trades.checks import check_replica_cache
+from apps.trades.models import Balance, Trade
+from apps.trades.services.replica_logic import (get_read_database,
+                                                has_recent_write,
+                                                read_from_replica)
+
+REPLICA = "replica"
+
+
+@pytest.fixture()
+def replica_database(db, tmp_path, settings):
+    """
+    Second SQLite file with the same schema and no rows stands in for the
+    replica, so rows read from it are distinguishable from the primary ones
+    """
+
+    settings.REPLICA_DATABASE = REPLICA
+    connections.databases[REPLICA] = {
+        **connections.databases["default"],
+        "NAME": str(tmp_path / "replica.sqlite3"),
+        "TEST": {},
+    }
+    call_command("migrate", database=REPLICA, run_syncdb=True, verbosity=0)
+
+    yield REPLICA
+
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+
+
+@pytest.fixture()
+def shared_cache(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache"}
+    }
+
+
+@pytest.fixture()
+def api_client(user_instance):
+    client = APIClient()
+    client.force_authenticate(user=user_instance)
+    return client
+
+
+def test_reads_go_to_default_without_replica(user_instance):
+    """Ensure that reads stay on the primary, if the replica isn't configured"""
+
+    with read_from_replica(user=user_instance) as alias:
+        assert alias is None
+        assert get_read_database() is None
+        assert Balance.objects.filter(user=user_instance).exists()
+
+
+def test_read_from_replica_block(replica_database, user_instance):
+    """Ensure that reads of the block go to the replica and writes to the primary"""
+
+    with read_from_replica(user=user_instance) as alias:
+        assert alias == replica_database
+        assert not Balance.objects.filter(user=user_instance).exists()
+
+        balance = Balance.objects.using("default").get(user=user_instance)
+        balance.quantity = 5
+        balance.save()
+
+    assert get_read_database() is None
+    assert Balance.objects.get(user=user_instance).quantity == 5
+
+
+def test_read_only_viewsets_read_replica(replica_database, api_client):
+    """Ensure that balances are listed from the replica, which has none of them"""
+
+    response = api_client.get(reverse("balance-list"))
+
+    assert response.status_code == 200
+    assert response.data["results"] == []
+    assert Balance.objects.exists()
+
+
+def test_reads_stick_to_primary_after_own_write(
+    replica_database, api_client, user_instance, item_instance
+):
+    """Ensure that the user sees the primary after creating an offer"""
+
+    response = api_client.post(
+        reverse("offer-list"),
+        {
+            "status": "PURCHASE",
+            "item": item_instance.id,
+            "entry_quantity": 1,
+            "price": 1,
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+
+    response = api_client.get(reverse("balance-list"))
+    assert [balance["id"] for balance in response.data["results"]] == [
+        Balance.objects.get(user=user_instance).id
+    ]
+
+
+def test_statistics_by_date_read_replica(
+    replica_database, api_client, user_instance, item_instance
+):
+    """Ensure that statistics, even requested with PUT, don't mark a write"""
+
+    Trade.objects.create(
+        item=item_instance,
+        seller=user_instance,
+        buyer=user_instance,
+        quantity=3,
+        unit_price=10,
+    )
+
+    for _ in range(2):
+        response = api_client.put(
+            reverse("statistic-detail", args=(item_instance.id,)),
+            {"to_date": "2000-01-01T00:00:00Z"},
+            format="json",
+        )
+        assert response.status_code == 201
+
+    response = api_client.get(reverse("trade-list"))
+    assert response.data["results"] == []
+
+
+def test_statistics_put_doesnt_mark_write(api_client, user_instance, item_instance):
+    """Ensure that only the offer, not the statistics PUT, marks the user's write"""
+
+    cache.clear()
+
+    response = api_client.put(
+        reverse("statistic-detail", args=(item_instance.id,)),
+        {"to_date": "2000-01-01T00:00:00Z"},
+        format="json",
+    )
+    assert response.status_code == 201
+    assert not has_recent_write(user=user_instance)
+
+    response = api_client.post(
+        reverse("offer-list"),
+        {
+            "status": "PURCHASE",
+            "item": item_instance.id,
+            "entry_quantity": 1,
+            "price": 1,
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+    assert has_recent_write(user=user_instance)
+
+
+def test_replica_requires_shared_cache(replica_database, settings):
+    """Ensure that stickiness in the memory of one process fails the check"""
+
+    assert [error.id for error in check_replica_cache(app_configs=None)] == [
+        "trades.E001"
+    ]
+
+    settings.REPLICA_STICKY_SECONDS = 0
+    assert check_replica_cache(app_configs=None) == []
+
+
+def test_replica_with_shared_cache(replica_database, shared_cache):
+    assert check_replica_cache(app_configs=None) == []
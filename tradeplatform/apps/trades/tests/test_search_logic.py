@@ -0,0 +1,129 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer
+
+from apps.trades.models import Item, Offer, Trade
+from apps.trades.services.search_logic import (get_trade_search_text,
+                                               rebuild_offer_search_text,
+                                               rebuild_trade_search_text)
+
+
+def test_offer_search_text_filled_on_create(user_instance, item_instance):
+    """Ensure that new offer contains lowercase username in search column"""
+
+    user_instance.username = "Trader_One"
+    user_instance.save()
+
+    offer = mixer.blend(Offer, user=user_instance, item=item_instance)
+
+    assert Offer.objects.get(id=offer.id).search_text == "trader_one"
+
+
+def test_trade_search_text_filled_on_create(user_instances, item_instance):
+    """Ensure that new trade contains item code, seller and buyer in search column"""
+
+    trade = Trade.objects.create(
+        item=item_instance,
+        seller=user_instances[0],
+        buyer=user_instances[1],
+        quantity=1,
+        unit_price=1,
+    )
+
+    assert Trade.objects.get(id=trade.id).search_text == get_trade_search_text(
+        item_code=item_instance.code,
+        seller_username=user_instances[0].username,
+        buyer_username=user_instances[1].username,
+    )
+
+
+def test_get_trade_search_text_without_related_objects():
+    """Ensure that empty values keep separators between search values"""
+
+    search_text = get_trade_search_text(
+        item_code="AAPL", seller_username=None, buyer_username="Bob"
+    )
+
+    assert search_text == "aapl  bob"
+
+
+def test_search_text_updated_after_username_change(offer_sell_instance):
+    """Ensure that changing username updates offers and trades search columns"""
+
+    user = offer_sell_instance.user
+    trade = Trade.objects.create(
+        item=offer_sell_instance.item, seller=user, quantity=1, unit_price=1
+    )
+
+    user.username = "Renamed"
+    user.save()
+
+    assert Offer.objects.get(id=offer_sell_instance.id).search_text == "renamed"
+    assert Trade.objects.get(id=trade.id).search_text == get_trade_search_text(
+        item_code=offer_sell_instance.item.code,
+        seller_username="Renamed",
+        buyer_username=None,
+    )
+
+
+def test_search_text_updated_after_item_code_change(user_instances, item_instance):
+    """Ensure that changing item code updates trades search columns"""
+
+    trade = Trade.objects.create(
+        item=item_instance, buyer=user_instances[0], quantity=1, unit_price=1
+    )
+
+    item_instance.code = "NEW"
+    item_instance.save()
+
+    assert Trade.objects.get(id=trade.id).search_text.startswith("new ")
+
+
+def test_rebuild_search_text(offer_sell_instance, user_instances):
+    """Ensure that rebuild functions restore search columns in the database"""
+
+    trade = Trade.objects.create(
+        item=offer_sell_instance.item,
+        seller=user_instances[0],
+        buyer=user_instances[1],
+        quantity=1,
+        unit_price=1,
+    )
+    Offer.objects.update(search_text="")
+    Trade.objects.update(search_text="")
+
+    rebuild_offer_search_text(queryset=Offer.objects.all())
+    rebuild_trade_search_text(queryset=Trade.objects.all())
+
+    assert (
+        Offer.objects.get(id=offer_sell_instance.id).search_text
+        == offer_sell_instance.user.username.lower()
+    )
+    assert Trade.objects.get(id=trade.id).search_text == get_trade_search_text(
+        item_code=Item.objects.get(id=offer_sell_instance.item.id).code,
+        seller_username=User.objects.get(id=user_instances[0].id).username,
+        buyer_username=User.objects.get(id=user_instances[1].id).username,
+    )
+
+
+def test_unrelated_save_keeps_search_text(offer_sell_instance, user_instances):
+    """Ensure that offers and trades aren't updated, when username and code stay"""
+
+    user = offer_sell_instance.user
+    item = offer_sell_instance.item
+    Trade.objects.create(
+        item=item, seller=user, buyer=user_instances[1], quantity=1, unit_price=1
+    )
+
+    with CaptureQueriesContext(connection) as context:
+        user.email = "trader@example.com"
+        user.save()
+        item.name = "Renamed"
+        item.save()
+
+    assert not [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith(('UPDATE "trades_offer"', 'UPDATE "trades_trade"'))
+    ]
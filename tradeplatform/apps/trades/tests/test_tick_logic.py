@@ -0,0 +1,23 @@
+import math
+from decimal import Decimal
+
+from apps.trades.services.tick_logic import (from_ticks, get_balance_changes,
+                                             to_ticks)
+
+
+def test_price_converts_to_ticks_and_back():
+    """Ensure that the database price survives conversion into ticks"""
+
+    assert to_ticks(Decimal("12.34")) == 1234
+    assert from_ticks(1234) == Decimal("12.34")
+
+
+def test_balance_changes_are_rounded_down_like_decimal_sum():
+    """Ensure that integer changes equal the truncated Decimal full price"""
+
+    for price in (Decimal("0.01"), Decimal("7.00"), Decimal("8.33"), Decimal("19.99")):
+        for quantity in (0, 1, 3, 37):
+            full_price = price * quantity
+            assert get_balance_changes(
+                price_ticks=to_ticks(price), quantity=quantity
+            ) == (math.floor(full_price), math.floor(-full_price))
@@ -1,6 +1,8 @@
+from django.urls import path
 from rest_framework import routers
 
 from apps.registration import views as reg_views
+from apps.trades import async_views
 from apps.trades import views as trades_views
 
 router = routers.DefaultRouter()
@@ -16,4 +18,21 @@ router.register("users", reg_views.UserViewSet, basename="user")
 router.register("userprofiles", reg_views.UserProfileViewSet, basename="userprofile")
 router.register("statistics", trades_views.StatisticView, basename="statistic")
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path(
+        "market/<int:item_id>/depth/",
+        async_views.order_book_depth,
+        name="market-depth",
+    ),
+    path(
+        "market/<int:item_id>/statistics/",
+        async_views.item_statistics,
+        name="market-statistics",
+    ),
+    path(
+        "market/<int:item_id>/trades/",
+        async_views.recent_trades,
+        name="market-trades",
+    ),
+    path("market/prices/", async_views.latest_prices, name="market-prices"),
+]
@@ -1,20 +1,38 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
 from rest_framework import generics, mixins, status, viewsets
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
 
 from apps.trades.customfilters import (BalanceFilter, InventoryFilter,
+                                       ItemFilter, OfferArchiveFilter,
                                        OfferFilter, PriceFilter, TradeFilter)
 from apps.trades.custompermission import IsAdminOrReadOnly, IsOwnerOrReadOnly
+from apps.trades.customserializers import ExpandableQuerySetMixin
+from apps.trades.customthrottles import (OfferCreateThrottle, ReadThrottle,
+                                         StatisticThrottle)
+from apps.trades.customviews import FastListMixin, ReplicaReadMixin
 from apps.trades.models import (Balance, Currency, Inventory, Item, Offer,
-                                Price, Trade, WatchList)
+                                OfferArchive, Price, Trade, WatchList)
 from apps.trades.serializers import (BalanceSerializer, CurrencySerializer,
-                                     InventorySerializer, ItemSerializer,
-                                     OfferCreateSerializer, OfferSerializer,
-                                     PriceCreateSerializer, PriceSerializer,
-                                     StatisticSerializer, TradeSerializer,
+                                     InventorySerializer, ItemQuoteSerializer,
+                                     ItemSerializer, OfferCreateSerializer,
+                                     OfferSerializer, PriceCreateSerializer,
+                                     PriceSerializer, StatisticSerializer,
+                                     TradeSerializer,
                                      WatchListCreateSerializer,
                                      WatchListSerializer)
+from apps.trades.services.archive_logic import is_archived_request
 from apps.trades.services.db_interaction import delete_offer_by_id
+from apps.trades.services.feed_logic import schedule_book_level
+from apps.trades.services.metrics_logic import render_metrics
+from apps.trades.services.quote_logic import (BOOK_FIELDS,
+                                              get_watchlist_quotes,
+                                              refresh_item_quote)
 from apps.trades.services.statistic_logic import get_statistics_attribute
 
 
@@ -46,18 +64,20 @@ class CurrencyViewSet(
     )
 
 
-class ItemViewSet(viewsets.ModelViewSet):
+class ItemViewSet(ExpandableQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for Item model"""
 
     queryset = Item.objects.all()
     serializer_class = ItemSerializer
+    expandable_select_related = {"latest_price": "quote__currency"}
+    expandable_prefetch_related = {
+        "price": "price",
+        "price.currency": "price__currency",
+    }
 
     permission_classes = (IsAdminOrReadOnly, IsAuthenticated)
 
-    filterset_fields = (
-        "name",
-        "code",
-    )
+    filterset_class = ItemFilter
     search_fields = (
         "^name",
         "^code",
@@ -65,13 +85,15 @@ class ItemViewSet(viewsets.ModelViewSet):
     ordering_fields = (
         "name",
         "code",
+        "quote__price",
     )
 
 
-class PriceViewSet(viewsets.ModelViewSet):
+class PriceViewSet(ExpandableQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for Price model"""
 
     queryset = Price.objects.all()
+    expandable_select_related = {"currency": "currency"}
 
     filterset_class = PriceFilter
     search_fields = ("^item__code",)
@@ -93,6 +115,7 @@ class PriceViewSet(viewsets.ModelViewSet):
 
 
 class WatchListViewSet(
+    ExpandableQuerySetMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -101,6 +124,16 @@ class WatchListViewSet(
     """ViewSet for WatchList model"""
 
     queryset = WatchList.objects.all()
+    expandable_select_related = {
+        "user": "user",
+        "user.profile": "user__profile",
+    }
+    expandable_prefetch_related = {
+        "item": "item",
+        "item.price": "item__price",
+        "item.price.currency": "item__price__currency",
+        "item.latest_price": "item__quote__currency",
+    }
 
     filterset_fields = ("user__username",)
     search_fields = ("user__username",)
@@ -113,17 +146,47 @@ class WatchListViewSet(
 
         if self.action == "update":
             return WatchListCreateSerializer
+        if self.action == "quotes":
+            return ItemQuoteSerializer
         return WatchListSerializer
 
+    def get_queryset(self):
+        """Quotes action reads watched items from quotes, so nothing is prefetched"""
+
+        if self.action == "quotes":
+            return self.queryset.all()
+        return super(WatchListViewSet, self).get_queryset()
+
+    @action(detail=True, methods=["get"])
+    def quotes(self, request, *args, **kwargs):
+        """Get the latest price, best bid, best ask and last trade of watched items"""
+
+        watchlist = self.get_object()
+        quotes = get_watchlist_quotes(watchlist_id=watchlist.id)
+        serializer = self.get_serializer(quotes, many=True)
+
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
 
-class OfferViewSet(viewsets.ModelViewSet):
+
+class OfferViewSet(ExpandableQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for Offer model"""
 
     queryset = Offer.objects.all()
     serializer_class = OfferSerializer
+    expandable_select_related = {
+        "user": "user",
+        "user.profile": "user__profile",
+        "item": "item",
+        "item.latest_price": "item__quote__currency",
+    }
+    expandable_prefetch_related = {
+        "item.price": "item__price",
+        "item.price.currency": "item__price__currency",
+    }
 
     filterset_class = OfferFilter
     search_fields = ("user__username",)
+    search_column = "search_text"
     ordering_fields = (
         "user__username",
         "price",
@@ -132,6 +195,37 @@ class OfferViewSet(viewsets.ModelViewSet):
     )
 
     permission_classes = (IsOwnerOrReadOnly, IsAuthenticated)
+    throttle_classes = (ReadThrottle, OfferCreateThrottle)
+
+    def initial(self, request, *args, **kwargs):
+        """Read archived offers instead of the hot table, if `archived=true` is given"""
+
+        super(OfferViewSet, self).initial(request, *args, **kwargs)
+
+        if self.action in ("list", "retrieve") and is_archived_request(
+            query_params=request.query_params
+        ):
+            self.queryset = OfferArchive.objects.all()
+            self.filterset_class = OfferArchiveFilter
+
+    def get_object(self):
+        """
+        Look for the offer in the archive, if it was moved there,
+        so links to offers of old trades keep working
+        """
+
+        try:
+            return super(OfferViewSet, self).get_object()
+        except Http404:
+            if self.action != "retrieve" or self.queryset.model is OfferArchive:
+                raise
+
+        instance = get_object_or_404(
+            OfferArchive.objects.select_related("user", "item"),
+            pk=self.kwargs[self.lookup_url_kwarg or self.lookup_field],
+        )
+        self.check_object_permissions(self.request, instance)
+        return instance
 
     def perform_create(self, serializer):
         """
@@ -142,6 +236,27 @@ class OfferViewSet(viewsets.ModelViewSet):
         user = self.request.user
         serializer.save(user=user)
 
+    def perform_update(self, serializer):
+        """Push the previous price level to the live feed if the offer moved"""
+
+        instance = serializer.instance
+        item_id, offer_status, price = (
+            instance.item_id,
+            instance.status,
+            instance.price,
+        )
+
+        serializer.save()
+
+        if item_id is not None and (item_id, offer_status, price) != (
+            instance.item_id,
+            instance.status,
+            instance.price,
+        ):
+            schedule_book_level(item_id=item_id, status=offer_status, price=price)
+            if item_id != instance.item_id:
+                refresh_item_quote(item_id=item_id, fields=BOOK_FIELDS)
+
     def perform_destroy(self, instance):
         """
         When receive delete method, instance won't be deleted from the database.
@@ -158,11 +273,26 @@ class OfferViewSet(viewsets.ModelViewSet):
         return OfferCreateSerializer
 
 
-class InventoryViewSet(viewsets.ReadOnlyModelViewSet):
+class InventoryViewSet(
+    ReplicaReadMixin,
+    FastListMixin,
+    ExpandableQuerySetMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ViewSet for Inventory model"""
 
     queryset = Inventory.objects.all()
     serializer_class = InventorySerializer
+    expandable_select_related = {
+        "user": "user",
+        "user.profile": "user__profile",
+        "item": "item",
+        "item.latest_price": "item__quote__currency",
+    }
+    expandable_prefetch_related = {
+        "item.price": "item__price",
+        "item.price.currency": "item__price__currency",
+    }
 
     filterset_class = InventoryFilter
     search_fields = (
@@ -178,11 +308,21 @@ class InventoryViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = (IsAuthenticated,)
 
 
-class BalanceViewSet(viewsets.ReadOnlyModelViewSet):
+class BalanceViewSet(
+    ReplicaReadMixin,
+    FastListMixin,
+    ExpandableQuerySetMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ViewSet for Balance model"""
 
     queryset = Balance.objects.all()
     serializer_class = BalanceSerializer
+    expandable_select_related = {
+        "user": "user",
+        "user.profile": "user__profile",
+        "currency": "currency",
+    }
 
     filterset_class = BalanceFilter
     search_fields = (
@@ -198,11 +338,24 @@ class BalanceViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = (IsAuthenticated,)
 
 
-class TradeViewSet(viewsets.ReadOnlyModelViewSet):
+class TradeViewSet(
+    ReplicaReadMixin,
+    FastListMixin,
+    ExpandableQuerySetMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ViewSet for Trade model"""
 
     queryset = Trade.objects.all()
     serializer_class = TradeSerializer
+    expandable_select_related = {
+        "item": "item",
+        "item.latest_price": "item__quote__currency",
+    }
+    expandable_prefetch_related = {
+        "item.price": "item__price",
+        "item.price.currency": "item__price__currency",
+    }
 
     filterset_class = TradeFilter
     search_fields = (
@@ -210,6 +363,7 @@ class TradeViewSet(viewsets.ReadOnlyModelViewSet):
         "seller__username",
         "buyer__username",
     )
+    search_column = "search_text"
     ordering_fields = (
         "item__code",
         "unit_price",
@@ -219,11 +373,14 @@ class TradeViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = (IsAuthenticated,)
 
 
-class StatisticView(viewsets.GenericViewSet):
+class StatisticView(ReplicaReadMixin, viewsets.GenericViewSet):
     """View for statistic about offer's price"""
 
     serializer_class = StatisticSerializer
+    # Statistic by the date is only read, though it's requested with PUT
+    replica_methods = SAFE_METHODS + ("PUT",)
     permission_classes = (IsAuthenticated,)
+    throttle_classes = (StatisticThrottle,)
 
     def retrieve(self, request, *args, **kwargs):
         """Get statistic about offer's price"""
@@ -243,3 +400,17 @@ class StatisticView(viewsets.GenericViewSet):
         )
 
         return Response(data=response_data, status=status.HTTP_201_CREATED)
+
+
+@require_GET
+def metrics_view(request):
+    """Expose metrics in Prometheus text format"""
+
+    if settings.METRICS_TOKEN and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
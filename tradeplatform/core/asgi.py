@@ -13,4 +13,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Apps can be imported only after Django is set up
+from apps.trades import consumers  # noqa: E402 isort:skip
+
+
+async def application(scope, receive, send):
+    """Serve the live feed connections and pass other requests to Django"""
+
+    if consumers.is_feed_request(scope):
+        return await consumers.feed_application(scope, receive, send)
+
+    return await django_application(scope, receive, send)
@@ -5,5 +5,18 @@ app = Celery("trader", include=["apps.trades.tasks", "apps.registration.tasks"])
 app.autodiscover_tasks()
 
 app.conf.beat_schedule = {
-    "make_trades": {"task": "apps.trades.tasks.start_trade", "schedule": crontab()}
+    "make_trades": {
+        "task": "apps.trades.tasks.start_trade",
+        "schedule": crontab(),
+        # Ticks, which waited in the queue for the next one, are dropped
+        "options": {"expires": 55},
+    },
+    "archive_offers": {
+        "task": "apps.trades.tasks.archive_old_offers",
+        "schedule": crontab(minute=30, hour=3),
+    },
+    "create_partitions": {
+        "task": "apps.trades.tasks.create_future_partitions",
+        "schedule": crontab(minute=0, hour=3),
+    },
 }
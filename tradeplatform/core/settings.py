@@ -47,11 +47,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "apps.trades.custommiddleware.ProfilingMiddleware",
+    "apps.trades.custommiddleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.trades.custommiddleware.ReplicaStickinessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -91,6 +94,25 @@ DATABASES = {
     }
 }
 
+# Read-only viewsets and statistics read the replica, if SQL_REPLICA_HOST or
+# SQL_REPLICA_DATABASE is set. Users read the primary for REPLICA_STICKY_SECONDS
+# after their own writes, so they see them despite replication lag. Writes are
+# remembered in the default cache, which must be shared by all processes
+# (CACHE_BACKEND below), otherwise the trades.E001 check fails
+REPLICA_DATABASE = os.environ.get("REPLICA_DATABASE_ALIAS", default="replica")
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", default=10))
+if os.environ.get("SQL_REPLICA_HOST") or os.environ.get("SQL_REPLICA_DATABASE"):
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES["default"],
+        "NAME": os.environ.get("SQL_REPLICA_DATABASE", DATABASES["default"]["NAME"]),
+        "HOST": os.environ.get("SQL_REPLICA_HOST", DATABASES["default"]["HOST"]),
+        "PORT": os.environ.get("SQL_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        # Tests read the test database through the replica connection
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["apps.trades.customdbrouters.ReplicaRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -134,7 +156,7 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static/")
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.registration.customauthentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
     ),
@@ -143,8 +165,116 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": (
         "django_filters.rest_framework.DjangoFilterBackend",
         "rest_framework.filters.OrderingFilter",
-        "rest_framework.filters.SearchFilter",
+        "apps.trades.customfilters.IndexedSearchFilter",
     ),
+    "DEFAULT_THROTTLE_CLASSES": ("apps.trades.customthrottles.ReadThrottle",),
+    "DEFAULT_THROTTLE_RATES": {
+        "reads": os.environ.get("THROTTLE_READS_RATE", default="600/min"),
+        "offer_create": os.environ.get("THROTTLE_OFFER_CREATE_RATE", default="30/min"),
+        "statistics": os.environ.get("THROTTLE_STATISTICS_RATE", default="60/min"),
+    },
+}
+
+# Build read-only list responses from QuerySet.values() instead of ModelSerializer
+FAST_LIST_SERIALIZATION = int(os.environ.get("FAST_LIST_SERIALIZATION", default=1))
+
+# Fan-out backend of the live feed, the feed is disabled when it's empty.
+# RedisFeedBackend is required when trades are settled by Celery workers
+# or the ASGI server runs several processes
+FEED_BACKEND = os.environ.get("FEED_BACKEND", default="")
+FEED_REDIS_URL = os.environ.get("FEED_REDIS_URL", default="redis://redis:6379/1")
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", default=""),
+    }
+}
+
+# Seconds to keep compact user principal used by JWT authentication. Local memory
+# cache is invalidated only in the current process, so keep it short
+AUTH_PRINCIPAL_CACHE_TIMEOUT = int(
+    os.environ.get("AUTH_PRINCIPAL_CACHE_TIMEOUT", default=30)
+)
+
+# Share of requests profiled by ProfilingMiddleware, 0 disables profiling.
+# Profiled requests with total time over PROFILING_SLOW_REQUEST_MS are written
+# to PROFILING_LOG_FILE with their duplicated SQL statements
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", default=0))
+PROFILING_SLOW_REQUEST_MS = int(
+    os.environ.get("PROFILING_SLOW_REQUEST_MS", default=500)
+)
+PROFILING_LOG_FILE = os.environ.get(
+    "PROFILING_LOG_FILE", default=os.path.join(BASE_DIR, "profiling.log")
+)
+
+# Storage of metrics exposed at /metrics. InMemoryMetricsBackend counts only
+# the current process, RedisMetricsBackend aggregates gunicorn workers and
+# Celery processes, so it's the default when METRICS_REDIS_URL or Redis broker
+# of Celery is configured. METRICS_TOKEN requires "Authorization: Bearer <token>"
+METRICS_BACKEND = os.environ.get(
+    "METRICS_BACKEND",
+    default=(
+        "apps.trades.services.metrics_logic.RedisMetricsBackend"
+        if os.environ.get("METRICS_REDIS_URL")
+        or os.environ.get("CELERY_BROKER_URL", "").startswith("redis")
+        else "apps.trades.services.metrics_logic.InMemoryMetricsBackend"
+    ),
+)
+METRICS_REDIS_URL = os.environ.get("METRICS_REDIS_URL", default="redis://redis:6379/2")
+# Seconds to wait for Redis, so its outage doesn't slow down every request
+METRICS_REDIS_TIMEOUT = float(os.environ.get("METRICS_REDIS_TIMEOUT", default=0.25))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", default="")
+
+# Lease of the periodic start_trade task, so overlapping ticks are skipped.
+# The lease is extended during the pass, the timeout only has to outlive
+# one purchase offer's matching. DatabaseLockBackend keeps it in TaskLease rows
+LOCK_BACKEND = os.environ.get(
+    "LOCK_BACKEND", default="apps.trades.services.lock_logic.DatabaseLockBackend"
+)
+LOCK_REDIS_URL = os.environ.get("LOCK_REDIS_URL", default="redis://redis:6379/3")
+START_TRADE_LEASE_TIMEOUT = int(
+    os.environ.get("START_TRADE_LEASE_TIMEOUT", default=120)
+)
+
+# Inactive offers, which didn't change for this number of days, are moved
+# to the archive table by the daily archive_offers task
+OFFER_ARCHIVE_AFTER_DAYS = int(os.environ.get("OFFER_ARCHIVE_AFTER_DAYS", default=30))
+OFFER_ARCHIVE_BATCH_SIZE = int(os.environ.get("OFFER_ARCHIVE_BATCH_SIZE", default=1000))
+
+# Trade and Price tables are partitioned by month on PostgreSQL, partitions
+# are created for the current month and this number of months ahead
+PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD", default=3))
+
+# Queue of changed offers for run_matcher process, empty disables notifications
+# and the matcher finds changes by reloading its books
+MATCHER_REDIS_URL = os.environ.get("MATCHER_REDIS_URL", default="")
+MATCHER_QUEUE_KEY = os.environ.get("MATCHER_QUEUE_KEY", default="matcher:offers")
+# Directory of books snapshot and journal, so run_matcher restarts without
+# loading all offers. Empty disables them
+MATCHER_STORAGE_DIR = os.environ.get("MATCHER_STORAGE_DIR", default="")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "profiling": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": PROFILING_LOG_FILE,
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": 5,
+            "delay": True,
+        },
+    },
+    "loggers": {
+        "apps.trades.profiling": {
+            "handlers": ["profiling"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
 }
 
 SIMPLE_JWT = {